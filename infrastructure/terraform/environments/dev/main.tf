@@ -124,12 +124,17 @@ resource "aws_iam_role_policy" "lambda_policy" {
           "dynamodb:GetItem",
           "dynamodb:UpdateItem",
           "dynamodb:Query",
-          "dynamodb:Scan"
+          "dynamodb:Scan",
+          "dynamodb:BatchGetItem",
+          "dynamodb:BatchWriteItem"
         ]
         Resource = [
           module.dynamodb.trigger_history_table_arn,
           module.dynamodb.positions_table_arn,
           module.dynamodb.economic_calendar_table_arn,
+          module.dynamodb.decision_cache_table_arn,
+          module.dynamodb.news_clusters_table_arn,
+          module.dynamodb.news_articles_table_arn,
           "${module.dynamodb.trigger_history_table_arn}/index/*",
           "${module.dynamodb.positions_table_arn}/index/*",
           "${module.dynamodb.economic_calendar_table_arn}/index/*"
@@ -152,7 +157,8 @@ resource "aws_iam_role_policy" "lambda_policy" {
       {
         Effect = "Allow"
         Action = [
-          "bedrock:InvokeModel"
+          "bedrock:InvokeModel",
+          "bedrock:InvokeModelWithResponseStream"
         ]
         Resource = "arn:aws:bedrock:*::foundation-model/anthropic.claude-3-haiku-20240307-v1:0"
       },
@@ -171,6 +177,13 @@ resource "aws_iam_role_policy" "lambda_policy" {
         ]
         Resource = "arn:aws:ssm:*:*:parameter/ai-trading/*"
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "lambda:InvokeFunction"
+        ]
+        Resource = module.lambda.ai_analysis_function_arn
+      },
       {
         Effect = "Allow"
         Action = [
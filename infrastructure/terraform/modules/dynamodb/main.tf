@@ -27,12 +27,31 @@ resource "aws_dynamodb_table" "trigger_history" {
     type = "S"
   }
 
+  attribute {
+    name = "record_type"
+    type = "S"
+  }
+
   global_secondary_index {
     name            = "TimestampIndex"
     hash_key        = "timestamp"
     projection_type = "ALL"
   }
 
+  # Trigger log items newest-first (circuit breaker hourly count / minimum interval)
+  global_secondary_index {
+    name            = "RecentTriggerIndex"
+    hash_key        = "record_type"
+    range_key       = "timestamp"
+    projection_type = "KEYS_ONLY"
+  }
+
+  # ai_analysis idempotency claims expire; trigger log items have no expires_at
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
   tags = {
     Environment = var.environment
     Project     = var.project_name
@@ -109,6 +128,75 @@ resource "aws_dynamodb_table" "economic_calendar" {
   }
 }
 
+# Decision Cache Table (ai_analysis results for near-duplicate news)
+resource "aws_dynamodb_table" "decision_cache" {
+  name           = "${var.project_name}-decision-cache-${var.environment}"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "cache_key"
+
+  attribute {
+    name = "cache_key"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = var.project_name
+    Phase       = "1"
+  }
+}
+
+# News Clusters Table (LSH index of triggered near-duplicate news)
+resource "aws_dynamodb_table" "news_clusters" {
+  name           = "${var.project_name}-news-clusters-${var.environment}"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "lsh_key"
+
+  attribute {
+    name = "lsh_key"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = var.project_name
+    Phase       = "1"
+  }
+}
+
+# News Articles Table (idempotent ingestion in news_fetch)
+resource "aws_dynamodb_table" "news_articles" {
+  name           = "${var.project_name}-news-articles-${var.environment}"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "article_key"
+
+  attribute {
+    name = "article_key"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = var.project_name
+    Phase       = "1"
+  }
+}
+
 # Outputs
 output "trigger_history_table_name" {
   value = aws_dynamodb_table.trigger_history.name
@@ -133,3 +221,27 @@ output "economic_calendar_table_name" {
 output "economic_calendar_table_arn" {
   value = aws_dynamodb_table.economic_calendar.arn
 }
+
+output "decision_cache_table_name" {
+  value = aws_dynamodb_table.decision_cache.name
+}
+
+output "decision_cache_table_arn" {
+  value = aws_dynamodb_table.decision_cache.arn
+}
+
+output "news_clusters_table_name" {
+  value = aws_dynamodb_table.news_clusters.name
+}
+
+output "news_clusters_table_arn" {
+  value = aws_dynamodb_table.news_clusters.arn
+}
+
+output "news_articles_table_name" {
+  value = aws_dynamodb_table.news_articles.name
+}
+
+output "news_articles_table_arn" {
+  value = aws_dynamodb_table.news_articles.arn
+}
@@ -96,8 +96,9 @@ resource "aws_lambda_function" "unified_judgment" {
 
   environment {
     variables = {
-      ENVIRONMENT   = var.environment
-      SNS_TOPIC_ARN = var.sns_topic_arn
+      ENVIRONMENT               = var.environment
+      SNS_TOPIC_ARN             = var.sns_topic_arn
+      AI_ANALYSIS_FUNCTION_NAME = aws_lambda_function.ai_analysis.function_name
     }
   }
 
@@ -4,15 +4,104 @@ Phase 1: AI Analysis Engine
 Uses AWS Bedrock (Claude Haiku) to analyze news/market conditions
 and make trading decisions based on discovered patterns.
 Based on DESIGN_DOC_FINAL.md Section 5.6
+
+Patterns and the prompt are fetched from SSM in one GetParameters call and
+kept in memory across warm invocations. After SSM_CACHE_TTL_SEC they are
+re-fetched, and a parameter is only re-parsed if its version changed.
+
+Patterns are sent to the model minified with only PROMPT_PATTERN_FIELDS, as a
+static prefix block ahead of the per-trigger part of the prompt, so it can be
+marked for Bedrock prompt caching (BEDROCK_ANALYSIS['prompt_caching']).
+
+Pattern conditions are pre-matched locally (utils.pattern_matcher); Bedrock
+is only called when at least one pattern can match, with just those patterns.
+
+A news trigger may carry several same-symbol items ('news_items', coalesced
+by news_fetch); they are analysed in one multi-item call and the per-item
+decisions are returned in item order.
+
+Decisions for repeated or near-duplicate headlines are reused from the
+decision cache (utils.decision_cache) keyed by symbol, headline MinHash and
+pattern library version. Buy/Sell decisions (with their prices) are only
+reused for minutes, Hold decisions for a day.
+
+Responses are parsed and schema-validated by utils.response_parser (forced
+tool call when BEDROCK_ANALYSIS['structured_output'], tolerant JSON
+extraction otherwise). With BEDROCK_ANALYSIS['streaming'], single-item
+decisions are streamed and the stream is closed as soon as the entry
+outcome (and, for entries, the trade prices) is known.
+
+Invoked asynchronously by unified_judgment with an idempotency key, claimed
+with a conditional write so retried deliveries are analysed once, and a
+correlation id that is echoed in the result. A claim not completed within
+ANALYSIS_CLAIM['lease_sec'] (the function timeout) can be reclaimed, so a
+retry after a crash or timeout still analyses the trigger.
 """
 
 import json
 import os
-from datetime import datetime
-from typing import Dict, Any, Optional
-
-from lambda.utils.aws_clients import AWSClients, get_ssm_parameter
-from lambda.utils.constants import SSM_PARAMS
+import time
+from datetime import datetime, timedelta
+from string import Formatter
+from typing import Dict, Any, List, Optional, Tuple
+from botocore.exceptions import ClientError
+
+from lambda.utils.aws_clients import AWSClients, get_ssm_parameters, get_table
+from lambda.utils.constants import (
+    ANALYSIS_CLAIM, BEDROCK_ANALYSIS, DECISION_CACHE, DYNAMODB_TABLES, SSM_CACHE_TTL_SEC, SSM_PARAMS
+)
+from lambda.utils.decision_cache import DecisionCache
+from lambda.utils.pattern_matcher import PatternMatcher, extract_trigger_features
+from lambda.utils.response_parser import (
+    DECISION_ITEM_SCHEMA, DECISION_SCHEMA, ParseStats, get_stats, list_schema, make_tool,
+    parse_model_response, partial_fields, tool_choice, valid_items, validate
+)
+
+# Parameters loaded by this Lambda
+AI_PARAMETER_NAMES = [SSM_PARAMS['patterns'], SSM_PARAMS['prompt_realtime_analysis']]
+
+# SSM parameters shared across warm invocations:
+# {'params': {name: {'version', 'value'}}, 'expires_at'}
+_ssm_cache = {'params': {}, 'expires_at': 0.0}
+
+# Pattern fields the model needs for matching (name, hypothesis, sample_size are dropped)
+PROMPT_PATTERN_FIELDS = ['pattern_id', 'conditions', 'prediction']
+
+PATTERNS_PLACEHOLDER = 'patterns_from_phase0'
+
+# Compact serialisation of the cached patterns object: {'source', 'text'}
+_compact_patterns_cache = {'source': None, 'text': None}
+
+# Compiled conditions of the cached patterns object: {'source', 'matcher'}
+_pattern_matcher_cache = {'source': None, 'matcher': None}
+
+# Reused across warm invocations
+_decision_cache = None
+
+# Idempotency records in the trigger history table: trigger_id = prefix + key
+ANALYSIS_RECORD_PREFIX = 'analysis_'
+
+# Structured output tools (forced tool_choice: the tool input is the decision)
+DECISION_TOOL = make_tool(
+    "record_decision", "Record the trading decision for the news", DECISION_SCHEMA
+)
+BATCH_DECISION_TOOL = make_tool(
+    "record_decisions", "Record one trading decision per news item",
+    list_schema("results", DECISION_ITEM_SCHEMA)
+)
+
+# Streamed decision: fields that decide should_enter_position, and those an
+# entry additionally needs before the stream can be cut off
+DECISION_OUTCOME_FIELDS = ['action', 'confidence', 'match_score']
+ENTRY_FIELDS = ['matched_pattern_id', 'entry_price', 'target_profit', 'stop_loss']
+
+# Appended to multi-item prompts (the template describes a single result)
+BATCH_ITEM_HEADER = "\n\n【ニュース {index}】"
+BATCH_INSTRUCTION = (
+    "\n\n【複数ニュースの出力形式】\n"
+    "上記{count}件のニュースそれぞれについて判定し、各結果に \"item_index\"（0始まり）を付けて、"
+    "{{\"results\": [...]}} の形式のJSONで、ニュースと同じ順序で出力してください。"
+)
 
 
 def lambda_handler(event, context):
@@ -27,6 +116,8 @@ def lambda_handler(event, context):
 
     detail = event.get('detail', event)  # Support both EventBridge and direct invocation
     trigger_type = detail.get('trigger_type')
+    idempotency_key = event.get('idempotency_key')
+    correlation_id = event.get('correlation_id')
 
     if not trigger_type:
         return {
@@ -34,6 +125,19 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': 'Missing trigger_type'})
         }
 
+    print(f"Correlation id: {correlation_id}")
+
+    # Async invocations can be retried: analyse each trigger once
+    if idempotency_key and not claim_analysis(idempotency_key, correlation_id):
+        print(f"Duplicate invocation skipped: {idempotency_key}")
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'Duplicate invocation',
+                'correlation_id': correlation_id
+            })
+        }
+
     # Load patterns from SSM
     patterns = load_patterns()
     if not patterns:
@@ -50,50 +154,319 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': 'Failed to load prompt'})
         }
 
-    # Analyze with Claude
-    analysis_result = analyze_with_claude(detail, patterns, prompt_template)
+    # Analyze (one model call for all items of a coalesced trigger)
+    results = analyze_trigger(detail, patterns, prompt_template)
+
+    # Decide action per item
+    for analysis_result in results:
+        analysis_result['correlation_id'] = correlation_id
+
+        if should_enter_position(analysis_result):
+            # TODO: Invoke position_manager_lambda
+            print(f"✓ RECOMMENDED ACTION: {analysis_result.get('action')}")
+            print(f"  Pattern: {analysis_result.get('matched_pattern_id')}")
+            print(f"  Confidence: {analysis_result.get('confidence')}")
+        else:
+            print(f"⊘ No action (confidence too low or criteria not met)")
 
-    # Decide action
-    if should_enter_position(analysis_result):
-        # TODO: Invoke position_manager_lambda
-        print(f"✓ RECOMMENDED ACTION: {analysis_result.get('action')}")
-        print(f"  Pattern: {analysis_result.get('matched_pattern_id')}")
-        print(f"  Confidence: {analysis_result.get('confidence')}")
-    else:
-        print(f"⊘ No action (confidence too low or criteria not met)")
+    # Primary result: first recommended entry, else the first item
+    analysis_result = next((r for r in results if should_enter_position(r)), results[0])
+
+    if idempotency_key:
+        record_analysis_result(idempotency_key, analysis_result)
+
+    body = {
+        'message': 'Analysis complete',
+        'correlation_id': correlation_id,
+        'result': analysis_result
+    }
+    if len(results) > 1:
+        body['results'] = results
 
     return {
         'statusCode': 200,
-        'body': json.dumps({
-            'message': 'Analysis complete',
-            'result': analysis_result
-        })
+        'body': json.dumps(body)
     }
 
 
+def analyze_trigger(detail: Dict, patterns: Dict, prompt_template: str) -> List[Dict[str, Any]]:
+    """
+    Pre-match and analyse every item of a trigger
+
+    Items no pattern can match get a Hold result without a model call, items
+    with a cached decision reuse it, and the rest share one Bedrock call
+    (with the union of their candidate patterns).
+
+    Returns:
+        One analysis result per item, in item order
+    """
+
+    item_details = split_trigger_items(detail)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(item_details)
+    pending = []
+
+    # Pre-match pattern conditions locally
+    for index, item_detail in enumerate(item_details):
+        candidate_patterns = select_candidate_patterns(item_detail, patterns)
+        if candidate_patterns is None:
+            results[index] = hold_result("none", "No pattern conditions match")
+        else:
+            pending.append((index, item_detail, candidate_patterns))
+
+    # Reuse decisions for repeated / near-duplicate stories
+    pending = lookup_cached_decisions(pending, results)
+
+    # Analyze with Claude (only if some pattern can match)
+    if len(pending) == 1:
+        index, item_detail, candidate_patterns = pending[0]
+        results[index] = analyze_with_claude(item_detail, candidate_patterns, prompt_template)
+    elif pending:
+        batch_patterns = merge_candidate_patterns(patterns, [p for _, _, p in pending])
+        batch_results = analyze_batch_with_claude([d for _, d, _ in pending], batch_patterns, prompt_template)
+        for (index, _, _), analysis in zip(pending, batch_results):
+            results[index] = analysis
+
+    store_decisions(pending, results)
+
+    if len(item_details) > 1:
+        for result, item_detail in zip(results, item_details):
+            result['news_id'] = item_detail.get('news', {}).get('id')
+
+    return results
+
+
+def get_decision_cache() -> DecisionCache:
+    """Get the container's decision cache instance"""
+    global _decision_cache
+
+    if _decision_cache is None:
+        _decision_cache = DecisionCache()
+
+    return _decision_cache
+
+
+def decision_cache_key(detail: Dict) -> Optional[Tuple[str, str, str]]:
+    """(symbol, headline, pattern library version), or None for triggers without news"""
+    headline = detail.get('news', {}).get('headline')
+    if not DECISION_CACHE['enabled'] or not headline:
+        return None
+    return detail.get('symbol') or 'UNKNOWN', headline, pattern_library_version()
+
+
+def pattern_library_version() -> str:
+    """SSM versions of the patterns and prompt the decisions were made with"""
+    params = _ssm_cache['params']
+    return '.'.join(str(params.get(name, {}).get('version', 0)) for name in AI_PARAMETER_NAMES)
+
+
+def lookup_cached_decisions(pending: List[Tuple], results: List[Optional[Dict]]) -> List[Tuple]:
+    """
+    Fill results of pending items that have a cached decision
+
+    Returns:
+        Pending items without one (cache errors count as misses)
+    """
+    misses = []
+
+    for index, item_detail, candidate_patterns in pending:
+        key = decision_cache_key(item_detail)
+        cached = None
+
+        if key:
+            try:
+                cached = get_decision_cache().lookup(*key)
+            except Exception as e:
+                print(f"Error looking up cached decision: {e}")
+
+        if cached:
+            print(f"Cached decision ({cached['similarity']:.2f} similar to: {cached['headline']})")
+            results[index] = {**cached['decision'], 'cached': True}
+        else:
+            misses.append((index, item_detail, candidate_patterns))
+
+    return misses
+
+
+def store_decisions(analysed: List[Tuple], results: List[Optional[Dict]]):
+    """Cache model decisions (errors are not cached)"""
+    for index, item_detail, _ in analysed:
+        key = decision_cache_key(item_detail)
+        result = results[index]
+
+        if not key or result.get('matched_pattern_id') == 'error':
+            continue
+
+        try:
+            get_decision_cache().store(*key, dict(result), ttl_sec=decision_ttl(result))
+        except Exception as e:
+            print(f"Error caching decision: {e}")
+
+
+def decision_ttl(result: Dict) -> int:
+    """
+    Cache lifetime of a decision
+
+    Buy/Sell decisions carry entry, target and stop prices that go stale with
+    the market, so they are reused only for DECISION_CACHE['entry_ttl_sec'].
+    """
+    if result.get('action') in ('Buy', 'Sell'):
+        return DECISION_CACHE['entry_ttl_sec']
+    return DECISION_CACHE['ttl_sec']
+
+
+def split_trigger_items(detail: Dict) -> List[Dict]:
+    """One detail per news item of a coalesced trigger ([detail] otherwise)"""
+    news_items = detail.get('news_items') or []
+    if len(news_items) <= 1:
+        return [detail]
+
+    base = {key: value for key, value in detail.items() if key != 'news_items'}
+    return [{**base, 'news': news_item} for news_item in news_items]
+
+
+def merge_candidate_patterns(patterns: Dict, candidate_sets: List[Dict]) -> Dict:
+    """Union of candidate pattern sets, in the original pattern order"""
+    if any(candidates is patterns for candidates in candidate_sets):
+        return patterns
+
+    selected = {id(pattern) for candidates in candidate_sets for pattern in candidates['patterns']}
+    items = patterns.get('patterns', []) if isinstance(patterns, dict) else patterns
+    return {'patterns': [pattern for pattern in items if id(pattern) in selected]}
+
+
+def claim_analysis(idempotency_key: str, correlation_id: Optional[str]) -> bool:
+    """
+    Record that this trigger is being analysed
+
+    An existing claim is taken over if it is not complete and older than
+    the lease (the invocation holding it crashed or timed out).
+
+    Returns:
+        False if the key is complete or claimed by a live invocation
+        (duplicate); True otherwise, including on errors (fail open)
+    """
+
+    now = datetime.utcnow()
+
+    try:
+        table = get_table(DYNAMODB_TABLES['trigger_history'])
+        table.put_item(
+            Item={
+                'trigger_id': ANALYSIS_RECORD_PREFIX + idempotency_key,
+                'timestamp': now.isoformat(),
+                'started_at': now.isoformat(),
+                'correlation_id': correlation_id or '',
+                'status': 'started',
+                'expires_at': int(time.time()) + ANALYSIS_CLAIM['ttl_sec']
+            },
+            ConditionExpression=(
+                'attribute_not_exists(trigger_id) '
+                'OR (#status <> :complete AND started_at < :stale_before)'
+            ),
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':complete': 'complete',
+                ':stale_before': (now - timedelta(seconds=ANALYSIS_CLAIM['lease_sec'])).isoformat()
+            }
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        print(f"Error claiming analysis {idempotency_key}: {e}")
+        return True
+    except Exception as e:
+        print(f"Error claiming analysis {idempotency_key}: {e}")
+        return True
+
+
+def record_analysis_result(idempotency_key: str, analysis: Dict[str, Any]):
+    """Store the outcome on the idempotency record"""
+
+    try:
+        table = get_table(DYNAMODB_TABLES['trigger_history'])
+        table.update_item(
+            Key={'trigger_id': ANALYSIS_RECORD_PREFIX + idempotency_key},
+            UpdateExpression='SET #status = :done, #action = :action, matched_pattern_id = :pattern',
+            ExpressionAttributeNames={'#status': 'status', '#action': 'action'},
+            ExpressionAttributeValues={
+                ':done': 'complete',
+                ':action': str(analysis.get('action')),
+                ':pattern': str(analysis.get('matched_pattern_id'))
+            }
+        )
+    except Exception as e:
+        print(f"Error recording analysis result {idempotency_key}: {e}")
+
+
 def load_patterns() -> Optional[Dict]:
-    """Load patterns from SSM Parameter Store"""
+    """Load patterns from SSM Parameter Store (cached)"""
 
     try:
-        patterns_json = get_ssm_parameter(SSM_PARAMS['patterns'])
-        if patterns_json:
-            return json.loads(patterns_json)
-        return None
+        return load_ai_parameters().get(SSM_PARAMS['patterns'], {}).get('value')
     except Exception as e:
         print(f"Error loading patterns: {e}")
         return None
 
 
 def load_prompt() -> Optional[str]:
-    """Load realtime analysis prompt from SSM"""
+    """Load realtime analysis prompt from SSM (cached)"""
 
     try:
-        return get_ssm_parameter(SSM_PARAMS['prompt_realtime_analysis'])
+        return load_ai_parameters().get(SSM_PARAMS['prompt_realtime_analysis'], {}).get('value')
     except Exception as e:
         print(f"Error loading prompt: {e}")
         return None
 
 
+def load_ai_parameters() -> Dict[str, Dict[str, Any]]:
+    """
+    Patterns and prompt from the module cache, refreshed every SSM_CACHE_TTL_SEC
+
+    If a refresh fails the previous values are kept for another TTL, so SSM
+    throttling doesn't fail analyses; so is a parameter whose new version
+    can't be parsed.
+
+    Returns:
+        {name: {'version': int, 'value': parsed value}}
+    """
+    now = time.time()
+    if now < _ssm_cache['expires_at']:
+        return _ssm_cache['params']
+
+    fetched = get_ssm_parameters(AI_PARAMETER_NAMES)
+
+    if fetched is None:
+        if _ssm_cache['params']:
+            print("SSM refresh failed, keeping cached parameters")
+            _ssm_cache['expires_at'] = now + SSM_CACHE_TTL_SEC
+        return _ssm_cache['params']
+
+    params = {}
+    for name, param in fetched.items():
+        cached = _ssm_cache['params'].get(name)
+
+        if cached and cached['version'] == param['version']:
+            params[name] = cached
+            continue
+
+        try:
+            value = json.loads(param['value']) if name == SSM_PARAMS['patterns'] else param['value']
+        except ValueError as e:
+            print(f"Error parsing SSM parameter {name} (version {param['version']}): {e}")
+            if cached:
+                params[name] = cached
+            continue
+
+        print(f"Loaded SSM parameter {name} (version {param['version']})")
+        params[name] = {'version': param['version'], 'value': value}
+
+    _ssm_cache['params'] = params
+    _ssm_cache['expires_at'] = now + SSM_CACHE_TTL_SEC
+
+    return params
+
+
 def analyze_with_claude(
     detail: Dict,
     patterns: Dict,
@@ -121,38 +494,24 @@ def analyze_with_claude(
     """
 
     try:
-        # Build prompt
-        prompt = build_realtime_prompt(detail, patterns, prompt_template)
-
-        # Invoke Bedrock
-        bedrock = AWSClients.get_bedrock()
-
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 2000,
-            "temperature": 0.3,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        }
+        # Build prompt (static pattern prefix + per-trigger part)
+        content = build_realtime_content(detail, patterns, prompt_template)
 
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-haiku-20240307-v1:0',
-            body=json.dumps(request_body)
-        )
+        # Invoke Bedrock and parse/validate the decision
+        tool = DECISION_TOOL if BEDROCK_ANALYSIS['structured_output'] else None
+        stats = get_stats('decision')
 
-        response_body = json.loads(response['body'].read())
-        result_text = response_body['content'][0]['text']
+        if BEDROCK_ANALYSIS['streaming']:
+            analysis = stream_decision(content, tool, stats)
+        else:
+            response_content = invoke_bedrock(content, tool)
+            analysis = parse_model_response(
+                response_content, DECISION_SCHEMA, tool and tool['name'], stats
+            )
+        print(stats.summary())
 
-        # Parse JSON from response
-        json_start = result_text.find('{')
-        json_end = result_text.rfind('}') + 1
-        json_str = result_text[json_start:json_end]
-
-        analysis = json.loads(json_str)
+        if analysis is None:
+            return hold_result("error", "Unparseable model response")
 
         print(f"Claude analysis: {analysis.get('action')} (confidence: {analysis.get('confidence')})")
 
@@ -160,28 +519,312 @@ def analyze_with_claude(
 
     except Exception as e:
         print(f"Error analyzing with Claude: {e}")
-        return {
-            "matched_pattern_id": "error",
-            "match_score": 0,
-            "action": "Hold",
-            "confidence": "Low",
-            "reasoning": f"Analysis error: {str(e)}",
-            "entry_price": 0,
-            "target_profit": 0,
-            "stop_loss": 0
-        }
+        return hold_result("error", f"Analysis error: {str(e)}")
+
+
+def analyze_batch_with_claude(
+    details: List[Dict],
+    patterns: Dict,
+    prompt_template: str
+) -> List[Dict[str, Any]]:
+    """
+    Analyze several same-trigger items in one Bedrock call
+
+    Args:
+        details: One event detail per news item
+        patterns: Union of the items' candidate patterns
+        prompt_template: Prompt template from SSM
+
+    Returns:
+        One analysis (see analyze_with_claude) per item, in order
+    """
+
+    prefix, _ = split_prompt_template(prompt_template)
+    if not prefix:
+        # Patterns can't be shared across items with this template
+        return [analyze_with_claude(detail, patterns, prompt_template) for detail in details]
+
+    try:
+        content = build_batch_content(details, patterns, prompt_template)
+        tool = BATCH_DECISION_TOOL if BEDROCK_ANALYSIS['structured_output'] else None
+        response_content = invoke_bedrock(content, tool)
+
+        # Parse {"results": [...]}, keeping each valid item
+        stats = get_stats('decision_batch')
+        parsed = parse_model_response(
+            response_content, list_schema('results'), tool and tool['name'], stats
+        )
+        print(stats.summary())
+        items = valid_items(parsed['results'], DECISION_ITEM_SCHEMA, 'decision') if parsed else []
+
+        # Fan out by item_index
+        by_index = {}
+        for item in items:
+            by_index.setdefault(item['item_index'], item)
+
+        results = []
+        for index in range(len(details)):
+            analysis = by_index.get(index)
+            if analysis is None:
+                analysis = hold_result("error", "No result for item in batch response")
+            results.append(analysis)
+
+        print(f"Claude batch analysis: {[r.get('action') for r in results]}")
 
+        return results
 
-def build_realtime_prompt(
+    except Exception as e:
+        print(f"Error analyzing batch with Claude: {e}")
+        return [hold_result("error", f"Analysis error: {str(e)}") for _ in details]
+
+
+def invoke_bedrock(content: List[Dict[str, Any]], tool: Optional[Dict] = None) -> List[Dict[str, Any]]:
+    """
+    Invoke the analysis model with one user message
+
+    Args:
+        content: User message content blocks
+        tool: Tool the model is forced to call (structured output)
+
+    Returns:
+        Response content blocks
+    """
+
+    bedrock = AWSClients.get_bedrock()
+
+    response = bedrock.invoke_model(
+        modelId=BEDROCK_ANALYSIS['model_id'],
+        body=json.dumps(build_request_body(content, tool))
+    )
+
+    response_body = json.loads(response['body'].read())
+    log_token_usage(response_body.get('usage', {}))
+
+    return response_body.get('content', [])
+
+
+def stream_decision(
+    content: List[Dict[str, Any]],
+    tool: Optional[Dict],
+    stats: ParseStats
+) -> Optional[Dict[str, Any]]:
+    """
+    Stream the decision, closing the stream once it is decided (early_decision)
+
+    Returns:
+        Decision (complete, or the fields known at cut-off with Hold defaults
+        for the rest), or None if the full response can't be parsed
+    """
+
+    bedrock = AWSClients.get_bedrock()
+    started = time.time()
+
+    response = bedrock.invoke_model_with_response_stream(
+        modelId=BEDROCK_ANALYSIS['model_id'],
+        body=json.dumps(build_request_body(content, tool))
+    )
+
+    stream = response['body']
+    text = ''
+    usage = {}
+
+    try:
+        for event in stream:
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+
+            data = json.loads(chunk['bytes'])
+            event_type = data.get('type')
+
+            if event_type == 'message_start':
+                usage.update(data.get('message', {}).get('usage', {}))
+            elif event_type == 'message_delta':
+                usage.update(data.get('usage', {}))
+            elif event_type == 'content_block_delta':
+                # text_delta (plain text) or input_json_delta (tool input)
+                delta = data.get('delta', {})
+                text += delta.get('text') or delta.get('partial_json') or ''
+
+                decision = early_decision(text)
+                if decision is not None:
+                    stats.record(True)
+                    print(f"Decision after {time.time() - started:.2f}s "
+                          f"(stream cut off at {len(text)} chars)")
+                    return decision
+    finally:
+        # Stops reading (and generating for us) on an early return
+        if hasattr(stream, 'close'):
+            stream.close()
+        log_token_usage(usage)
+
+    print(f"Decision after {time.time() - started:.2f}s (full response)")
+    return parse_model_response(text, DECISION_SCHEMA, stats=stats)
+
+
+def early_decision(partial_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Decision from a partial response, once should_enter_position is decided
+
+    No entry: action/confidence/match_score suffice. Entry: also waits for
+    matched_pattern_id and the trade prices (reasoning is not waited for).
+    """
+
+    fields = partial_fields(partial_text, DECISION_OUTCOME_FIELDS + ENTRY_FIELDS)
+    if not all(field in fields for field in DECISION_OUTCOME_FIELDS):
+        return None
+
+    decision = {
+        **hold_result(fields.get('matched_pattern_id', 'unknown'), "Decided from partial response"),
+        **fields
+    }
+
+    if validate(decision, DECISION_SCHEMA):
+        # Unexpected values: leave it to the full parse
+        return None
+
+    if should_enter_position(decision) and not all(field in fields for field in ENTRY_FIELDS):
+        return None
+
+    return decision
+
+
+def build_request_body(content: List[Dict[str, Any]], tool: Optional[Dict] = None) -> Dict[str, Any]:
+    """Bedrock Messages request for one user message"""
+
+    print(f"Prompt size: {sum(len(block['text']) for block in content)} chars "
+          f"(pattern prefix: {len(content[0]['text']) if len(content) > 1 else 0})")
+
+    request_body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": BEDROCK_ANALYSIS['max_tokens'],
+        "temperature": BEDROCK_ANALYSIS['temperature'],
+        "messages": [
+            {
+                "role": "user",
+                "content": content
+            }
+        ]
+    }
+    if tool:
+        request_body['tools'] = [tool]
+        request_body['tool_choice'] = tool_choice(tool)
+
+    return request_body
+
+
+def hold_result(matched_pattern_id: str, reasoning: str) -> Dict[str, Any]:
+    """Hold analysis result used when no model decision is available"""
+    return {
+        "matched_pattern_id": matched_pattern_id,
+        "match_score": 0,
+        "action": "Hold",
+        "confidence": "Low",
+        "reasoning": reasoning,
+        "entry_price": 0,
+        "target_profit": 0,
+        "stop_loss": 0
+    }
+
+
+def select_candidate_patterns(detail: Dict, patterns: Dict) -> Optional[Dict]:
+    """
+    Patterns whose conditions can match this trigger
+
+    Returns:
+        patterns itself if all are candidates (keeps the prompt prefix stable),
+        {'patterns': [...]} with the candidates, or None if there are none
+    """
+
+    try:
+        if _pattern_matcher_cache['source'] is not patterns:
+            _pattern_matcher_cache['matcher'] = PatternMatcher(patterns)
+            _pattern_matcher_cache['source'] = patterns
+
+        features = extract_trigger_features(detail)
+        candidates = _pattern_matcher_cache['matcher'].candidates(features)
+    except Exception as e:
+        # Fail open: let the model see every pattern
+        print(f"Error pre-matching patterns: {e}")
+        return patterns
+
+    total = len(patterns.get('patterns', [])) if isinstance(patterns, dict) else len(patterns)
+    print(f"Candidate patterns: {len(candidates)}/{total} "
+          f"(topic={features['topic']}, keywords={features['keywords']})")
+
+    if not candidates:
+        return None
+    if len(candidates) == total:
+        return patterns
+    return {'patterns': candidates}
+
+
+def build_realtime_content(
     detail: Dict,
     patterns: Dict,
     template: str
-) -> str:
-    """Build prompt with current data"""
+) -> List[Dict[str, Any]]:
+    """
+    Build the user message content blocks
+
+    Returns:
+        [static pattern prefix block, per-trigger block], or a single block if
+        the template has per-trigger fields before the patterns
+    """
+
+    patterns_text = compact_patterns(patterns)
+    prefix, rest = split_prompt_template(template)
+
+    # Format prompt
+    dynamic_text = rest.format(patterns_from_phase0=patterns_text, **prompt_fields(detail))
+
+    if not prefix:
+        return [{"type": "text", "text": dynamic_text}]
+
+    return [pattern_prefix_block(prefix, patterns_text), {"type": "text", "text": dynamic_text}]
+
+
+def build_batch_content(
+    details: List[Dict],
+    patterns: Dict,
+    template: str
+) -> List[Dict[str, Any]]:
+    """
+    Build multi-item content blocks: the pattern prefix once, the per-item
+    data part of the template for each item, then the template's task and
+    output format once with the multi-item output format
+
+    Requires a template with a static pattern prefix (split_prompt_template)
+    """
+
+    patterns_text = compact_patterns(patterns)
+    prefix, rest = split_prompt_template(template)
+    item_part, instruction = split_item_template(rest)
+
+    dynamic_text = ''.join(
+        BATCH_ITEM_HEADER.format(index=index)
+        + item_part.format(patterns_from_phase0=patterns_text, **prompt_fields(detail))
+        for index, detail in enumerate(details)
+    )
+    dynamic_text += instruction.format()
+    dynamic_text += BATCH_INSTRUCTION.format(count=len(details))
+
+    return [pattern_prefix_block(prefix, patterns_text), {"type": "text", "text": dynamic_text}]
+
+
+def pattern_prefix_block(prefix: str, patterns_text: str) -> Dict[str, Any]:
+    """Static pattern block, marked for prompt caching when enabled"""
+    block = {"type": "text", "text": prefix.format(patterns_from_phase0=patterns_text)}
+    if BEDROCK_ANALYSIS['prompt_caching']:
+        block['cache_control'] = {"type": "ephemeral"}
+    return block
+
+
+def prompt_fields(detail: Dict) -> Dict[str, Any]:
+    """Per-trigger template fields"""
 
     # Extract relevant data from detail
-    symbol = detail.get('symbol', 'UNKNOWN')
-    trigger_type = detail.get('trigger_type')
+    symbol = detail.get('symbol') or 'UNKNOWN'
 
     # Get current market data (placeholder)
     # TODO: Fetch real market data
@@ -189,19 +832,83 @@ def build_realtime_prompt(
     pre_trend = 0.0
     volume_ratio = 1.0
 
-    # Format prompt
-    prompt = template.format(
-        patterns_from_phase0=json.dumps(patterns, indent=2),
-        headline=detail.get('news', {}).get('headline', 'N/A'),
-        content=detail.get('news', {}).get('summary', 'N/A'),
-        symbol=symbol,
-        timestamp=datetime.utcnow().isoformat(),
-        current_price=current_price,
-        pre_trend=pre_trend,
-        volume_ratio=volume_ratio
-    )
+    return {
+        'headline': detail.get('news', {}).get('headline', 'N/A'),
+        'content': detail.get('news', {}).get('summary', 'N/A'),
+        'cluster_size': detail.get('news', {}).get('cluster_size', 1),
+        'symbol': symbol,
+        'timestamp': datetime.utcnow().isoformat(),
+        'current_price': current_price,
+        'pre_trend': pre_trend,
+        'volume_ratio': volume_ratio
+    }
+
+
+def split_prompt_template(template: str) -> Tuple[str, str]:
+    """
+    Split template right after {patterns_from_phase0}
+
+    Returns:
+        (prefix, rest); prefix is '' if it would contain any other field
+    """
+    marker = '{' + PATTERNS_PLACEHOLDER + '}'
+    end = template.find(marker)
+    if end < 0:
+        return '', template
+    end += len(marker)
+
+    prefix = template[:end]
+    fields = {field for _, field, _, _ in Formatter().parse(prefix) if field is not None}
+    if fields != {PATTERNS_PLACEHOLDER}:
+        return '', template
+
+    return prefix, template[end:]
+
 
-    return prompt
+def split_item_template(rest: str) -> Tuple[str, str]:
+    """
+    Split the per-trigger part of a template after its last field's line
+
+    Returns:
+        (item_part, instruction); instruction is the static tail (task,
+        output format) shared by all items of a batch
+    """
+    lines = rest.splitlines(keepends=True)
+    last = -1
+    for index, line in enumerate(lines):
+        if any(field is not None for _, field, _, _ in Formatter().parse(line)):
+            last = index
+
+    return ''.join(lines[:last + 1]), ''.join(lines[last + 1:])
+
+
+def compact_patterns(patterns: Dict) -> str:
+    """Minified patterns JSON with only PROMPT_PATTERN_FIELDS (memoised per patterns object)"""
+
+    if _compact_patterns_cache['source'] is patterns:
+        return _compact_patterns_cache['text']
+
+    items = patterns.get('patterns', []) if isinstance(patterns, dict) else patterns
+    compact = [
+        {field: pattern[field] for field in PROMPT_PATTERN_FIELDS if field in pattern}
+        for pattern in items
+    ]
+    text = json.dumps({'patterns': compact}, ensure_ascii=False, separators=(',', ':'))
+
+    _compact_patterns_cache['source'] = patterns
+    _compact_patterns_cache['text'] = text
+
+    return text
+
+
+def log_token_usage(usage: Dict):
+    """Log Bedrock token usage (cache fields are present when prompt caching applies)"""
+    print(
+        f"Bedrock tokens: input={usage.get('input_tokens', 0)} "
+        f"output={usage.get('output_tokens', 0)} "
+        f"cache_read={usage.get('cache_read_input_tokens', 0)} "
+        f"cache_write={usage.get('cache_creation_input_tokens', 0)}"
+    )
 
 
 def should_enter_position(analysis: Dict) -> bool:
@@ -4,16 +4,41 @@ Phase 1: Unified Judgment Lambda
 Receives events from all trigger patterns, checks circuit breaker,
 and delegates to AI analysis engine.
 Based on DESIGN_DOC_FINAL.md Section 4.1
+
+AI analysis is handed off asynchronously (Lambda InvocationType='Event'), so
+judgment latency doesn't depend on Bedrock. Each hand-off carries an
+idempotency key (the EventBridge event id) and a correlation id generated
+per judgment, which ai_analysis echoes in its result. The invoker is replaceable
+(set_ai_analysis_invoker) to run the analysis in-process locally.
 """
 
+import hashlib
 import json
+import os
+import uuid
 from datetime import datetime
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 
 from lambda.utils.circuit_breaker import CircuitBreaker
-from lambda.utils.aws_clients import get_table
+from lambda.utils.aws_clients import get_table, invoke_lambda_async
 from lambda.utils.constants import DYNAMODB_TABLES
 
+# Reused across warm invocations (tables resolved once, check results cached)
+_circuit_breaker = None
+
+# Invoker: payload -> {'delegated': bool, ...}; None = async Lambda invoke
+_ai_analysis_invoker: Optional[Callable[[Dict[str, Any]], Dict]] = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get the container's circuit breaker instance"""
+    global _circuit_breaker
+
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker()
+
+    return _circuit_breaker
+
 
 def lambda_handler(event, context):
     """
@@ -38,8 +63,8 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': 'Missing trigger_type'})
         }
 
-    # Initialize circuit breaker
-    circuit_breaker = CircuitBreaker()
+    # Get circuit breaker
+    circuit_breaker = get_circuit_breaker()
 
     # Check circuit breaker
     check_result = circuit_breaker.check(trigger_type)
@@ -64,7 +89,23 @@ def lambda_handler(event, context):
     circuit_breaker.log_trigger(trigger_type, detail)
 
     # Delegate to AI analysis
-    analysis_result = invoke_ai_analysis(detail)
+    analysis_result = invoke_ai_analysis(
+        detail,
+        idempotency_key=make_idempotency_key(event),
+        correlation_id=str(uuid.uuid4())
+    )
+
+    if not analysis_result.get('delegated'):
+        print(f"❌ AI analysis hand-off failed (correlation_id={analysis_result['correlation_id']})")
+
+        return {
+            'statusCode': 502,  # Bad Gateway: downstream analysis not reached
+            'body': json.dumps({
+                'message': 'AI analysis not delegated',
+                'trigger_type': trigger_type,
+                'analysis_result': analysis_result
+            })
+        }
 
     return {
         'statusCode': 200,
@@ -76,31 +117,101 @@ def lambda_handler(event, context):
     }
 
 
-def invoke_ai_analysis(detail: Dict[str, Any]) -> Dict:
+def invoke_ai_analysis(
+    detail: Dict[str, Any],
+    idempotency_key: str,
+    correlation_id: str,
+    invoker: Optional[Callable[[Dict[str, Any]], Dict]] = None
+) -> Dict:
     """
-    Invoke AI analysis lambda
-
-    In production, this would invoke another Lambda function.
-    For template, we return a placeholder.
+    Hand off to the AI analysis lambda without waiting for the result
+
+    Args:
+        detail: Trigger event detail
+        idempotency_key: Same for redeliveries of one trigger (ai_analysis runs once per key)
+        correlation_id: Carried through to the analysis result/logs
+        invoker: Overrides the configured invoker
+
+    Returns:
+        {
+            "delegated": bool,
+            "idempotency_key": str,
+            "correlation_id": str,
+            "timestamp": str
+        }
     """
 
-    # TODO: Implement actual Lambda invocation
-    # import boto3
-    # lambda_client = boto3.client('lambda')
-    # response = lambda_client.invoke(
-    #     FunctionName='ai-trading-ai-analysis',
-    #     InvocationType='Event',
-    #     Payload=json.dumps(detail)
-    # )
+    payload = {
+        'detail': detail,
+        'idempotency_key': idempotency_key,
+        'correlation_id': correlation_id
+    }
+
+    invoker = invoker or get_ai_analysis_invoker()
 
-    print(f"Delegating to AI analysis: {detail.get('trigger_type')}")
+    print(f"Delegating to AI analysis: {detail.get('trigger_type')} "
+          f"(correlation_id={correlation_id}, idempotency_key={idempotency_key})")
+
+    result = invoker(payload)
 
     return {
-        'delegated': True,
+        **result,
+        'idempotency_key': idempotency_key,
+        'correlation_id': correlation_id,
         'timestamp': datetime.utcnow().isoformat()
     }
 
 
+def get_ai_analysis_invoker() -> Callable[[Dict[str, Any]], Dict]:
+    """Get the configured invoker (async Lambda invoke unless replaced)"""
+    return _ai_analysis_invoker or lambda_invoker
+
+
+def set_ai_analysis_invoker(invoker: Optional[Callable[[Dict[str, Any]], Dict]]):
+    """Replace the invoker (e.g. local_invoker); None restores the Lambda invoker"""
+    global _ai_analysis_invoker
+    _ai_analysis_invoker = invoker
+
+
+def lambda_invoker(payload: Dict[str, Any]) -> Dict:
+    """Async invoke of the function in AI_ANALYSIS_FUNCTION_NAME"""
+
+    function_name = os.environ.get('AI_ANALYSIS_FUNCTION_NAME')
+    if not function_name:
+        print("AI_ANALYSIS_FUNCTION_NAME not set, analysis not delegated")
+        return {'delegated': False}
+
+    response = invoke_lambda_async(function_name, payload)
+
+    # 202 Accepted: queued for asynchronous execution
+    return {'delegated': bool(response) and response.get('StatusCode') == 202}
+
+
+def local_invoker(payload: Dict[str, Any]) -> Dict:
+    """Run ai_analysis in-process (local runs/tests); the result is returned inline"""
+    from lambda.core.ai_analysis import lambda_handler as ai_analysis_handler
+
+    response = ai_analysis_handler(payload, None)
+    return {
+        'delegated': response.get('statusCode') == 200,
+        'response': json.loads(response.get('body', '{}'))
+    }
+
+
+def make_idempotency_key(event: Dict[str, Any]) -> str:
+    """
+    Idempotency key for a trigger event
+
+    EventBridge keeps the event id across redeliveries; direct invocations
+    without an id fall back to a hash of the detail.
+    """
+    if event.get('id'):
+        return event['id']
+
+    detail_json = json.dumps(event.get('detail', {}), sort_keys=True, default=str)
+    return hashlib.sha256(detail_json.encode('utf-8')).hexdigest()
+
+
 def send_notification(message: str):
     """Send SNS notification"""
 
@@ -3,16 +3,37 @@ Phase 1: News Fetch Lambda (Pattern A Trigger)
 
 Fetches news from Finnhub API every 5 minutes and triggers analysis for new news.
 Based on DESIGN_DOC_FINAL.md Section 4.2 (Pattern A)
+
+Articles are ingested idempotently: each (symbol, article) is claimed with a
+conditional write in the news articles table, and only newly claimed articles
+are archived and considered for triggering, so overlapping or retried runs
+don't re-trigger the same news.
+
+Important news for the same symbol published within TRIGGER_BATCHING['window_sec']
+is coalesced into one trigger ('news_items'), analysed in a single model call.
+
+Near-duplicate important news (syndicated wire stories) is clustered first
+(utils.news_clusters) and triggers once per cluster, with 'cluster_size'.
 """
 
+import hashlib
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-import requests
+from typing import List, Dict, Any, Optional, Tuple
+from botocore.exceptions import ClientError
 
-from lambda.utils.constants import SYMBOLS, API_ENDPOINTS, DYNAMODB_TABLES, S3_BUCKETS
-from lambda.utils.aws_clients import get_table, get_s3, put_eventbridge_event
+from lambda.utils.constants import (
+    SYMBOLS, API_ENDPOINTS, DYNAMODB_TABLES, S3_BUCKETS, HTTP_CLIENT, TRIGGER_BATCHING,
+    NEWS_CLUSTERING, NEWS_INGESTION
+)
+from lambda.utils.aws_clients import (
+    batch_get_items, get_table, get_s3, put_eventbridge_event, EventBridgePublisher
+)
+from lambda.utils.http_client import get_http_session, get_http_timeout
+from lambda.utils.keyword_matcher import analyze_news_text, IMPORTANT_CATEGORIES
+from lambda.utils.news_clusters import NewsClusterIndex
 
 
 def lambda_handler(event, context):
@@ -34,122 +55,228 @@ def lambda_handler(event, context):
         }
 
     # Initialize
-    trigger_table = get_table(DYNAMODB_TABLES['trigger_history'])
+    article_table = get_table(DYNAMODB_TABLES['news_articles'])
     s3 = get_s3()
 
-    # Get last fetch timestamp
-    last_fetch_time = get_last_fetch_timestamp(trigger_table)
+    # Fetch recent news for all symbols concurrently
+    from_time = (datetime.utcnow() - timedelta(seconds=NEWS_INGESTION['max_age_sec'])).isoformat()
+    fetched_news, failed_symbols = fetch_news_for_symbols(SYMBOLS, api_key, from_time)
 
-    # Fetch news for each symbol
-    all_news = []
-    for symbol in SYMBOLS:
-        news_items = fetch_news_for_symbol(symbol, api_key, last_fetch_time)
-        all_news.extend(news_items)
+    # Keep only articles no earlier (or concurrent) run has ingested
+    all_news = claim_new_articles(fetched_news, article_table)
 
-    print(f"Fetched {len(all_news)} new news items")
+    print(f"Fetched {len(fetched_news)} news items, {len(all_news)} new")
 
     if len(all_news) == 0:
         return {
             'statusCode': 200,
-            'body': json.dumps({'message': 'No new news found'})
+            'body': json.dumps({
+                'message': 'No new news found',
+                'failed_symbols': failed_symbols
+            })
         }
 
     # Save to S3
     save_news_to_s3(all_news, s3)
 
-    # Update last fetch timestamp
-    update_last_fetch_timestamp(trigger_table)
+    # Trigger analysis for important news, coalesced per symbol (batched PutEvents)
+    important_news = [news_item for news_item in all_news if is_important_news(news_item)]
 
-    # Trigger analysis for important news
-    for news_item in all_news:
-        if is_important_news(news_item):
-            trigger_analysis(news_item)
+    # One trigger per near-duplicate cluster (stories triggered earlier are dropped)
+    cluster_index = NewsClusterIndex() if NEWS_CLUSTERING['enabled'] else None
+    if cluster_index:
+        important_news = cluster_index.cluster(important_news)
+
+    with EventBridgePublisher() as publisher:
+        for news_group in group_news_triggers(important_news):
+            trigger_analysis(news_group[0], publisher, news_group)
+
+    if cluster_index:
+        cluster_index.record()
 
     return {
         'statusCode': 200,
         'body': json.dumps({
             'message': f'Processed {len(all_news)} news items',
-            'count': len(all_news)
+            'count': len(all_news),
+            'failed_symbols': failed_symbols
         })
     }
 
 
-def fetch_news_for_symbol(symbol: str, api_key: str, from_time: str) -> List[Dict[str, Any]]:
-    """Fetch news from Finnhub API"""
+def fetch_news_for_symbols(
+    symbols: List[str],
+    api_key: str,
+    from_time: str,
+    endpoint: str = API_ENDPOINTS['finnhub_news']
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Fetch news for all symbols concurrently over the shared HTTP session
 
-    try:
-        # Finnhub API: Company News
-        # https://finnhub.io/docs/api/company-news
+    Returns:
+        (news items in symbol order, symbols whose request failed)
+    """
 
-        to_date = datetime.utcnow().date().isoformat()
-        from_date = (datetime.utcnow() - timedelta(days=1)).date().isoformat()
+    all_news = []
+    failed_symbols = []
 
-        url = f"{API_ENDPOINTS['finnhub_news']}?symbol={symbol}&from={from_date}&to={to_date}&token={api_key}"
+    with ThreadPoolExecutor(max_workers=min(HTTP_CLIENT['max_workers'], len(symbols)) or 1) as pool:
+        futures = [
+            (symbol, pool.submit(request_news_for_symbol, symbol, api_key, from_time, endpoint))
+            for symbol in symbols
+        ]
 
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        for symbol, future in futures:
+            try:
+                all_news.extend(future.result())
+            except Exception as e:
+                print(f"Error fetching news for {symbol}: {e}")
+                failed_symbols.append(symbol)
 
-        news_items = response.json()
+    return all_news, failed_symbols
 
-        # Filter by timestamp
-        from_timestamp = datetime.fromisoformat(from_time).timestamp()
-        filtered = [
-            item for item in news_items
-            if item.get('datetime', 0) > from_timestamp
-        ]
 
-        return filtered
+def request_news_for_symbol(
+    symbol: str,
+    api_key: str,
+    from_time: str,
+    endpoint: str = API_ENDPOINTS['finnhub_news']
+) -> List[Dict[str, Any]]:
+    """Fetch news from Finnhub API (raises on request failure)"""
 
-    except Exception as e:
-        print(f"Error fetching news for {symbol}: {e}")
+    # Finnhub API: Company News
+    # https://finnhub.io/docs/api/company-news
+
+    to_date = datetime.utcnow().date().isoformat()
+    from_date = (datetime.utcnow() - timedelta(days=1)).date().isoformat()
+
+    response = get_http_session().get(
+        endpoint,
+        params={'symbol': symbol, 'from': from_date, 'to': to_date, 'token': api_key},
+        timeout=get_http_timeout()
+    )
+    response.raise_for_status()
+
+    news_items = response.json()
+
+    # Filter by timestamp
+    from_timestamp = datetime.fromisoformat(from_time).timestamp()
+    filtered = [
+        item for item in news_items
+        if item.get('datetime', 0) > from_timestamp
+    ]
+
+    # Requested symbol, used to group triggers
+    for item in filtered:
+        item.setdefault('symbol', symbol)
+
+    return filtered
+
+
+def article_key(news_item: Dict) -> str:
+    """
+    Dedup key of an article for its symbol
+
+    Finnhub id if present, else a hash of url + datetime. The symbol is part
+    of the key so an article related to several symbols triggers for each.
+    """
+
+    symbol = news_item.get('symbol') or news_item.get('related', '')
+    article_id = news_item.get('id')
+
+    if not article_id:
+        source = f"{news_item.get('url', '')}|{news_item.get('datetime', '')}"
+        article_id = hashlib.sha256(source.encode('utf-8')).hexdigest()[:32]
+
+    return f"{symbol}#{article_id}"
+
+
+def claim_new_articles(news_items: List[Dict], table) -> List[Dict]:
+    """
+    Record articles in the news articles table
+
+    Keys already present are skipped after one BatchGetItem pass; the rest
+    are inserted with conditional puts (in parallel), so of two overlapping
+    runs only one claims an article. Errors count as new (fail open).
+
+    Returns:
+        Newly ingested items (fetch order)
+    """
+
+    items_by_key: Dict[str, Dict] = {}
+    for item in news_items:
+        items_by_key.setdefault(article_key(item), item)
+
+    known_keys = get_known_article_keys(list(items_by_key), table.name)
+    candidates = [(key, item) for key, item in items_by_key.items() if key not in known_keys]
+
+    if not candidates:
         return []
 
+    with ThreadPoolExecutor(max_workers=min(NEWS_INGESTION['max_workers'], len(candidates))) as pool:
+        claimed = list(pool.map(lambda candidate: claim_article(table, *candidate), candidates))
 
-def get_last_fetch_timestamp(table) -> str:
-    """Get last fetch timestamp from DynamoDB"""
+    return [item for (_, item), is_new in zip(candidates, claimed) if is_new]
 
-    try:
-        response = table.get_item(
-            Key={'trigger_id': 'news_fetch_last_timestamp'}
-        )
 
-        if 'Item' in response:
-            return response['Item']['timestamp']
-        else:
-            # Default: 1 hour ago
-            return (datetime.utcnow() - timedelta(hours=1)).isoformat()
+def get_known_article_keys(keys: List[str], table_name: str) -> set:
+    """Keys already in the news articles table (BatchGetItem; errors count as unknown)"""
+
+    try:
+        items = batch_get_items(table_name, [{'article_key': key} for key in keys], projection='article_key')
+        return {item['article_key'] for item in items}
 
     except Exception as e:
-        print(f"Error getting last fetch timestamp: {e}")
-        return (datetime.utcnow() - timedelta(hours=1)).isoformat()
+        print(f"Error reading known articles: {e}")
+        return set()
 
 
-def update_last_fetch_timestamp(table):
-    """Update last fetch timestamp in DynamoDB"""
+def claim_article(table, key: str, news_item: Dict) -> bool:
+    """
+    Insert the article record unless it exists
+
+    Returns:
+        False if another run already ingested it; True otherwise, including
+        on errors (fail open)
+    """
 
     try:
-        table.put_item(
+        # Runs on worker threads: resource's client (thread-safe, unlike Table)
+        table.meta.client.put_item(
+            TableName=table.name,
             Item={
-                'trigger_id': 'news_fetch_last_timestamp',
-                'timestamp': datetime.utcnow().isoformat()
-            }
+                'article_key': key,
+                'symbol': news_item.get('symbol', ''),
+                'headline': news_item.get('headline', ''),
+                'published_at': int(news_item.get('datetime', 0)),
+                'ingested_at': datetime.utcnow().isoformat(),
+                'expires_at': int(datetime.utcnow().timestamp()) + NEWS_INGESTION['ttl_sec']
+            },
+            ConditionExpression='attribute_not_exists(article_key)'
         )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        print(f"Error claiming article {key}: {e}")
+        return True
     except Exception as e:
-        print(f"Error updating last fetch timestamp: {e}")
+        print(f"Error claiming article {key}: {e}")
+        return True
 
 
 def save_news_to_s3(news_items: List[Dict], s3_client):
-    """Save news to S3 archive"""
+    """Save newly ingested news to S3 archive (JSON Lines, partitioned by date)"""
 
     try:
-        timestamp = datetime.utcnow().isoformat()
-        key = f"news/{timestamp}.json"
+        now = datetime.utcnow()
+        key = f"news/{now.date().isoformat()}/{now.isoformat()}.jsonl"
 
         s3_client.put_object(
             Bucket=S3_BUCKETS['news_archive'],
             Key=key,
-            Body=json.dumps(news_items, indent=2),
-            ContentType='application/json'
+            Body='\n'.join(json.dumps(item, separators=(',', ':')) for item in news_items) + '\n',
+            ContentType='application/x-ndjson'
         )
 
         print(f"Saved news to S3: s3://{S3_BUCKETS['news_archive']}/{key}")
@@ -163,43 +290,86 @@ def is_important_news(news_item: Dict) -> bool:
     Filter important news
 
     Criteria:
-    - Contains earnings keywords
+    - Contains earnings keywords (single-pass keyword matcher)
     - High category (if available)
     """
 
-    headline = news_item.get('headline', '').lower()
-    summary = news_item.get('summary', '').lower()
+    headline = news_item.get('headline', '')
+    summary = news_item.get('summary', '')
     category = news_item.get('category', '')
 
-    # Keywords
-    important_keywords = [
-        'earnings', 'revenue', 'profit', 'guidance',
-        'acquisition', 'merger', 'lawsuit', 'fda',
-        'downgrade', 'upgrade', 'rating'
-    ]
-
     text = f"{headline} {summary}"
 
-    has_keyword = any(kw in text for kw in important_keywords)
-    is_high_category = category in ['Earnings', 'M&A', 'Legal']
+    has_keyword = analyze_news_text(text)['important']
+    is_high_category = category in IMPORTANT_CATEGORIES
 
     return has_keyword or is_high_category
 
 
-def trigger_analysis(news_item: Dict):
-    """Send event to EventBridge to trigger unified judgment lambda"""
+def group_news_triggers(
+    news_items: List[Dict],
+    window_sec: int = TRIGGER_BATCHING['window_sec'],
+    max_items: int = TRIGGER_BATCHING['max_items']
+) -> List[List[Dict]]:
+    """
+    Coalesce news per symbol
+
+    An item joins the symbol's current group if it was published within
+    window_sec of the group's first item and the group has room.
+
+    Returns:
+        Groups of news items (publish time order within each group)
+    """
+
+    groups_by_symbol: Dict[str, List[List[Dict]]] = {}
+
+    for item in sorted(news_items, key=lambda news: news.get('datetime', 0)):
+        groups = groups_by_symbol.setdefault(item.get('symbol') or item.get('related', ''), [])
+
+        if (
+            groups
+            and len(groups[-1]) < max_items
+            and item.get('datetime', 0) - groups[-1][0].get('datetime', 0) <= window_sec
+        ):
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+
+    return [group for groups in groups_by_symbol.values() for group in groups]
+
+
+def trigger_analysis(
+    news_item: Dict,
+    publisher: Optional[EventBridgePublisher] = None,
+    news_items: Optional[List[Dict]] = None
+):
+    """
+    Send event to EventBridge to trigger unified judgment lambda
+
+    Args:
+        news_item: Primary (first) news item
+        publisher: Batches PutEvents when given
+        news_items: All coalesced items for the symbol (incl. news_item)
+    """
+
+    detail = {
+        'trigger_type': 'news',
+        'symbol': news_item.get('symbol'),
+        'news': news_item
+    }
+    if news_items and len(news_items) > 1:
+        detail['news_items'] = news_items
 
     try:
-        put_eventbridge_event(
+        publish = publisher.put if publisher else put_eventbridge_event
+        publish(
             source='ai-trading.news-fetch',
             detail_type='NewNewsDetected',
-            detail={
-                'trigger_type': 'news',
-                'news': news_item
-            }
+            detail=detail
         )
 
-        print(f"Triggered analysis for: {news_item.get('headline', 'N/A')}")
+        print(f"Triggered analysis for: {news_item.get('headline', 'N/A')}"
+              + (f" (+{len(news_items) - 1} coalesced)" if 'news_items' in detail else ""))
 
     except Exception as e:
         print(f"Error triggering analysis: {e}")
@@ -8,12 +8,13 @@ Based on DESIGN_DOC_FINAL.md Section 4.2 (Pattern B)
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Optional
-import requests
+from typing import Dict, List, Optional
 
-from lambda.utils.constants import SYMBOLS, VOLATILITY_THRESHOLDS, API_ENDPOINTS
-from lambda.utils.aws_clients import put_eventbridge_event
+from lambda.utils.constants import SYMBOLS, VOLATILITY_THRESHOLDS, API_ENDPOINTS, HTTP_CLIENT
+from lambda.utils.aws_clients import put_eventbridge_event, EventBridgePublisher
+from lambda.utils.http_client import get_http_session, get_http_timeout
 
 
 def lambda_handler(event, context):
@@ -35,13 +36,18 @@ def lambda_handler(event, context):
 
     triggered_symbols = []
 
-    # Check each symbol
-    for symbol in SYMBOLS:
-        volatility = check_volatility(symbol, api_key)
+    # Check all symbols (one bulk request, or concurrent per-symbol requests)
+    bulk = os.environ.get('ALPHA_VANTAGE_BULK_QUOTES', '').lower() == 'true'
+    results = check_volatility_all(SYMBOLS, api_key, bulk=bulk)
 
-        if volatility and volatility['triggered']:
-            trigger_analysis(symbol, volatility)
-            triggered_symbols.append(symbol)
+    # Publish triggers (batched PutEvents)
+    with EventBridgePublisher() as publisher:
+        for symbol in SYMBOLS:
+            volatility = results.get(symbol)
+
+            if volatility and volatility['triggered']:
+                trigger_analysis(symbol, volatility, publisher)
+                triggered_symbols.append(symbol)
 
     return {
         'statusCode': 200,
@@ -53,7 +59,111 @@ def lambda_handler(event, context):
     }
 
 
-def check_volatility(symbol: str, api_key: str) -> Optional[Dict]:
+def check_volatility_all(
+    symbols: List[str],
+    api_key: str,
+    bulk: bool = False,
+    endpoint: str = API_ENDPOINTS['alpha_vantage_quote']
+) -> Dict[str, Optional[Dict]]:
+    """
+    Check volatility for all symbols
+
+    Args:
+        bulk: Use the REALTIME_BULK_QUOTES endpoint (one request for all
+            symbols, premium plans). Falls back to per-symbol requests if the
+            bulk response is unusable, and for symbols missing from it.
+
+    Returns:
+        {symbol: check_volatility() result or None}
+    """
+
+    if bulk:
+        results = check_volatility_bulk(symbols, api_key, endpoint)
+        if results is not None:
+            missing = [symbol for symbol, volatility in results.items() if volatility is None]
+            if missing:
+                print(f"No bulk quote for {missing}, falling back to per-symbol requests")
+                results.update(check_volatility_each(missing, api_key, endpoint))
+            return results
+        print("Bulk quotes unavailable, falling back to per-symbol requests")
+
+    return check_volatility_each(symbols, api_key, endpoint)
+
+
+def check_volatility_each(
+    symbols: List[str],
+    api_key: str,
+    endpoint: str = API_ENDPOINTS['alpha_vantage_quote']
+) -> Dict[str, Optional[Dict]]:
+    """
+    Check volatility with concurrent per-symbol GLOBAL_QUOTE requests
+
+    Returns:
+        {symbol: check_volatility() result or None}, in symbol order
+    """
+
+    with ThreadPoolExecutor(max_workers=min(HTTP_CLIENT['max_workers'], len(symbols)) or 1) as pool:
+        futures = {
+            symbol: pool.submit(check_volatility, symbol, api_key, endpoint)
+            for symbol in symbols
+        }
+        return {symbol: future.result() for symbol, future in futures.items()}
+
+
+def check_volatility_bulk(
+    symbols: List[str],
+    api_key: str,
+    endpoint: str = API_ENDPOINTS['alpha_vantage_quote']
+) -> Optional[Dict[str, Optional[Dict]]]:
+    """
+    Check volatility for all symbols with a single bulk quote request
+
+    Returns:
+        {symbol: volatility dict or None}, or None if the bulk request failed
+    """
+
+    try:
+        response = get_http_session().get(
+            endpoint,
+            params={
+                'function': 'REALTIME_BULK_QUOTES',
+                'symbol': ','.join(symbols),
+                'apikey': api_key
+            },
+            timeout=get_http_timeout()
+        )
+        response.raise_for_status()
+
+        data = response.json()
+
+        if 'data' not in data:
+            print(f"No bulk quote data: {data}")
+            return None
+
+        results = {symbol: None for symbol in symbols}
+
+        for quote in data['data']:
+            symbol = quote.get('symbol')
+            if symbol not in results:
+                continue
+
+            current_price = float(quote.get('close', 0))
+            change_pct = float(str(quote.get('change_percent', '0')).replace('%', ''))
+
+            results[symbol] = evaluate_volatility(symbol, current_price, change_pct)
+
+        return results
+
+    except Exception as e:
+        print(f"Error checking bulk volatility: {e}")
+        return None
+
+
+def check_volatility(
+    symbol: str,
+    api_key: str,
+    endpoint: str = API_ENDPOINTS['alpha_vantage_quote']
+) -> Optional[Dict]:
     """
     Check if symbol exceeded volatility threshold
 
@@ -70,9 +180,11 @@ def check_volatility(symbol: str, api_key: str) -> Optional[Dict]:
         # Alpha Vantage: Global Quote
         # https://www.alphavantage.co/documentation/
 
-        url = f"{API_ENDPOINTS['alpha_vantage_quote']}?function=GLOBAL_QUOTE&symbol={symbol}&apikey={api_key}"
-
-        response = requests.get(url, timeout=10)
+        response = get_http_session().get(
+            endpoint,
+            params={'function': 'GLOBAL_QUOTE', 'symbol': symbol, 'apikey': api_key},
+            timeout=get_http_timeout()
+        )
         response.raise_for_status()
 
         data = response.json()
@@ -86,27 +198,34 @@ def check_volatility(symbol: str, api_key: str) -> Optional[Dict]:
         current_price = float(quote.get('05. price', 0))
         change_pct = float(quote.get('10. change percent', '0').replace('%', ''))
 
-        threshold = VOLATILITY_THRESHOLDS.get(symbol, 2.0)
-
-        triggered = abs(change_pct) >= threshold
-
-        return {
-            'triggered': triggered,
-            'current_price': current_price,
-            'change_pct': change_pct,
-            'threshold': threshold
-        }
+        return evaluate_volatility(symbol, current_price, change_pct)
 
     except Exception as e:
         print(f"Error checking volatility for {symbol}: {e}")
         return None
 
 
-def trigger_analysis(symbol: str, volatility: Dict):
+def evaluate_volatility(symbol: str, current_price: float, change_pct: float) -> Dict:
+    """Compare a quote's change against the symbol's volatility threshold"""
+
+    threshold = VOLATILITY_THRESHOLDS.get(symbol, 2.0)
+
+    triggered = abs(change_pct) >= threshold
+
+    return {
+        'triggered': triggered,
+        'current_price': current_price,
+        'change_pct': change_pct,
+        'threshold': threshold
+    }
+
+
+def trigger_analysis(symbol: str, volatility: Dict, publisher: Optional[EventBridgePublisher] = None):
     """Send event to EventBridge"""
 
     try:
-        put_eventbridge_event(
+        publish = publisher.put if publisher else put_eventbridge_event
+        publish(
             source='ai-trading.price-monitor',
             detail_type='VolatilityDetected',
             detail={
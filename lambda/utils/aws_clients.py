@@ -5,8 +5,15 @@ Centralized AWS service clients
 """
 
 import boto3
+import json
 import os
-from typing import Optional
+import time
+from typing import Dict, List, Optional
+
+# BatchGetItem limit, and retries of unprocessed (throttled) keys
+MAX_BATCH_GET_KEYS = 100
+MAX_BATCH_GET_ATTEMPTS = 3
+BATCH_GET_BACKOFF_SEC = 0.05
 
 
 class AWSClients:
@@ -18,6 +25,7 @@ class AWSClients:
     _sns = None
     _ssm = None
     _events = None
+    _lambda = None
 
     @classmethod
     def get_dynamodb(cls):
@@ -61,6 +69,13 @@ class AWSClients:
             cls._events = boto3.client('events')
         return cls._events
 
+    @classmethod
+    def get_lambda(cls):
+        """Get Lambda client"""
+        if cls._lambda is None:
+            cls._lambda = boto3.client('lambda')
+        return cls._lambda
+
 
 def get_table(table_name: str):
     """Get DynamoDB table"""
@@ -68,6 +83,62 @@ def get_table(table_name: str):
     return dynamodb.Table(table_name)
 
 
+def get_s3():
+    """Get S3 client"""
+    return AWSClients.get_s3()
+
+
+def batch_get_items(
+    table_name: str,
+    keys: List[Dict],
+    projection: Optional[str] = None,
+    ttl_attribute: Optional[str] = None
+) -> List[Dict]:
+    """
+    Get items by key with BatchGetItem (MAX_BATCH_GET_KEYS per call)
+
+    Unprocessed (throttled) keys are retried with backoff; keys still
+    unprocessed after MAX_BATCH_GET_ATTEMPTS are logged and treated as
+    missing. Errors are raised to the caller.
+
+    Args:
+        projection: ProjectionExpression (plain attribute names)
+        ttl_attribute: TTL attribute; TTL deletion is lazy, so items past it
+            are dropped
+
+    Returns:
+        Items found (in no particular order)
+    """
+    dynamodb = AWSClients.get_dynamodb()
+    now = time.time()
+    items = []
+
+    for start in range(0, len(keys), MAX_BATCH_GET_KEYS):
+        request = {table_name: {'Keys': keys[start:start + MAX_BATCH_GET_KEYS]}}
+        if projection:
+            request[table_name]['ProjectionExpression'] = projection
+
+        for attempt in range(MAX_BATCH_GET_ATTEMPTS):
+            if attempt:
+                time.sleep(BATCH_GET_BACKOFF_SEC * 2 ** (attempt - 1))
+
+            response = dynamodb.batch_get_item(RequestItems=request)
+            items.extend(response.get('Responses', {}).get(table_name, []))
+
+            request = response.get('UnprocessedKeys')
+            if not request:
+                break
+
+        if request:
+            unprocessed = len(request.get(table_name, {}).get('Keys', []))
+            print(f"BatchGetItem {table_name}: {unprocessed} keys still unprocessed, treated as missing")
+
+    if ttl_attribute:
+        items = [item for item in items if int(item.get(ttl_attribute, 0)) > now]
+
+    return items
+
+
 def get_ssm_parameter(param_name: str) -> Optional[str]:
     """Get SSM parameter value"""
     try:
@@ -79,20 +150,141 @@ def get_ssm_parameter(param_name: str) -> Optional[str]:
         return None
 
 
+def get_ssm_parameters(param_names: List[str]) -> Optional[Dict[str, Dict]]:
+    """
+    Get several SSM parameters in one GetParameters call (max 10 names)
+
+    Returns:
+        {name: {'value': str, 'version': int}} for the parameters found,
+        or None on error
+    """
+    try:
+        ssm = AWSClients.get_ssm()
+        response = ssm.get_parameters(Names=param_names, WithDecryption=True)
+
+        if response.get('InvalidParameters'):
+            print(f"SSM parameters not found: {response['InvalidParameters']}")
+
+        return {
+            param['Name']: {'value': param['Value'], 'version': param['Version']}
+            for param in response.get('Parameters', [])
+        }
+    except Exception as e:
+        print(f"Error getting SSM parameters {param_names}: {e}")
+        return None
+
+
+def invoke_lambda_async(function_name: str, payload: dict):
+    """Invoke a Lambda asynchronously (InvocationType='Event', returns on enqueue)"""
+    try:
+        client = AWSClients.get_lambda()
+        response = client.invoke(
+            FunctionName=function_name,
+            InvocationType='Event',
+            Payload=json.dumps(payload, default=str)
+        )
+        return response
+    except Exception as e:
+        print(f"Error invoking Lambda {function_name}: {e}")
+        return None
+
+
 def put_eventbridge_event(source: str, detail_type: str, detail: dict):
     """Put custom event to EventBridge"""
     try:
         events = AWSClients.get_eventbridge()
         response = events.put_events(
-            Entries=[
-                {
-                    'Source': source,
-                    'DetailType': detail_type,
-                    'Detail': str(detail)
-                }
-            ]
+            Entries=[make_eventbridge_entry(source, detail_type, detail)]
         )
         return response
     except Exception as e:
         print(f"Error putting EventBridge event: {e}")
         return None
+
+
+def make_eventbridge_entry(source: str, detail_type: str, detail: dict) -> Dict[str, str]:
+    """PutEvents entry with Detail serialised as JSON"""
+    return {
+        'Source': source,
+        'DetailType': detail_type,
+        'Detail': json.dumps(detail, default=str)
+    }
+
+
+class EventBridgePublisher:
+    """
+    Buffered EventBridge publisher
+
+    Groups events into PutEvents calls of up to 10 entries (256 KB) and
+    retries only the entries that failed. Use as a context manager so the
+    remaining buffer is flushed on exit.
+    """
+
+    MAX_ENTRIES = 10                 # PutEvents limit
+    MAX_BATCH_BYTES = 256 * 1024     # PutEvents limit
+    MAX_ATTEMPTS = 3
+    RETRY_BASE_DELAY_SEC = 0.1
+
+    def __init__(self):
+        self.events = AWSClients.get_eventbridge()
+        self._buffer: List[Dict[str, str]] = []
+        self._buffer_bytes = 0
+        self.sent = 0
+        self.failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def put(self, source: str, detail_type: str, detail: dict):
+        """Queue an event; sends a batch when the buffer is full"""
+        entry = make_eventbridge_entry(source, detail_type, detail)
+        size = self._entry_size(entry)
+
+        if self._buffer and self._buffer_bytes + size > self.MAX_BATCH_BYTES:
+            self.flush()
+
+        self._buffer.append(entry)
+        self._buffer_bytes += size
+
+        if len(self._buffer) >= self.MAX_ENTRIES:
+            self.flush()
+
+    def flush(self):
+        """Send buffered events, retrying failed entries"""
+        pending = self._buffer
+        self._buffer = []
+        self._buffer_bytes = 0
+
+        for attempt in range(self.MAX_ATTEMPTS):
+            if not pending:
+                return
+
+            if attempt:
+                time.sleep(self.RETRY_BASE_DELAY_SEC * (2 ** (attempt - 1)))
+
+            try:
+                response = self.events.put_events(Entries=pending)
+            except Exception as e:
+                print(f"Error putting EventBridge events (attempt {attempt + 1}): {e}")
+                continue
+
+            # Result entries are in request order; failed ones carry ErrorCode
+            results = response.get('Entries', [])
+            retry = [
+                entry for entry, result in zip(pending, results)
+                if result.get('ErrorCode')
+            ]
+            self.sent += len(pending) - len(retry)
+            pending = retry
+
+        if pending:
+            print(f"Error putting EventBridge events: {len(pending)} entries failed after {self.MAX_ATTEMPTS} attempts")
+            self.failed += len(pending)
+
+    @staticmethod
+    def _entry_size(entry: Dict[str, str]) -> int:
+        """Entry size as counted by PutEvents (UTF-8 bytes of its fields)"""
+        return sum(len(value.encode('utf-8')) for value in entry.values())
@@ -3,22 +3,69 @@ Lambda Utilities: Circuit Breaker
 
 Prevents excessive trading and enforces risk limits
 Based on DESIGN_DOC_FINAL.md Section 4.3
+
+Risk state is kept in one aggregate item in the trigger history table
+(last trigger time, daily trades/P&L, cumulative P&L), updated atomically by
+log_trigger() / record_position_opened() / record_position_closed(). The
+hourly trigger limit is an exact count over RecentTriggerIndex. Daily trades
+and P&L are read from the item only with position_ledger enabled (once the
+position manager calls the record_position_* writers); otherwise they are
+queried from the positions table.
+
+With position_ledger, the cumulative P&L ledger is reconciled once against a
+full positions scan (reconcile_total_pnl) so history from before the ledger
+existed is counted; a failed reconciliation is retried after
+reconcile_retry_sec. Without it, the total loss check uses the cached scan.
+
+Results of the read-heavy table checks (hourly triggers, daily trades, daily
+loss, total loss) are cached per instance for check_cache_ttl_sec; keep one
+instance per container. Writes made through it invalidate the entries they
+affect: log_trigger the hourly trigger count, position writes the rest. With
+parallel_checks enabled the checks are issued concurrently and the first
+failure (in rule order) is returned.
 """
 
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Optional
-from lambda.utils.constants import CIRCUIT_BREAKER_RULES, DYNAMODB_TABLES
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from botocore.exceptions import ClientError
+from lambda.utils.constants import CIRCUIT_BREAKER_RULES, CIRCUIT_BREAKER_SETTINGS, DYNAMODB_TABLES
 from lambda.utils.aws_clients import get_table
 
+# Aggregate risk state item (trigger history table)
+RISK_STATE_KEY = {'trigger_id': 'circuit_breaker_state'}
+
+# Trigger log items carry record_type so RecentTriggerIndex (record_type +
+# timestamp) can return them newest-first
+TRIGGER_RECORD_TYPE = 'trigger'
+
+# Scanned total P&L, shared across warm invocations: {'value', 'expires_at'}
+_total_pnl_cache = {'value': None, 'expires_at': 0.0}
+
+# Earliest retry of a failed ledger reconciliation: {'retry_at'}
+_reconcile_backoff = {'retry_at': 0.0}
+
 
 class CircuitBreaker:
-    """Circuit breaker for risk management"""
+    """
+    Circuit breaker for risk management
+
+    Checks may run on worker threads (parallel_checks), so they call the
+    resource's client (thread-safe, unlike Table; still plain values in and
+    out) with TableName instead of the shared Table resources.
+    """
 
     def __init__(self):
         self.rules = CIRCUIT_BREAKER_RULES
         self.trigger_table = get_table(DYNAMODB_TABLES['trigger_history'])
         self.positions_table = get_table(DYNAMODB_TABLES['positions'])
 
+        # Check name -> (expires_at, result)
+        self._check_cache: Dict[str, Tuple[float, Dict]] = {}
+
     def check(self, trigger_type: str) -> Dict[str, any]:
         """
         Check if system should proceed
@@ -33,46 +80,175 @@ class CircuitBreaker:
             }
         """
 
-        # Check 1: Triggers per hour limit
-        hourly_check = self._check_hourly_triggers()
-        if not hourly_check['allowed']:
-            return hourly_check
+        state = self._get_risk_state()
+
+        # Daily counters are only fed once the position manager calls
+        # record_position_opened/closed; until then query the positions table
+        ledger = state if state is not None and CIRCUIT_BREAKER_SETTINGS['position_ledger'] else None
+
+        checks = [
+            # Check 1: Triggers per hour limit (exact count over the last hour)
+            lambda: self._cached_check('hourly_triggers', self._check_hourly_triggers),
+            # Check 2: Positions per day limit
+            (lambda: self._check_daily_trades_state(ledger)) if ledger
+            else (lambda: self._cached_check('daily_trades', self._check_daily_trades)),
+            # Check 3: Daily loss limit
+            (lambda: self._check_daily_loss_state(ledger)) if ledger
+            else (lambda: self._cached_check('daily_loss', self._check_daily_loss)),
+            # Check 4: Total loss limit
+            (lambda: self._check_total_loss_state(ledger)) if ledger
+            else (lambda: self._cached_check('total_loss', self._check_total_loss)),
+            # Check 5: Minimum interval
+            (lambda: self._check_interval_state(state)) if state and state.get('last_trigger_at')
+            else self._check_minimum_interval,
+        ]
+
+        return self._run_checks(checks)
+
+    def _get_risk_state(self) -> Optional[Dict]:
+        """Read the aggregate risk state item (None if missing or unreadable)"""
+        try:
+            response = self.trigger_table.get_item(Key=RISK_STATE_KEY, ConsistentRead=True)
+            return response.get('Item')
+
+        except Exception as e:
+            print(f"Error reading risk state: {e}")
+            return None
+
+    def _check_daily_trades_state(self, state: Dict) -> Dict[str, any]:
+        """Positions per day limit from the aggregate risk state"""
+        is_today = state.get('trade_date') == datetime.utcnow().date().isoformat()
+        count = int(state.get('daily_trades', 0)) if is_today else 0
+
+        if count >= self.rules['max_positions_per_day']:
+            return {
+                "allowed": False,
+                "reason": f"Daily trade limit reached ({count}/{self.rules['max_positions_per_day']})"
+            }
+
+        return {"allowed": True}
 
-        # Check 2: Positions per day limit
-        daily_trades_check = self._check_daily_trades()
-        if not daily_trades_check['allowed']:
-            return daily_trades_check
+    def _check_daily_loss_state(self, state: Dict) -> Dict[str, any]:
+        """Daily loss limit from the aggregate risk state"""
+        is_today = state.get('trade_date') == datetime.utcnow().date().isoformat()
+        daily_pnl = float(state.get('daily_pnl', 0)) if is_today else 0.0
 
-        # Check 3: Daily loss limit
-        daily_loss_check = self._check_daily_loss()
-        if not daily_loss_check['allowed']:
-            return daily_loss_check
+        if daily_pnl <= -self.rules['daily_loss_limit_usd']:
+            return {
+                "allowed": False,
+                "reason": f"Daily loss limit reached (${daily_pnl:.2f})"
+            }
+
+        return {"allowed": True}
+
+    def _check_total_loss_state(self, state: Dict) -> Dict[str, any]:
+        """Total loss limit from the P&L ledger (reconciled against positions once)"""
+        try:
+            if 'total_pnl_reconciled_at' in state:
+                total_pnl = float(state.get('total_pnl', 0))
+            elif time.time() < _reconcile_backoff['retry_at']:
+                # Reconciliation failed recently: don't rescan on every check
+                total_pnl = self._cached_total_pnl()
+            else:
+                total_pnl = self.reconcile_total_pnl()
 
-        # Check 4: Total loss limit
-        total_loss_check = self._check_total_loss()
-        if not total_loss_check['allowed']:
-            return total_loss_check
+            if total_pnl <= -self.rules['total_loss_limit_usd']:
+                return {
+                    "allowed": False,
+                    "reason": f"CRITICAL: Total loss limit reached (${total_pnl:.2f}). System stopped."
+                }
 
-        # Check 5: Minimum interval
-        interval_check = self._check_minimum_interval()
-        if not interval_check['allowed']:
-            return interval_check
+            return {"allowed": True}
+
+        except Exception as e:
+            print(f"Error checking total loss: {e}")
+            return {"allowed": True}
+
+    def _check_interval_state(self, state: Dict) -> Dict[str, any]:
+        """Minimum interval from the last trigger time in the aggregate risk state"""
+        last_timestamp = datetime.fromisoformat(state['last_trigger_at'])
+        elapsed = (datetime.utcnow() - last_timestamp).total_seconds()
+
+        if elapsed < self.rules['min_interval_seconds']:
+            return {
+                "allowed": False,
+                "reason": f"Minimum interval not met ({elapsed:.0f}s < {self.rules['min_interval_seconds']}s)"
+            }
+
+        return {"allowed": True}
+
+    def _run_checks(self, checks: List) -> Dict[str, any]:
+        """Run checks in rule order (concurrently with parallel_checks); first failure wins"""
+
+        if CIRCUIT_BREAKER_SETTINGS['parallel_checks']:
+            return self._run_checks_parallel(checks)
+
+        for check_fn in checks:
+            result = check_fn()
+            if not result['allowed']:
+                return result
 
         return {"allowed": True, "reason": "All checks passed"}
 
+    def _run_checks_parallel(self, checks: List) -> Dict[str, any]:
+        """
+        Issue all checks concurrently
+
+        Results are inspected in rule order, so the returned reason is the same
+        as running them sequentially. Checks not yet started are cancelled once
+        a failure is found.
+        """
+        pool = ThreadPoolExecutor(max_workers=len(checks))
+        try:
+            futures = [pool.submit(check_fn) for check_fn in checks]
+
+            for future in futures:
+                result = future.result()
+                if not result['allowed']:
+                    return result
+
+            return {"allowed": True, "reason": "All checks passed"}
+
+        finally:
+            # Don't wait for checks still in flight after a failure
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _cached_check(self, name: str, check_fn) -> Dict[str, any]:
+        """Run a read-heavy check, reusing its result for check_cache_ttl_sec"""
+        now = time.time()
+        cached = self._check_cache.get(name)
+
+        if cached and now < cached[0]:
+            return cached[1]
+
+        result = check_fn()
+        self._check_cache[name] = (now + CIRCUIT_BREAKER_SETTINGS['check_cache_ttl_sec'], result)
+        return result
+
+    def invalidate_cache(self, *names: str):
+        """Drop cached check results (the named ones, or all of them)"""
+        if not names:
+            self._check_cache.clear()
+
+        for name in names:
+            self._check_cache.pop(name, None)
+
     def _check_hourly_triggers(self) -> Dict[str, any]:
         """Check if hourly trigger limit exceeded"""
         try:
             one_hour_ago = datetime.utcnow() - timedelta(hours=1)
             timestamp_str = one_hour_ago.isoformat()
 
-            response = self.trigger_table.query(
-                IndexName='TimestampIndex',  # Assumes GSI exists
-                KeyConditionExpression='timestamp > :hour_ago',
-                ExpressionAttributeValues={':hour_ago': timestamp_str}
+            response = self.trigger_table.meta.client.query(
+                TableName=self.trigger_table.name,
+                IndexName='RecentTriggerIndex',
+                KeyConditionExpression='record_type = :type AND #ts > :hour_ago',
+                ExpressionAttributeNames={'#ts': 'timestamp'},
+                ExpressionAttributeValues={':type': TRIGGER_RECORD_TYPE, ':hour_ago': timestamp_str},
+                Select='COUNT'
             )
 
-            count = len(response.get('Items', []))
+            count = response.get('Count', 0)
 
             if count >= self.rules['max_triggers_per_hour']:
                 return {
@@ -91,7 +267,8 @@ class CircuitBreaker:
         try:
             today = datetime.utcnow().date().isoformat()
 
-            response = self.positions_table.query(
+            response = self.positions_table.meta.client.query(
+                TableName=self.positions_table.name,
                 IndexName='DateIndex',  # Assumes GSI exists
                 KeyConditionExpression='trade_date = :today',
                 ExpressionAttributeValues={':today': today}
@@ -116,7 +293,8 @@ class CircuitBreaker:
         try:
             today = datetime.utcnow().date().isoformat()
 
-            response = self.positions_table.query(
+            response = self.positions_table.meta.client.query(
+                TableName=self.positions_table.name,
                 IndexName='DateIndex',
                 KeyConditionExpression='trade_date = :today',
                 ExpressionAttributeValues={':today': today}
@@ -139,9 +317,7 @@ class CircuitBreaker:
     def _check_total_loss(self) -> Dict[str, any]:
         """Check if total project loss limit exceeded"""
         try:
-            response = self.positions_table.scan()
-
-            total_pnl = sum(item.get('pnl', 0) for item in response.get('Items', []))
+            total_pnl = self._cached_total_pnl()
 
             if total_pnl <= -self.rules['total_loss_limit_usd']:
                 return {
@@ -155,10 +331,99 @@ class CircuitBreaker:
             print(f"Error checking total loss: {e}")
             return {"allowed": True}
 
+    def reconcile_total_pnl(self) -> float:
+        """
+        Set the total P&L ledger from a full positions scan
+
+        Runs automatically on the first check after the ledger is introduced.
+        Only the first reconciliation is applied; later calls still return
+        the scanned total. Positions closed while the scan runs may be missed,
+        so re-run it manually when no positions are open to correct drift.
+
+        Returns:
+            Scanned total P&L
+        """
+        try:
+            total_pnl = self._scan_total_pnl()
+        except Exception:
+            _reconcile_backoff['retry_at'] = time.time() + CIRCUIT_BREAKER_SETTINGS['reconcile_retry_sec']
+            raise
+
+        # The scan also serves the cached total while reconciliation is retried
+        _total_pnl_cache['value'] = float(total_pnl)
+        _total_pnl_cache['expires_at'] = time.time() + CIRCUIT_BREAKER_SETTINGS['total_pnl_cache_ttl_sec']
+
+        try:
+            self.trigger_table.meta.client.update_item(
+                TableName=self.trigger_table.name,
+                Key=RISK_STATE_KEY,
+                UpdateExpression='SET total_pnl = :total, total_pnl_reconciled_at = :now',
+                ConditionExpression='attribute_not_exists(total_pnl_reconciled_at)',
+                ExpressionAttributeValues={
+                    ':total': total_pnl,
+                    ':now': datetime.utcnow().isoformat()
+                }
+            )
+
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                print(f"Error reconciling total P&L: {e}")
+                _reconcile_backoff['retry_at'] = time.time() + CIRCUIT_BREAKER_SETTINGS['reconcile_retry_sec']
+
+        return float(total_pnl)
+
+    def _cached_total_pnl(self) -> float:
+        """Scanned total P&L, reused for total_pnl_cache_ttl_sec"""
+        now = time.time()
+
+        if _total_pnl_cache['value'] is None or now >= _total_pnl_cache['expires_at']:
+            _total_pnl_cache['value'] = float(self._scan_total_pnl())
+            _total_pnl_cache['expires_at'] = now + CIRCUIT_BREAKER_SETTINGS['total_pnl_cache_ttl_sec']
+
+        return _total_pnl_cache['value']
+
+    def _scan_total_pnl(self) -> Decimal:
+        """Exact sum of pnl over all positions (paginated parallel scan)"""
+        segments = CIRCUIT_BREAKER_SETTINGS['total_pnl_scan_segments']
+
+        with ThreadPoolExecutor(max_workers=segments) as pool:
+            return sum(pool.map(self._scan_segment_pnl, range(segments)), Decimal('0'))
+
+    def _scan_segment_pnl(self, segment: int) -> Decimal:
+        """Sum pnl over one scan segment, following LastEvaluatedKey"""
+        client = self.positions_table.meta.client
+        kwargs = {
+            'TableName': self.positions_table.name,
+            'Segment': segment,
+            'TotalSegments': CIRCUIT_BREAKER_SETTINGS['total_pnl_scan_segments'],
+            'ProjectionExpression': '#pnl',
+            'ExpressionAttributeNames': {'#pnl': 'pnl'},
+        }
+        total = Decimal('0')
+
+        while True:
+            response = client.scan(**kwargs)
+
+            for item in response.get('Items', []):
+                total += item.get('pnl', 0)
+
+            if 'LastEvaluatedKey' not in response:
+                return total
+
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
     def _check_minimum_interval(self) -> Dict[str, any]:
         """Check minimum interval between triggers"""
         try:
-            response = self.trigger_table.scan(Limit=1)
+            # Newest trigger first
+            response = self.trigger_table.meta.client.query(
+                TableName=self.trigger_table.name,
+                IndexName='RecentTriggerIndex',
+                KeyConditionExpression='record_type = :type',
+                ExpressionAttributeValues={':type': TRIGGER_RECORD_TYPE},
+                ScanIndexForward=False,
+                Limit=1
+            )
             items = response.get('Items', [])
 
             if not items:
@@ -182,15 +447,101 @@ class CircuitBreaker:
 
     def log_trigger(self, trigger_type: str, details: dict):
         """Log trigger event to DynamoDB"""
+        now = datetime.utcnow()
+
         try:
             item = {
-                'trigger_id': f"{trigger_type}_{datetime.utcnow().isoformat()}",
-                'timestamp': datetime.utcnow().isoformat(),
+                'trigger_id': f"{trigger_type}_{now.isoformat()}",
+                'record_type': TRIGGER_RECORD_TYPE,
+                'timestamp': now.isoformat(),
                 'trigger_type': trigger_type,
-                'details': details
+                # DynamoDB rejects float: store numbers as Decimal
+                'details': json.loads(json.dumps(details, default=str), parse_float=Decimal)
             }
 
             self.trigger_table.put_item(Item=item)
 
         except Exception as e:
             print(f"Error logging trigger: {e}")
+
+        # Trigger logs only change the hourly count, not trades or P&L
+        self.invalidate_cache('hourly_triggers')
+
+        try:
+            self._record_trigger_state(now)
+
+        except Exception as e:
+            print(f"Error updating risk state: {e}")
+
+    def record_position_opened(self):
+        """Count a new position in the daily trade total (call from position manager)"""
+        self.invalidate_cache()
+
+        try:
+            self._record_daily_state(trades=1, pnl=Decimal('0'))
+
+        except Exception as e:
+            print(f"Error updating risk state: {e}")
+
+    def record_position_closed(self, pnl: float):
+        """Add a closed position's realised P&L to daily and total P&L"""
+        self.invalidate_cache()
+        _total_pnl_cache['value'] = None
+
+        try:
+            self._record_daily_state(trades=0, pnl=Decimal(str(pnl)))
+
+        except Exception as e:
+            print(f"Error updating risk state: {e}")
+
+    def _record_trigger_state(self, now: datetime):
+        """Store the last trigger time (minimum interval check)"""
+        self.trigger_table.update_item(
+            Key=RISK_STATE_KEY,
+            UpdateExpression='SET last_trigger_at = :now',
+            ExpressionAttributeValues={':now': now.isoformat()}
+        )
+
+    def _record_daily_state(self, trades: int, pnl: Decimal):
+        """Atomically add trades/P&L to today's bucket and P&L to the total"""
+        today = datetime.utcnow().date().isoformat()
+
+        self._conditional_update([
+            # Same day: increment
+            (
+                'ADD daily_trades :trades, daily_pnl :pnl, total_pnl :pnl',
+                'trade_date = :today',
+                {':today': today, ':trades': trades, ':pnl': pnl}
+            ),
+            # New item or new day: reset daily counters
+            (
+                'SET trade_date = :today, daily_trades = :trades, daily_pnl = :pnl '
+                'ADD total_pnl :pnl',
+                'attribute_not_exists(trade_date) OR trade_date <> :today',
+                {':today': today, ':trades': trades, ':pnl': pnl}
+            ),
+        ])
+
+    def _conditional_update(self, variants: List[Tuple[str, str, Dict]], max_rounds: int = 3):
+        """
+        Apply the first update variant whose condition holds
+
+        The conditions are mutually exclusive; a miss on every variant means a
+        concurrent writer changed the bucket, so the round is retried.
+        """
+        for _ in range(max_rounds):
+            for update_expression, condition_expression, values in variants:
+                try:
+                    self.trigger_table.update_item(
+                        Key=RISK_STATE_KEY,
+                        UpdateExpression=update_expression,
+                        ConditionExpression=condition_expression,
+                        ExpressionAttributeValues=values
+                    )
+                    return
+
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+
+        raise RuntimeError("Risk state update kept conflicting with concurrent writers")
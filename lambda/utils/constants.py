@@ -22,6 +22,17 @@ CIRCUIT_BREAKER_RULES = {
     "total_loss_limit_usd": 100,
 }
 
+# Circuit breaker implementation settings
+CIRCUIT_BREAKER_SETTINGS = {
+    "total_pnl_scan_segments": 4,      # Parallel scan segments (positions table)
+    "total_pnl_cache_ttl_sec": 60,     # Reuse of scanned total P&L
+    "reconcile_retry_sec": 300,        # Backoff after a failed total P&L ledger reconciliation
+    "check_cache_ttl_sec": 30,         # Reuse of hourly triggers, daily trades/loss, total loss results
+    "parallel_checks": True,           # Run checks concurrently
+    "position_ledger": False,          # Daily trades/P&L from the risk state item; enable once the
+                                       # position manager calls record_position_opened/closed
+}
+
 # Volatility thresholds (DESIGN_DOC_FINAL.md Section 4.2)
 VOLATILITY_THRESHOLDS = {
     "AAPL": 2.0,   # ±2%
@@ -44,6 +55,9 @@ DYNAMODB_TABLES = {
     "trigger_history": "ai-trading-trigger-history",
     "positions": "ai-trading-positions",
     "economic_calendar": "ai-trading-economic-calendar",
+    "decision_cache": "ai-trading-decision-cache",
+    "news_clusters": "ai-trading-news-clusters",
+    "news_articles": "ai-trading-news-articles",
 }
 
 # S3 bucket names
@@ -59,8 +73,73 @@ SSM_PARAMS = {
     "prompt_exit_evaluation": "/ai-trading/prompts/exit-evaluation",
 }
 
+# Reuse of SSM parameters (patterns/prompts) across warm invocations
+SSM_CACHE_TTL_SEC = 300
+
+# Coalescing of news triggers per symbol (news_fetch -> one multi-item analysis)
+TRIGGER_BATCHING = {
+    "window_sec": 60,   # News published within this of the group's first item
+    "max_items": 5,     # Items per analysis call
+}
+
+# Idempotent news ingestion (news_fetch: one record per symbol and article)
+NEWS_INGESTION = {
+    "max_age_sec": 21600,         # Ignore articles published before this
+    "ttl_sec": 259200,            # Article records outlive the fetch range (today and yesterday)
+    "max_workers": 8,             # Parallel conditional puts
+}
+
+# Near-duplicate news clustering (news_fetch -> one trigger per story)
+NEWS_CLUSTERING = {
+    "enabled": True,
+    "window_sec": 21600,          # A story is triggered once per symbol in this window
+    "num_perm": 32,               # MinHash signature length
+    "bands": 8,                   # LSH bands (4 rows each)
+    "min_similarity": 0.7,        # Estimated Jaccard of headlines in one cluster
+    "max_workers": 8,             # Parallel index updates (one per band key)
+}
+
+# Analysis decisions reused for repeated/near-duplicate headlines (ai_analysis)
+DECISION_CACHE = {
+    "enabled": True,
+    "ttl_sec": 86400,             # Finnhub re-serves articles for about a day (Hold decisions)
+    "entry_ttl_sec": 300,         # Buy/Sell decisions carry prices: reuse only while they are fresh
+    "num_perm": 32,               # MinHash signature length
+    "bands": 8,                   # LSH bands (4 rows each)
+    "min_similarity": 0.8,        # Estimated Jaccard to accept a cached decision
+    "memory_max_entries": 2000,   # In-memory front (band keys)
+}
+
+# Idempotency claims of async ai_analysis invocations (trigger history table)
+ANALYSIS_CLAIM = {
+    "lease_sec": 120,             # ai_analysis function timeout: an older unfinished claim is reclaimable
+    "ttl_sec": 86400,             # Claim items expire (TTL attribute expires_at) after async retries end
+}
+
+# Bedrock realtime analysis (ai_analysis)
+BEDROCK_ANALYSIS = {
+    "model_id": "anthropic.claude-3-haiku-20240307-v1:0",
+    "max_tokens": 2000,
+    "temperature": 0.3,
+    # Mark the pattern prefix with cache_control; enable only for models that
+    # support Bedrock prompt caching (Claude 3 Haiku does not)
+    "prompt_caching": False,
+    # Request the decision as a forced tool call (structured JSON) instead of text
+    "structured_output": True,
+    # Stream single-item decisions and stop reading once the entry outcome is known
+    "streaming": True,
+}
+
 # API endpoints
 API_ENDPOINTS = {
     "finnhub_news": "https://finnhub.io/api/v1/company-news",
     "alpha_vantage_quote": "https://www.alphavantage.co/query",
 }
+
+# Outbound HTTP (shared keep-alive session, concurrent per-symbol requests)
+HTTP_CLIENT = {
+    "connect_timeout_sec": 3.05,
+    "read_timeout_sec": 10,
+    "pool_size": 10,
+    "max_workers": 5,   # Concurrent requests per invocation
+}
@@ -0,0 +1,146 @@
+"""
+Lambda Utilities: Decision Cache
+
+Reuses AI analysis results for repeated or near-duplicate stories (Finnhub
+re-serves articles for a day; syndicated copies arrive under other ids).
+
+An entry is stored under one key per LSH band of the headline MinHash, each
+prefixed with symbol and pattern library version, so a near-duplicate
+headline finds it with exact key lookups. Hits are confirmed by signature
+similarity. Entries live in DynamoDB (TTL attribute expires_at) across
+containers, fronted by a bounded in-memory map within a container.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from lambda.utils.aws_clients import batch_get_items, get_table
+from lambda.utils.constants import DECISION_CACHE, DYNAMODB_TABLES
+from lambda.utils.minhash import MinHasher, best_match, similarity
+
+_hasher = MinHasher(DECISION_CACHE['num_perm'])
+
+# Cache key -> entry {'decision', 'signature', 'headline', 'expires_at'},
+# shared across warm invocations (least recently used first)
+_memory: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+
+class DecisionCache:
+    """Near-duplicate aware cache of analysis decisions"""
+
+    def __init__(self):
+        self.table_name = DYNAMODB_TABLES['decision_cache']
+        self.table = get_table(self.table_name)
+
+    def lookup(self, symbol: str, headline: str, version: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached decision for the same or a near-duplicate headline
+
+        Returns:
+            {'decision': Dict, 'headline': str (of the cached story), 'similarity': float}
+            or None
+        """
+        signature = _hasher.signature(headline)
+        keys = self._keys(symbol, version, signature)
+
+        entry = best_match(self._memory_entries(keys), signature, DECISION_CACHE['min_similarity'])
+
+        if entry is None:
+            entries = self._table_entries(keys)
+            entry = best_match(entries, signature, DECISION_CACHE['min_similarity'])
+            if entry is not None:
+                self._remember(keys, entry)
+
+        if entry is None:
+            return None
+
+        return {
+            'decision': entry['decision'],
+            'headline': entry['headline'],
+            'similarity': similarity(signature, entry['signature'])
+        }
+
+    def store(
+        self, symbol: str, headline: str, version: str, decision: Dict[str, Any],
+        ttl_sec: Optional[int] = None
+    ):
+        """
+        Cache a decision under every band key of the headline (one BatchWriteItem)
+
+        Args:
+            ttl_sec: Lifetime of the entry (default DECISION_CACHE['ttl_sec'])
+        """
+        signature = _hasher.signature(headline)
+        keys = self._keys(symbol, version, signature)
+        entry = {
+            'decision': decision,
+            'signature': list(signature),
+            'headline': headline,
+            'expires_at': int(time.time()) + (ttl_sec or DECISION_CACHE['ttl_sec'])
+        }
+
+        self._remember(keys, entry)
+
+        try:
+            with self.table.batch_writer() as batch:
+                for key in keys:
+                    batch.put_item(Item={
+                        'cache_key': key,
+                        'decision': json.dumps(decision, default=str),
+                        'signature': json.dumps(entry['signature']),
+                        'headline': headline,
+                        'expires_at': entry['expires_at']
+                    })
+        except Exception as e:
+            print(f"Error storing cached decision: {e}")
+
+    def _keys(self, symbol: str, version: str, signature: Sequence[int]) -> List[str]:
+        return [
+            f"{symbol}#{version}#{band_key}"
+            for band_key in _hasher.band_keys(signature, DECISION_CACHE['bands'])
+        ]
+
+    def _memory_entries(self, keys: List[str]) -> List[Dict[str, Any]]:
+        now = time.time()
+        entries = []
+        for key in keys:
+            entry = _memory.get(key)
+            if entry is None:
+                continue
+            if entry['expires_at'] <= now:
+                del _memory[key]
+                continue
+            _memory.move_to_end(key)
+            entries.append(entry)
+        return entries
+
+    def _table_entries(self, keys: List[str]) -> List[Dict[str, Any]]:
+        """Unexpired entries for any of the keys (BatchGetItem; fails open)"""
+        try:
+            items = batch_get_items(
+                self.table_name, [{'cache_key': key} for key in keys], ttl_attribute='expires_at'
+            )
+        except Exception as e:
+            print(f"Error reading cached decisions: {e}")
+            return []
+
+        return [
+            {
+                'decision': json.loads(item['decision']),
+                'signature': json.loads(item['signature']),
+                'headline': item.get('headline', ''),
+                'expires_at': int(item['expires_at'])
+            }
+            for item in items
+        ]
+
+    @staticmethod
+    def _remember(keys: List[str], entry: Dict[str, Any]):
+        for key in keys:
+            _memory[key] = entry
+            _memory.move_to_end(key)
+
+        while len(_memory) > DECISION_CACHE['memory_max_entries']:
+            _memory.popitem(last=False)
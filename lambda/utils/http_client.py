@@ -0,0 +1,36 @@
+"""
+Lambda Utilities: HTTP Client
+
+Shared keep-alive HTTP session for external API calls.
+The session lives at module level so warm invocations reuse its connections.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Tuple
+
+from lambda.utils.constants import HTTP_CLIENT
+
+_session = None
+
+
+def get_http_session() -> requests.Session:
+    """Get pooled HTTP session (created once per container)"""
+    global _session
+
+    if _session is None:
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_CLIENT['pool_size'],
+            pool_maxsize=HTTP_CLIENT['pool_size']
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _session = session
+
+    return _session
+
+
+def get_http_timeout() -> Tuple[float, float]:
+    """(connect, read) timeout applied to every request"""
+    return (HTTP_CLIENT['connect_timeout_sec'], HTTP_CLIENT['read_timeout_sec'])
@@ -0,0 +1,131 @@
+"""
+Lambda Utilities: Keyword Matcher
+
+Aho-Corasick multi-keyword matcher for news text.
+Finds every keyword hit in a single pass and derives keywords, topic and
+importance together. Shared by news_fetch and Phase 0 feature extraction
+so both classify news the same way.
+
+No package imports: Phase 0 loads this module via importlib.
+"""
+
+from collections import deque
+from typing import Dict, List, Set, Tuple
+
+# Financial domain keywords (reported in this order)
+FINANCIAL_KEYWORDS = [
+    'beat', 'miss', 'expectations', 'earnings', 'revenue',
+    'guidance', 'raised', 'lowered', 'upgrade', 'downgrade',
+    'acquisition', 'merger', 'partnership', 'lawsuit', 'regulation',
+    'product', 'launch', 'delay', 'recall', 'innovation'
+]
+
+# Topic keywords (evaluated in order, first match wins)
+TOPIC_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ("Earnings", ['earnings', 'revenue', 'profit', 'eps', 'beat', 'miss']),
+    ("M&A", ['acquisition', 'merger', 'acquire', 'buyout']),
+    ("Product", ['product', 'launch', 'release', 'innovation']),
+    ("Legal", ['lawsuit', 'regulation', 'investigation', 'legal']),
+]
+
+# news_fetch importance filter
+IMPORTANT_KEYWORDS = [
+    'earnings', 'revenue', 'profit', 'guidance',
+    'acquisition', 'merger', 'lawsuit', 'fda',
+    'downgrade', 'upgrade', 'rating'
+]
+IMPORTANT_CATEGORIES = ['Earnings', 'M&A', 'Legal']
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over lowercase keywords (substring semantics)"""
+
+    def __init__(self, keywords: List[str]):
+        # Node i: transitions, failure link, keywords ending here (incl. via failure links)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[str]] = [set()]
+
+        for keyword in dict.fromkeys(kw.lower() for kw in keywords):
+            self._add(keyword)
+
+        self._build_failure_links()
+
+    def _add(self, keyword: str):
+        node = 0
+        for char in keyword:
+            if char not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+                self._goto[node][char] = len(self._goto) - 1
+            node = self._goto[node][char]
+        self._out[node].add(keyword)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+
+                self._out[child] |= self._out[self._fail[child]]
+
+    def find_all(self, text: str) -> Set[str]:
+        """Distinct keywords occurring anywhere in text (case-insensitive)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[str] = set()
+        node = 0
+
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found |= out[node]
+
+        return found
+
+
+# Built once at import, reused across warm invocations
+NEWS_MATCHER = KeywordMatcher(
+    FINANCIAL_KEYWORDS
+    + [kw for _, keywords in TOPIC_KEYWORDS for kw in keywords]
+    + IMPORTANT_KEYWORDS
+)
+
+
+def analyze_news_text(text: str, top_n: int = 5) -> Dict[str, object]:
+    """
+    Match all news keywords in one pass
+
+    Returns:
+        {
+            'keywords': List[str] (FINANCIAL_KEYWORDS hits, max top_n),
+            'topic': str (Earnings/M&A/Product/Legal/Other),
+            'important': bool (any IMPORTANT_KEYWORDS hit)
+        }
+    """
+    found = NEWS_MATCHER.find_all(text)
+
+    keywords = [kw for kw in FINANCIAL_KEYWORDS if kw in found][:top_n]
+
+    topic = "Other"
+    for name, topic_keywords in TOPIC_KEYWORDS:
+        if any(kw in found for kw in topic_keywords):
+            topic = name
+            break
+
+    important = any(kw in found for kw in IMPORTANT_KEYWORDS)
+
+    return {
+        'keywords': keywords,
+        'topic': topic,
+        'important': important
+    }
@@ -0,0 +1,98 @@
+"""
+Lambda Utilities: MinHash
+
+MinHash signatures over character shingles of normalised headlines, and LSH
+band keys for finding near-duplicates with exact-match lookups (a key per
+band; near-duplicates share at least one band with high probability).
+Hashing is seeded and process-independent, so signatures and band keys can
+be persisted and compared across invocations.
+"""
+
+import hashlib
+import random
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Mersenne prime for the universal hash family h(x) = (a*x + b) mod p
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 64) - 1
+
+_NON_WORD = re.compile(r'[^a-z0-9 ]+')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation, collapse whitespace"""
+    text = _NON_WORD.sub(' ', str(text).lower())
+    return _SPACES.sub(' ', text).strip()
+
+
+def shingles(text: str, k: int = 4) -> Set[str]:
+    """Character k-shingles of the normalised text (the text itself if shorter)"""
+    text = normalize_text(text)
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class MinHasher:
+    """Fixed family of num_perm hash permutations"""
+
+    def __init__(self, num_perm: int = 32, shingle_size: int = 4, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._params = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """MinHash signature of text (all _MAX_HASH for empty text)"""
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+            for s in shingles(text, self.shingle_size)
+        ]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+
+        return tuple(
+            min((a * h + b) % _PRIME for h in hashes)
+            for a, b in self._params
+        )
+
+    def band_keys(self, signature: Sequence[int], bands: int) -> List[str]:
+        """
+        One key per LSH band ("<band>:<hash of the band's rows>")
+
+        Two signatures with Jaccard similarity s share a band with
+        probability 1 - (1 - s^rows)^bands.
+        """
+        rows = self.num_perm // bands
+        keys = []
+        for band in range(bands):
+            chunk = ','.join(str(value) for value in signature[band * rows:(band + 1) * rows])
+            digest = hashlib.blake2b(chunk.encode('ascii'), digest_size=8).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+
+def similarity(signature_a: Sequence[int], signature_b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    if not signature_a or len(signature_a) != len(signature_b):
+        return 0.0
+    return sum(a == b for a, b in zip(signature_a, signature_b)) / len(signature_a)
+
+
+def best_match(
+    candidates: Iterable[Dict[str, Any]],
+    signature: Optional[Sequence[int]],
+    min_similarity: float
+) -> Optional[Dict[str, Any]]:
+    """Candidate (dict with a 'signature') most similar to signature, at or above min_similarity"""
+    best, best_score = None, min_similarity
+    for candidate in candidates:
+        score = similarity(signature or (), candidate['signature'])
+        if score >= best_score:
+            best, best_score = candidate, score
+    return best
@@ -0,0 +1,166 @@
+"""
+Lambda Utilities: News Clusters
+
+Near-duplicate clustering of news (wire stories syndicated across outlets)
+over headline MinHash signatures, so each story triggers analysis once per
+symbol within NEWS_CLUSTERING['window_sec'], however many outlets and fetch
+runs it arrives in.
+
+Clusters already triggered are remembered in an LSH index in DynamoDB: one
+item per (symbol, band key) holding a string set of the clusters whose
+headline has that band (added with ADD, so clusters colliding on a band
+don't overwrite each other). Each cluster entry carries its own expiry; the
+item expires (TTL attribute expires_at) with its newest cluster.
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Set
+
+from lambda.utils.aws_clients import batch_get_items, get_table
+from lambda.utils.constants import DYNAMODB_TABLES, NEWS_CLUSTERING
+from lambda.utils.minhash import MinHasher, best_match
+
+_hasher = MinHasher(NEWS_CLUSTERING['num_perm'])
+
+
+class NewsClusterIndex:
+    """Persisted LSH index of triggered news clusters"""
+
+    def __init__(self):
+        self.table_name = DYNAMODB_TABLES['news_clusters']
+        self.table = get_table(self.table_name)
+        self._new_clusters: List[Dict[str, Any]] = []
+
+    def cluster(self, news_items: List[Dict]) -> List[Dict]:
+        """
+        Cluster near-duplicate news and drop clusters triggered earlier
+
+        An item joins a cluster of the same symbol whose first item was
+        published within window_sec and whose headline is similar enough.
+
+        Returns:
+            First (earliest) item of each new cluster, with 'cluster_size'
+            (items of the cluster in this batch)
+        """
+
+        clusters = []
+        clusters_by_key: Dict[str, List[Dict[str, Any]]] = {}
+
+        for item in sorted(news_items, key=lambda news: news.get('datetime', 0)):
+            headline = item.get('headline')
+            if not headline:
+                clusters.append({'items': [item], 'keys': []})
+                continue
+
+            symbol = item.get('symbol') or item.get('related', '')
+            signature = _hasher.signature(headline)
+            keys = [
+                f"{symbol}#{band_key}"
+                for band_key in _hasher.band_keys(signature, NEWS_CLUSTERING['bands'])
+            ]
+
+            candidates = [
+                cluster for key in keys for cluster in clusters_by_key.get(key, [])
+                if item.get('datetime', 0) - cluster['items'][0].get('datetime', 0) <= NEWS_CLUSTERING['window_sec']
+            ]
+            cluster = best_match(candidates, signature, NEWS_CLUSTERING['min_similarity'])
+
+            if cluster is None:
+                cluster = {'items': [], 'keys': keys, 'signature': signature}
+                clusters.append(cluster)
+                for key in keys:
+                    clusters_by_key.setdefault(key, []).append(cluster)
+
+            cluster['items'].append(item)
+
+        known = self._known_clusters([key for cluster in clusters for key in cluster['keys']])
+
+        representatives = []
+        for cluster in clusters:
+            first = cluster['items'][0]
+            earlier = best_match(
+                [entry for key in cluster['keys'] for entry in known.get(key, [])],
+                cluster.get('signature'),
+                NEWS_CLUSTERING['min_similarity']
+            )
+            if earlier is not None:
+                print(f"Suppressed {len(cluster['items'])} near-duplicate(s) of: {earlier['headline']}")
+                continue
+
+            if len(cluster['items']) > 1:
+                print(f"Clustered {len(cluster['items'])} near-duplicates of: {first.get('headline')}")
+
+            first['cluster_size'] = len(cluster['items'])
+            representatives.append(first)
+            if cluster['keys']:
+                self._new_clusters.append(cluster)
+
+        return representatives
+
+    def record(self):
+        """Persist the clusters returned by cluster() (call once they are triggered)"""
+
+        if not self._new_clusters:
+            return
+
+        expires_at = int(time.time()) + NEWS_CLUSTERING['window_sec']
+
+        entries_by_key: Dict[str, Set[str]] = {}
+        for cluster in self._new_clusters:
+            entry = json.dumps({
+                'signature': list(cluster['signature']),
+                'headline': cluster['items'][0].get('headline', ''),
+                'news_id': str(cluster['items'][0].get('id', '')),
+                'expires_at': expires_at
+            }, ensure_ascii=False, separators=(',', ':'))
+            for key in cluster['keys']:
+                entries_by_key.setdefault(key, set()).add(entry)
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(NEWS_CLUSTERING['max_workers'], len(entries_by_key))) as pool:
+                list(pool.map(lambda item: self._add_clusters(*item, expires_at), entries_by_key.items()))
+            self._new_clusters = []
+        except Exception as e:
+            print(f"Error recording news clusters: {e}")
+
+    def _add_clusters(self, key: str, entries: Set[str], expires_at: int):
+        """Add cluster entries to a band item (idempotent, so a failed record() can be retried)"""
+        self.table.meta.client.update_item(
+            TableName=self.table_name,
+            Key={'lsh_key': key},
+            UpdateExpression='ADD #clusters :clusters SET expires_at = :expires_at',
+            ExpressionAttributeNames={'#clusters': 'clusters'},
+            ExpressionAttributeValues={':clusters': entries, ':expires_at': expires_at}
+        )
+
+    def _known_clusters(self, keys: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Unexpired clusters recorded under the keys
+
+        Returns:
+            {lsh_key: [{'signature', 'headline'}]} (empty on error, so news is
+            triggered rather than lost)
+        """
+
+        try:
+            items = batch_get_items(
+                self.table_name,
+                [{'lsh_key': key} for key in dict.fromkeys(keys)],
+                ttl_attribute='expires_at'
+            )
+        except Exception as e:
+            print(f"Error reading news cluster index: {e}")
+            return {}
+
+        now = time.time()
+        known = {}
+        for item in items:
+            entries = [json.loads(entry) for entry in item.get('clusters', [])]
+            known[item['lsh_key']] = [
+                {'signature': entry['signature'], 'headline': entry.get('headline', '')}
+                for entry in entries if entry['expires_at'] > now
+            ]
+
+        return known
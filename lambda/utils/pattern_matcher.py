@@ -0,0 +1,204 @@
+"""
+Lambda Utilities: Pattern Matcher
+
+Local pre-matcher for Phase 0 pattern conditions (patterns_v1.json), e.g.
+"sentiment_score > 0.5", "topic == 'Earnings'", "'beat' in keywords".
+Conditions are compiled once per pattern set and evaluated against features
+computed in the Lambda, so triggers no pattern can match skip Bedrock.
+
+Evaluation is three-valued: a feature that can't be computed here (None) or
+a condition that can't be parsed is "unknown" and never excludes a pattern.
+A pattern is a candidate unless one of its conditions is definitely false.
+"""
+
+import ast
+import operator
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from lambda.utils.keyword_matcher import analyze_news_text
+
+# Condition evaluator: features -> True / False / None (unknown)
+Evaluator = Callable[[Dict[str, Any]], Optional[bool]]
+
+COMPARE_OPS = {
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+
+class PatternMatcher:
+    """Compiled conditions for one pattern set"""
+
+    def __init__(self, patterns: Dict):
+        """
+        Args:
+            patterns: {'patterns': [{'pattern_id', 'conditions': [str], ...}]}
+        """
+        items = patterns.get('patterns', []) if isinstance(patterns, dict) else patterns
+
+        # (pattern, [evaluator]); unparseable conditions are dropped (unknown)
+        self._compiled = []
+        for pattern in items:
+            evaluators = []
+            for condition in pattern.get('conditions', []):
+                evaluator = compile_condition(condition)
+                if evaluator is None:
+                    print(f"Unsupported condition in {pattern.get('pattern_id')}: {condition}")
+                    continue
+                evaluators.append(evaluator)
+            self._compiled.append((pattern, evaluators))
+
+    def candidates(self, features: Dict[str, Any]) -> List[Dict]:
+        """Patterns with no condition evaluating to False"""
+        return [
+            pattern for pattern, evaluators in self._compiled
+            if all(evaluator(features) is not False for evaluator in evaluators)
+        ]
+
+
+def compile_condition(condition: str) -> Optional[Evaluator]:
+    """
+    Compile a condition expression
+
+    Supports comparisons (incl. chained and in/not in) between feature names
+    and literals, combined with and/or/not.
+
+    Returns:
+        Evaluator, or None if the expression is not supported
+    """
+    try:
+        tree = ast.parse(str(condition).strip(), mode='eval')
+        return _compile_node(tree.body)
+    except (SyntaxError, ValueError):
+        return None
+
+
+def _compile_node(node: ast.AST) -> Evaluator:
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_node(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return lambda features: _and(part(features) for part in parts)
+        return lambda features: _or(part(features) for part in parts)
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        inner = _compile_node(node.operand)
+        return lambda features: _not(inner(features))
+
+    if isinstance(node, ast.Compare):
+        operands = [_compile_operand(node.left)] + [_compile_operand(c) for c in node.comparators]
+        ops = []
+        for op in node.ops:
+            if type(op) not in COMPARE_OPS:
+                raise ValueError(f"Unsupported operator: {type(op).__name__}")
+            ops.append(COMPARE_OPS[type(op)])
+
+        def compare(features):
+            values = [operand(features) for operand in operands]
+            if any(value is None for value in values):
+                return None
+            try:
+                return all(op(values[i], values[i + 1]) for i, op in enumerate(ops))
+            except TypeError:
+                return None
+
+        return compare
+
+    raise ValueError(f"Unsupported expression: {type(node).__name__}")
+
+
+def _compile_operand(node: ast.AST) -> Callable[[Dict[str, Any]], Any]:
+    if isinstance(node, ast.Name):
+        return lambda features: features.get(node.id)
+
+    # Literal (number, string, list/tuple of literals, negative numbers)
+    value = ast.literal_eval(node)
+    return lambda features: value
+
+
+def _and(results) -> Optional[bool]:
+    results = list(results)
+    if False in results:
+        return False
+    return None if None in results else True
+
+
+def _or(results) -> Optional[bool]:
+    results = list(results)
+    if True in results:
+        return True
+    return None if None in results else False
+
+
+def _not(result: Optional[bool]) -> Optional[bool]:
+    return None if result is None else not result
+
+
+def extract_trigger_features(detail: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Phase 0 feature names computable from a trigger event
+
+    Sentiment and price-history features (pre_announcement_trend,
+    volatility_5d, volume_spike) need data not available here and are None
+    for news triggers. Triggers without news (volatility) have neutral news
+    features.
+
+    Returns:
+        {
+            'sentiment_score', 'sentiment_label', 'keywords', 'topic',
+            'announcement_time', 'pre_announcement_trend', 'volatility_5d',
+            'volume_spike', 'change_pct', 'cluster_size'
+        }
+    """
+    news = detail.get('news') or {}
+
+    if news:
+        text = str(news.get('headline', '')) + " " + str(news.get('summary', ''))
+        matches = analyze_news_text(text)
+        sentiment_score = None
+        sentiment_label = None
+        announcement_time = _announcement_time(news.get('datetime'))
+    else:
+        matches = {'keywords': [], 'topic': 'Other'}
+        sentiment_score = 0.0
+        sentiment_label = 'Neutral'  # Phase 0 labels: Positive/Negative/Neutral
+        announcement_time = None
+
+    return {
+        'sentiment_score': sentiment_score,
+        'sentiment_label': sentiment_label,
+        'keywords': matches['keywords'],
+        'topic': matches['topic'],
+        'announcement_time': announcement_time,
+        'pre_announcement_trend': None,
+        'volatility_5d': None,
+        'volume_spike': None,
+        'change_pct': detail.get('change_pct'),
+        'cluster_size': news.get('cluster_size', 1) if news else None,
+    }
+
+
+def _announcement_time(timestamp) -> Optional[str]:
+    """Phase 0 announcement timing (ET) for a Finnhub unix timestamp"""
+    try:
+        from zoneinfo import ZoneInfo
+
+        dt = datetime.fromtimestamp(int(timestamp), tz=timezone.utc).astimezone(ZoneInfo('America/New_York'))
+        hour = dt.hour  # Whole hours, as in Phase 0 feature extraction
+
+        if 4 <= hour < 9.5:
+            return "pre_market"
+        elif 9.5 <= hour < 16:
+            return "market_hours"
+        elif 16 <= hour < 20:
+            return "after_market"
+        else:
+            return "other"
+    except Exception:
+        return None
@@ -0,0 +1,307 @@
+"""
+Lambda Utilities: Model Response Parser
+
+Shared parsing of Claude responses for ai_analysis and the Phase 0 pattern
+discovery engines. Structured output is requested with a forced tool call
+(the tool input is the JSON object); plain text responses fall back to a
+tolerant extractor that tries every '{' / '[' in turn, so stray braces in
+surrounding prose don't lose the call. Results are validated against the
+decision and pattern schemas, and calls that yield nothing usable are
+counted per parser (ParseStats).
+
+No package imports: Phase 0 loads this module via importlib.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# Trading decision (ai_analysis realtime prompt). Free-text reasoning is last
+# so streamed decisions are complete before it.
+DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "matched_pattern_id": {"type": "string"},
+        "match_score": {"type": "number", "minimum": 0, "maximum": 100},
+        "action": {"type": "string", "enum": ["Buy", "Sell", "Hold"]},
+        "confidence": {"type": "string", "enum": ["High", "Medium", "Low"]},
+        "entry_price": {"type": "number"},
+        "target_profit": {"type": "number"},
+        "stop_loss": {"type": "number"},
+        "reasoning": {"type": "string"},
+    },
+    "required": ["matched_pattern_id", "match_score", "action", "confidence"],
+}
+
+# Item of a multi-item decision (coalesced triggers)
+DECISION_ITEM_SCHEMA = {
+    **DECISION_SCHEMA,
+    "properties": {**DECISION_SCHEMA["properties"], "item_index": {"type": "integer"}},
+    "required": ["item_index"] + DECISION_SCHEMA["required"],
+}
+
+# Phase 0 pattern (DESIGN_DOC_FINAL.md Section 5.3)
+PATTERN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "pattern_id": {"type": "string"},
+        "name": {"type": "string"},
+        "conditions": {"type": "array", "items": {"type": "string"}},
+        "prediction": {
+            "type": "object",
+            "properties": {
+                "direction": {"type": "string", "enum": ["Up", "Down", "Hold"]},
+                "magnitude": {"type": "string"},
+                "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+            },
+            "required": ["direction", "confidence"],
+        },
+        "sample_size": {"type": "integer"},
+        "hypothesis": {"type": "string"},
+    },
+    "required": ["pattern_id", "conditions", "prediction"],
+}
+
+# Phase 0 raw-text pattern (DESIGN_DOC_FINAL.md Section 5.11)
+RAW_PATTERN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "pattern_id": {"type": "string"},
+        "discovered_feature": {"type": "string"},
+        "correlation": {"type": "string"},
+        "sample_size": {"type": "integer"},
+        "hypothesis": {"type": "string"},
+    },
+    "required": ["pattern_id", "discovered_feature", "correlation"],
+}
+
+
+def list_schema(key: str, item_schema: Optional[Dict] = None) -> Dict:
+    """
+    {key: [...]} wrapper
+
+    Use the full item schema for tool definitions and the default (any
+    object) when parsing, then valid_items() so one bad item doesn't
+    discard the rest.
+    """
+    return {
+        "type": "object",
+        "properties": {key: {"type": "array", "items": item_schema or {"type": "object"}}},
+        "required": [key],
+    }
+
+
+class ParseStats:
+    """Parse outcomes for one kind of model call"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.failures = 0
+
+    def record(self, success: bool):
+        self.calls += 1
+        if not success:
+            self.failures += 1
+
+    @property
+    def successes(self) -> int:
+        return self.calls - self.failures
+
+    @property
+    def wasted_per_success(self) -> float:
+        """Failed (wasted) calls per successfully parsed call"""
+        if self.successes == 0:
+            return float(self.failures)
+        return self.failures / self.successes
+
+    def summary(self) -> str:
+        return (f"{self.name}: {self.successes}/{self.calls} parsed, "
+                f"{self.wasted_per_success:.2f} wasted calls per success")
+
+
+# Per-process stats (per container in Lambda)
+_stats: Dict[str, ParseStats] = {}
+
+
+def get_stats(name: str) -> ParseStats:
+    if name not in _stats:
+        _stats[name] = ParseStats(name)
+    return _stats[name]
+
+
+def make_tool(name: str, description: str, schema: Dict) -> Dict:
+    """Tool definition whose input is the structured result (use with a forced tool_choice)"""
+    return {"name": name, "description": description, "input_schema": schema}
+
+
+def tool_choice(tool: Dict) -> Dict:
+    return {"type": "tool", "name": tool["name"]}
+
+
+def parse_model_response(
+    content: Any,
+    schema: Dict,
+    tool_name: Optional[str] = None,
+    stats: Optional[ParseStats] = None
+) -> Optional[Any]:
+    """
+    Structured result from a Messages API response
+
+    Args:
+        content: Response content blocks (Bedrock dicts or SDK objects) or text
+        schema: Expected schema of the result
+        tool_name: Tool whose input holds the result, if a tool was forced
+        stats: Records success/failure of this call
+
+    Returns:
+        The first value matching schema, or None
+    """
+    value = None
+
+    if isinstance(content, str):
+        text = content
+    else:
+        text_parts = []
+        for block in content or []:
+            block_type = _field(block, 'type')
+            if block_type == 'tool_use' and (tool_name is None or _field(block, 'name') == tool_name):
+                tool_input = _field(block, 'input')
+                if not validate(tool_input, schema):
+                    value = tool_input
+                    break
+                print(f"Tool input failed validation: {validate(tool_input, schema)[:5]}")
+            elif block_type == 'text':
+                text_parts.append(_field(block, 'text') or '')
+        text = ''.join(text_parts)
+
+    if value is None and text:
+        value = extract_json(text, schema)
+
+    if value is None:
+        print(f"No valid JSON in model response: {text[:200]!r}")
+
+    if stats is not None:
+        stats.record(value is not None)
+
+    return value
+
+
+def extract_json(text: str, schema: Optional[Dict] = None) -> Optional[Any]:
+    """
+    First JSON object/array in text (that matches schema, if given)
+
+    Tries to decode at every '{' / '[' left to right, so prose, code fences
+    and stray braces around the JSON are skipped.
+    """
+    decoder = json.JSONDecoder()
+    position = 0
+
+    while True:
+        starts = [index for index in (text.find('{', position), text.find('[', position)) if index >= 0]
+        if not starts:
+            return None
+        start = min(starts)
+
+        try:
+            value, _ = decoder.raw_decode(text, start)
+            if schema is None or not validate(value, schema):
+                return value
+        except ValueError:
+            pass
+
+        position = start + 1
+
+
+def partial_fields(text: str, fields: List[str]) -> Dict[str, Any]:
+    """
+    Scalar fields already complete in a partial (streamed) JSON object
+
+    A string counts once its closing quote has arrived, a number once a
+    delimiter follows it.
+
+    Returns:
+        {field: value} for the fields found
+    """
+    found = {}
+    for field in fields:
+        match = re.search(
+            r'(?<!\\)"' + re.escape(field) + r'"\s*:\s*'
+            r'("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?(?=\s*[,}\]]))',
+            text
+        )
+        if match:
+            found[field] = json.loads(match.group(1))
+    return found
+
+
+def validate(value: Any, schema: Dict, path: str = '$') -> List[str]:
+    """
+    Validate against a JSON Schema subset (type, enum, minimum/maximum,
+    required, properties, items)
+
+    Returns:
+        Error messages (empty if valid)
+    """
+    errors = []
+    expected = schema.get('type')
+
+    if expected and not _is_type(value, expected):
+        return [f"{path}: expected {expected}, got {type(value).__name__}"]
+
+    if 'enum' in schema and value not in schema['enum']:
+        errors.append(f"{path}: {value!r} not in {schema['enum']}")
+
+    if 'minimum' in schema and _is_type(value, 'number') and value < schema['minimum']:
+        errors.append(f"{path}: {value} < {schema['minimum']}")
+    if 'maximum' in schema and _is_type(value, 'number') and value > schema['maximum']:
+        errors.append(f"{path}: {value} > {schema['maximum']}")
+
+    if isinstance(value, dict):
+        for field in schema.get('required', []):
+            if field not in value:
+                errors.append(f"{path}: missing '{field}'")
+        for field, field_schema in schema.get('properties', {}).items():
+            if field in value:
+                errors.extend(validate(value[field], field_schema, f"{path}.{field}"))
+
+    if isinstance(value, list) and 'items' in schema:
+        for index, item in enumerate(value):
+            errors.extend(validate(item, schema['items'], f"{path}[{index}]"))
+
+    return errors
+
+
+def valid_items(items: List[Any], schema: Dict, label: str = 'item') -> List[Any]:
+    """Items matching schema; invalid ones are logged and dropped"""
+    valid = []
+    for index, item in enumerate(items):
+        errors = validate(item, schema)
+        if errors:
+            print(f"Dropping invalid {label} {index}: {errors[:3]}")
+            continue
+        valid.append(item)
+    return valid
+
+
+def _is_type(value: Any, expected: str) -> bool:
+    if expected == 'object':
+        return isinstance(value, dict)
+    if expected == 'array':
+        return isinstance(value, list)
+    if expected == 'string':
+        return isinstance(value, str)
+    if expected == 'boolean':
+        return isinstance(value, bool)
+    if expected == 'integer':
+        return isinstance(value, int) and not isinstance(value, bool)
+    if expected == 'number':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return True
+
+
+def _field(block: Any, key: str) -> Any:
+    """Content block field (dict from Bedrock JSON, attribute on SDK objects)"""
+    if isinstance(block, dict):
+        return block.get(key)
+    return getattr(block, key, None)
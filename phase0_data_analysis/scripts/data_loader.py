@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Phase 0: Streaming Dataset Loader
+
+Reads the news and price datasets in chunks with compact dtypes, keeping only
+the target symbols and date range while reading, so the full Kaggle dumps
+never have to fit in memory at once.
+
+Each dataset is read from a Parquet store (data/parquet/<name>, partitioned by
+symbol and year, see convert_dataset) when one exists, otherwise from the CSV.
+The Parquet path prunes columns and pushes symbol/date filters down to the
+partitions and row groups.
+
+iter_news_batches() streams news batches together with the price window each
+batch needs, so feature extraction never holds more than one batch.
+"""
+
+import importlib
+import shutil
+import sys
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+# `lambda` is a Python keyword, so the shared constants can't be imported with
+# a plain import statement
+SYMBOLS = importlib.import_module("lambda.utils.constants").SYMBOLS
+
+DEFAULT_CHUNKSIZE = 500_000
+
+PRICE_COLUMNS = ['date', 'symbol', 'open', 'high', 'low', 'close', 'volume']
+PRICE_DTYPES = {
+    'symbol': 'string',
+    'open': 'float32',
+    'high': 'float32',
+    'low': 'float32',
+    'close': 'float32',
+    'volume': 'float64',
+}
+
+# timestamp (announcement time) is optional; kept when the source has it
+NEWS_COLUMNS = ['date', 'symbol', 'headline', 'content', 'timestamp']
+NEWS_DTYPES = {
+    'symbol': 'string',
+    'headline': 'string',
+    'content': 'string',
+    'timestamp': 'string',
+}
+
+# Rows parsed per news batch in iter_news_batches (feature extraction batch)
+NEWS_BATCH_SIZE = 10_000
+
+# Calendar-day padding around the news date range when loading prices
+# (extract_stock_features needs 5 prior sessions, price change needs the next one)
+PRICE_LOOKBACK_DAYS = 14
+PRICE_LOOKAHEAD_DAYS = 7
+
+# Dataset name -> (columns, dtypes); CSV is data/<name>.csv
+DATASETS = {
+    'news': (NEWS_COLUMNS, NEWS_DTYPES),
+    'stock_prices': (PRICE_COLUMNS, PRICE_DTYPES),
+}
+
+PARQUET_DIR = "parquet"
+PARTITION_COLUMNS = ['symbol', 'year']
+
+DateLike = Union[str, pd.Timestamp, None]
+
+
+def dataset_path(data_dir: Union[str, Path], name: str) -> Path:
+    """Parquet store for a dataset if it has been converted, otherwise its CSV"""
+    parquet_dir = Path(data_dir) / PARQUET_DIR / name
+    if parquet_dir.is_dir():
+        return parquet_dir
+    return Path(data_dir) / f"{name}.csv"
+
+
+def iter_price_chunks(
+    path: Union[str, Path],
+    symbols: Optional[List[str]] = None,
+    start: DateLike = None,
+    end: DateLike = None,
+    chunksize: int = DEFAULT_CHUNKSIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream filtered price chunks
+
+    Args:
+        path: Price CSV or Parquet store with columns: date, symbol, open, high, low, close, volume
+        symbols: Symbols to keep (defaults to constants.SYMBOLS)
+        start, end: Inclusive date range to keep (None = unbounded)
+        chunksize: Rows parsed per chunk
+
+    Yields:
+        DataFrames with categorical symbol, float32 OHLC, datetime64 date
+    """
+    yield from _iter_filtered(path, PRICE_COLUMNS, PRICE_DTYPES, symbols, start, end, chunksize)
+
+
+def iter_news_chunks(
+    path: Union[str, Path],
+    symbols: Optional[List[str]] = None,
+    start: DateLike = None,
+    end: DateLike = None,
+    chunksize: int = DEFAULT_CHUNKSIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream filtered news chunks (batches for feature extraction)
+
+    Args:
+        path: News CSV or Parquet store with columns: date, symbol, headline,
+            content (and optionally timestamp)
+        symbols: Symbols to keep (defaults to constants.SYMBOLS)
+        start, end: Inclusive date range to keep (None = unbounded)
+        chunksize: Rows parsed per chunk
+
+    Yields:
+        DataFrames with categorical symbol and datetime64 date
+    """
+    yield from _iter_filtered(path, NEWS_COLUMNS, NEWS_DTYPES, symbols, start, end, chunksize)
+
+
+def iter_news_batches(
+    news_path: Union[str, Path],
+    prices_path: Union[str, Path],
+    symbols: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+    batch_size: int = NEWS_BATCH_SIZE
+) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Stream news batches, each with the prices its features need
+
+    Prices are read per batch for the batch's padded date range
+    (price_range_for_news); on a Parquet store that read is pruned to the
+    matching partitions.
+
+    Args:
+        max_rows: Stop after this many news rows in total (None = all)
+        batch_size: News rows parsed per batch
+
+    Yields:
+        (news batch, prices for the batch's symbols and date range)
+    """
+    symbols = list(symbols) if symbols is not None else SYMBOLS
+    rows = 0
+
+    if max_rows is not None and max_rows <= 0:
+        return
+
+    for news_batch in iter_news_chunks(news_path, symbols, chunksize=batch_size):
+        if max_rows is not None:
+            news_batch = news_batch.head(max_rows - rows)
+
+        price_start, price_end = price_range_for_news(news_batch)
+        present = set(news_batch['symbol'].dropna().astype(str))
+        prices_df = load_prices(
+            prices_path, [symbol for symbol in symbols if symbol in present], price_start, price_end
+        )
+
+        yield news_batch, prices_df
+
+        rows += len(news_batch)
+        if max_rows is not None and rows >= max_rows:
+            break
+
+
+def load_prices(
+    path: Union[str, Path],
+    symbols: Optional[List[str]] = None,
+    start: DateLike = None,
+    end: DateLike = None,
+    chunksize: int = DEFAULT_CHUNKSIZE
+) -> pd.DataFrame:
+    """Load filtered prices into one compact DataFrame"""
+    chunks = list(iter_price_chunks(path, symbols, start, end, chunksize))
+    return _concat(chunks, PRICE_COLUMNS)
+
+
+def load_news(
+    path: Union[str, Path],
+    symbols: Optional[List[str]] = None,
+    start: DateLike = None,
+    end: DateLike = None,
+    max_rows: Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE
+) -> pd.DataFrame:
+    """
+    Load filtered news into one DataFrame
+
+    Stops reading the file once max_rows matching rows have been collected.
+    """
+    chunks = []
+    rows = 0
+
+    for chunk in iter_news_chunks(path, symbols, start, end, chunksize):
+        chunks.append(chunk)
+        rows += len(chunk)
+        if max_rows is not None and rows >= max_rows:
+            break
+
+    news_df = _concat(chunks, NEWS_COLUMNS)
+    return news_df.head(max_rows) if max_rows is not None else news_df
+
+
+def price_range_for_news(news_df: pd.DataFrame) -> Tuple[DateLike, DateLike]:
+    """Date range of prices needed to build features for news_df"""
+    dates = news_df['date'].dropna()
+    if dates.empty:
+        return None, None
+
+    start = dates.min().normalize() - pd.Timedelta(days=PRICE_LOOKBACK_DAYS)
+    end = dates.max().normalize() + pd.Timedelta(days=PRICE_LOOKAHEAD_DAYS)
+    return start, end
+
+
+def convert_dataset(
+    data_dir: Union[str, Path],
+    name: str,
+    chunksize: int = DEFAULT_CHUNKSIZE
+) -> int:
+    """
+    Convert data/<name>.csv to a Parquet store partitioned by symbol and year
+
+    All symbols are kept; filtering happens at read time. The store is built
+    in a temporary directory and replaces an existing store only once every
+    chunk has been written, so a failed conversion never leaves a partial
+    store for dataset_path() to pick up.
+
+    Returns:
+        Number of rows written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns, dtypes = DATASETS[name]
+    csv_path = Path(data_dir) / f"{name}.csv"
+    dataset_dir = Path(data_dir) / PARQUET_DIR / name
+    tmp_dir = dataset_dir.with_name(f".{name}.tmp")
+
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+
+    rows = 0
+    try:
+        for n, chunk in enumerate(_read_csv_chunks(csv_path, columns, dtypes, chunksize)):
+            chunk = chunk.dropna(subset=['symbol', 'date'])
+            chunk = chunk.assign(year=chunk['date'].dt.year.astype('int32'))
+
+            # Contiguous partitions: each partition's file is written in one go
+            chunk = chunk.sort_values(PARTITION_COLUMNS, kind='stable')
+            partitions = len(chunk[PARTITION_COLUMNS].drop_duplicates())
+
+            pq.write_to_dataset(
+                pa.Table.from_pandas(chunk, preserve_index=False),
+                root_path=str(tmp_dir),
+                partition_cols=PARTITION_COLUMNS,
+                basename_template=f"chunk{n}-{{i}}.parquet",
+                # Default limit (1024) is below the ticker count of full dumps
+                max_partitions=max(partitions, 1024)
+            )
+            rows += len(chunk)
+
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if dataset_dir.exists():
+        shutil.rmtree(dataset_dir)
+    if tmp_dir.exists():
+        tmp_dir.rename(dataset_dir)
+
+    return rows
+
+
+def _iter_filtered(
+    path: Union[str, Path],
+    columns: List[str],
+    dtypes: dict,
+    symbols: Optional[List[str]],
+    start: DateLike,
+    end: DateLike,
+    chunksize: int
+) -> Iterator[pd.DataFrame]:
+    """Chunked read with symbol/date filtering applied per chunk"""
+    symbols = list(symbols) if symbols is not None else SYMBOLS
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    if Path(path).is_dir():
+        chunks = _read_parquet_chunks(path, columns, symbols, start, end, chunksize)
+    else:
+        chunks = _read_csv_chunks(path, columns, dtypes, chunksize)
+
+    for chunk in chunks:
+        chunk = chunk[chunk['symbol'].isin(symbols)]
+
+        if start is not None:
+            chunk = chunk[chunk['date'] >= start]
+        if end is not None:
+            chunk = chunk[chunk['date'] <= end]
+
+        if chunk.empty:
+            continue
+
+        # Fixed categories so chunks concatenate without falling back to object
+        chunk = chunk.assign(symbol=pd.Categorical(chunk['symbol'].astype(str), categories=symbols))
+
+        yield chunk
+
+
+def _read_csv_chunks(
+    path: Union[str, Path],
+    columns: List[str],
+    dtypes: dict,
+    chunksize: int
+) -> Iterator[pd.DataFrame]:
+    """Chunked read_csv with compact dtypes and parsed dates"""
+    reader = pd.read_csv(
+        path,
+        usecols=lambda col: col in columns,
+        dtype=dtypes,
+        chunksize=chunksize
+    )
+
+    for chunk in reader:
+        dates = pd.to_datetime(chunk['date'], errors='coerce')
+        if getattr(dates.dt, 'tz', None) is not None:
+            # Keep exchange-local wall clock time, comparable with naive dates
+            dates = dates.dt.tz_localize(None)
+
+        yield chunk.assign(date=dates)
+
+
+def _read_parquet_chunks(
+    path: Union[str, Path],
+    columns: List[str],
+    symbols: List[str],
+    start: Optional[pd.Timestamp],
+    end: Optional[pd.Timestamp],
+    chunksize: int
+) -> Iterator[pd.DataFrame]:
+    """Scan a partitioned Parquet store with column pruning and filter pushdown"""
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(str(path), format='parquet', partitioning='hive')
+
+    expression = ds.field('symbol').isin(symbols)
+    if start is not None:
+        expression &= (ds.field('year') >= start.year) & (ds.field('date') >= start.to_pydatetime())
+    if end is not None:
+        expression &= (ds.field('year') <= end.year) & (ds.field('date') <= end.to_pydatetime())
+
+    scanner = dataset.scanner(
+        columns=[col for col in columns if col in dataset.schema.names],
+        filter=expression,
+        batch_size=chunksize
+    )
+
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _concat(chunks: List[pd.DataFrame], columns: List[str]) -> pd.DataFrame:
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(chunks, ignore_index=True)
@@ -2,8 +2,13 @@
 """
 Phase 0: Download Kaggle datasets for pattern discovery
 
-This script downloads financial news and stock price datasets from Kaggle.
+This script downloads financial news and stock price datasets from Kaggle,
+then converts them to a Parquet store partitioned by symbol and year.
 Requires: kaggle API credentials in ~/.kaggle/kaggle.json
+
+Usage:
+    python download_kaggle_data.py                 # download + convert
+    python download_kaggle_data.py --convert-only  # convert existing CSVs
 """
 
 import os
@@ -15,9 +20,13 @@ from dotenv import load_dotenv
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from phase0_data_analysis.scripts.data_loader import DATASETS, PARQUET_DIR, convert_dataset
+
 # Load environment variables
 load_dotenv(project_root / ".env")
 
+DATA_DIR = Path(__file__).parent.parent / "data"
+
 
 def download_datasets():
     """Download datasets from Kaggle"""
@@ -30,7 +39,7 @@ def download_datasets():
         print("Get your API key from: https://www.kaggle.com/account")
         sys.exit(1)
 
-    data_dir = Path(__file__).parent.parent / "data"
+    data_dir = DATA_DIR
     data_dir.mkdir(exist_ok=True)
 
     print("=== Downloading Kaggle Datasets ===\n")
@@ -78,6 +87,8 @@ def download_datasets():
 
         print("\n=== Download Complete ===")
         print(f"Data saved to: {data_dir}")
+
+        convert_to_parquet(data_dir)
         print("\nNext steps:")
         print("  1. Inspect downloaded files: ls phase0_data_analysis/data/")
         print("  2. Run analysis: make phase0-analyze")
@@ -91,5 +102,26 @@ def download_datasets():
         sys.exit(1)
 
 
+def convert_to_parquet(data_dir: Path = DATA_DIR):
+    """Convert downloaded CSVs to a Parquet store partitioned by symbol/year"""
+
+    print("\n=== Converting to Parquet ===\n")
+
+    for name in DATASETS:
+        csv_path = data_dir / f"{name}.csv"
+        if not csv_path.exists():
+            print(f"  - {csv_path.name}: not found, skipped")
+            continue
+
+        try:
+            rows = convert_dataset(data_dir, name)
+            print(f"  ✓ {csv_path.name}: {rows} rows -> {PARQUET_DIR}/{name}/")
+        except Exception as e:
+            print(f"  ✗ {csv_path.name}: {str(e)}")
+
+
 if __name__ == "__main__":
-    download_datasets()
+    if "--convert-only" in sys.argv:
+        convert_to_parquet()
+    else:
+        download_datasets()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Phase 0: Persistent Feature Cache
+
+Content-addressed on-disk cache (SQLite) for NLP features, so re-runs of
+the Phase 0 scripts do not re-score the same headlines.
+Keys are a hash of the scored text plus the extractor version.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple, Union
+
+# Default on-disk location (under data/, next to the datasets)
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / "data" / "cache" / "features.sqlite"
+
+# SQLite bound-parameter limit is 999 on older builds
+_SQL_BATCH = 500
+
+
+class FeatureCache:
+    """Size-bounded key/value cache of JSON feature dicts backed by SQLite"""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CACHE_PATH, max_entries: int = 1_000_000):
+        """
+        Args:
+            path: SQLite file path (parent directories are created)
+            max_entries: Least recently used entries beyond this are evicted
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS features ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON features (accessed)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(text: str, version: str) -> str:
+        """Content address for a text scored by a given extractor version"""
+        return hashlib.sha256(f"{version}\0{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Bulk lookup
+
+        Returns:
+            {key: value} for the keys present in the cache
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+
+        for start in range(0, len(keys), _SQL_BATCH):
+            batch = keys[start:start + _SQL_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f"SELECT key, value FROM features WHERE key IN ({placeholders})",
+                batch
+            ).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+
+        if found:
+            # Touch hits so eviction drops the least recently used entries
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE features SET accessed = ? WHERE key = ?",
+                [(now, key) for key in found]
+            )
+            self.conn.commit()
+
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        """Bulk insert/replace, then evict down to max_entries"""
+        now = time.time()
+        rows = [(key, json.dumps(value), now) for key, value in items]
+        if not rows:
+            return
+
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO features (key, value, accessed) VALUES (?, ?, ?)",
+            rows
+        )
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries beyond max_entries"""
+        count = self.conn.execute("SELECT COUNT(*) FROM features").fetchone()[0]
+        excess = count - self.max_entries
+
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM features WHERE key IN ("
+                " SELECT key FROM features ORDER BY accessed LIMIT ?)",
+                (excess,)
+            )
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM features").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
@@ -11,10 +11,12 @@ Extracts features from news data:
 Based on DESIGN_DOC_FINAL.md Section 5.2
 """
 
+import importlib
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple, Union
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -30,11 +32,30 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from phase0_data_analysis.scripts.feature_cache import FeatureCache
+from phase0_data_analysis.scripts.price_index import PriceIndex
+
+# Keyword matcher shared with the news_fetch Lambda (`lambda` is a Python
+# keyword, so it can't be imported with a plain import statement)
+keyword_matcher = importlib.import_module("lambda.utils.keyword_matcher")
+
 
 class NewsFeatureExtractor:
     """Extract features from financial news"""
 
-    def __init__(self):
+    # Financial domain / topic keywords (shared with news_fetch)
+    FINANCIAL_KEYWORDS = keyword_matcher.FINANCIAL_KEYWORDS
+    TOPIC_KEYWORDS = keyword_matcher.TOPIC_KEYWORDS
+
+    # Bump when scoring logic changes so cached features are not reused
+    EXTRACTOR_VERSION = "1"
+
+    def __init__(self, cache: Optional[FeatureCache] = None):
+        """
+        Args:
+            cache: Optional persistent cache consulted before sentiment scoring
+        """
+        self.cache = cache
         self.vader = SentimentIntensityAnalyzer()
         self.tfidf = TfidfVectorizer(max_features=50, stop_words='english')
 
@@ -87,20 +108,9 @@ class NewsFeatureExtractor:
 
     def extract_keywords(self, text: str, top_n: int = 5) -> List[str]:
         """
-        Extract top keywords from text using TF-IDF
+        Extract financial keywords found in text (FINANCIAL_KEYWORDS order, max top_n)
         """
-        # Financial domain keywords (hardcoded)
-        financial_keywords = [
-            'beat', 'miss', 'expectations', 'earnings', 'revenue',
-            'guidance', 'raised', 'lowered', 'upgrade', 'downgrade',
-            'acquisition', 'merger', 'partnership', 'lawsuit', 'regulation',
-            'product', 'launch', 'delay', 'recall', 'innovation'
-        ]
-
-        text_lower = text.lower()
-        found_keywords = [kw for kw in financial_keywords if kw in text_lower]
-
-        return found_keywords[:top_n]
+        return keyword_matcher.analyze_news_text(text, top_n)['keywords']
 
     def classify_topic(self, text: str) -> str:
         """
@@ -113,18 +123,7 @@ class NewsFeatureExtractor:
         - Legal
         - Other
         """
-        text_lower = text.lower()
-
-        if any(kw in text_lower for kw in ['earnings', 'revenue', 'profit', 'eps', 'beat', 'miss']):
-            return "Earnings"
-        elif any(kw in text_lower for kw in ['acquisition', 'merger', 'acquire', 'buyout']):
-            return "M&A"
-        elif any(kw in text_lower for kw in ['product', 'launch', 'release', 'innovation']):
-            return "Product"
-        elif any(kw in text_lower for kw in ['lawsuit', 'regulation', 'investigation', 'legal']):
-            return "Legal"
-        else:
-            return "Other"
+        return keyword_matcher.analyze_news_text(text)['topic']
 
     def get_announcement_time(self, timestamp: str) -> str:
         """
@@ -163,25 +162,149 @@ class NewsFeatureExtractor:
         text = str(news_row.get('headline', '')) + " " + str(news_row.get('content', ''))
 
         sentiment = self.extract_sentiment(text)
-        keywords = self.extract_keywords(text)
-        topic = self.classify_topic(text)
+        matches = keyword_matcher.analyze_news_text(text)
         timing = self.get_announcement_time(news_row.get('timestamp', ''))
 
         return {
             'sentiment_score': sentiment['sentiment_score'],
             'sentiment_label': sentiment['sentiment_label'],
-            'keywords': keywords,
-            'topic': topic,
+            'keywords': matches['keywords'],
+            'topic': matches['topic'],
             'announcement_time': timing
         }
 
+    def extract_features_batch(self, news_df: pd.DataFrame, workers: int = 1) -> pd.DataFrame:
+        """
+        Extract all features from a news DataFrame in one pass
+
+        Columnar counterpart of extract_all_features(). Keywords and topic come
+        from one Aho-Corasick pass per distinct text (shared keyword matcher),
+        announcement timing is computed once per distinct timestamp.
+
+        Args:
+            news_df: DataFrame with columns: headline, content, timestamp
+            workers: Number of processes. >1 shards sentiment scoring across
+                a process pool (one extractor per worker process)
+
+        Returns:
+            DataFrame (same index as news_df) with columns:
+            sentiment_score, sentiment_label, keywords, topic, announcement_time
+        """
+        texts = self._combined_text(news_df)
+
+        sentiments = self._score_sentiment_batch(texts.tolist(), workers=workers)
+
+        features = pd.DataFrame(index=news_df.index)
+        features['sentiment_score'] = [s['sentiment_score'] for s in sentiments]
+        features['sentiment_label'] = [s['sentiment_label'] for s in sentiments]
+        features['keywords'], features['topic'] = self._match_keywords_batch(texts)
+        features['announcement_time'] = self._announcement_time_batch(
+            news_df['timestamp'] if 'timestamp' in news_df else pd.Series('', index=news_df.index)
+        )
+
+        return features
 
-def extract_stock_features(prices_df: pd.DataFrame, symbol: str, date: str) -> Dict[str, float]:
+    @staticmethod
+    def _combined_text(news_df: pd.DataFrame) -> pd.Series:
+        """headline + " " + content for every row"""
+        empty = pd.Series('', index=news_df.index)
+        headline = news_df['headline'] if 'headline' in news_df else empty
+        content = news_df['content'] if 'content' in news_df else empty
+        return headline.fillna('').astype(str) + " " + content.fillna('').astype(str)
+
+    def _score_sentiment_batch(self, texts: List[str], workers: int = 1) -> List[Dict[str, float]]:
+        """
+        Sentiment for each text (VADER/TextBlob have no vectorized API)
+
+        Only texts missing from the cache are scored, each unique text once.
+        """
+        if self.cache is None:
+            return self._score_texts(texts, workers)
+
+        keys = [FeatureCache.make_key(text, self.EXTRACTOR_VERSION) for text in texts]
+        results = self.cache.get_many(keys)
+
+        misses = {key: text for key, text in zip(keys, texts) if key not in results}
+        if misses:
+            scored = self._score_texts(list(misses.values()), workers)
+            new_entries = dict(zip(misses.keys(), scored))
+            self.cache.put_many(new_entries.items())
+            results.update(new_entries)
+
+        return [results[key] for key in keys]
+
+    def _score_texts(self, texts: List[str], workers: int) -> List[Dict[str, float]]:
+        """Score texts in-process or across a process pool"""
+        if workers > 1 and len(texts) > 1:
+            return _score_sentiment_parallel(texts, workers)
+        return [self.extract_sentiment(text) for text in texts]
+
+    @staticmethod
+    def _match_keywords_batch(texts: pd.Series, top_n: int = 5) -> Tuple[List[List[str]], List[str]]:
+        """Keywords and topic per text: one matcher pass per distinct text"""
+        codes, uniques = pd.factorize(texts, use_na_sentinel=False)
+        matches = [keyword_matcher.analyze_news_text(text, top_n) for text in uniques]
+
+        return (
+            [list(matches[code]['keywords']) for code in codes],
+            [matches[code]['topic'] for code in codes]
+        )
+
+    def _announcement_time_batch(self, timestamps: pd.Series) -> np.ndarray:
+        """
+        Batch get_announcement_time(): each distinct timestamp is classified
+        once with the scalar rule, so mixed formats and empty values get the
+        same label as in extract_all_features()
+        """
+        codes, uniques = pd.factorize(timestamps, use_na_sentinel=False)
+        labels = np.array([self.get_announcement_time(value) for value in uniques], dtype=object)
+
+        return labels[codes]
+
+
+# Per-process extractor for the worker pool (NLTK data loads once per process)
+_worker_extractor = None
+
+# Shards per worker; >1 evens out uneven text lengths across processes
+SHARDS_PER_WORKER = 4
+
+
+def _init_worker():
+    """ProcessPoolExecutor initializer: build this process's extractor"""
+    global _worker_extractor
+    _worker_extractor = NewsFeatureExtractor()
+
+
+def _score_shard(texts: List[str]) -> List[Dict[str, float]]:
+    """Score one shard of texts inside a worker process"""
+    return [_worker_extractor.extract_sentiment(text) for text in texts]
+
+
+def _score_sentiment_parallel(texts: List[str], workers: int) -> List[Dict[str, float]]:
+    """
+    Shard texts across a process pool and reassemble in original order
+    """
+    workers = min(workers, len(texts))
+    num_shards = min(workers * SHARDS_PER_WORKER, len(texts))
+    bounds = np.linspace(0, len(texts), num_shards + 1, dtype=int)
+    shards = [texts[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        # map() yields results in submission order
+        results = pool.map(_score_shard, shards)
+        return [sentiment for shard in results for sentiment in shard]
+
+
+def extract_stock_features(
+    prices: Union[pd.DataFrame, PriceIndex],
+    symbol: str,
+    date: str
+) -> Dict[str, float]:
     """
     Extract stock price features
 
     Args:
-        prices_df: DataFrame with OHLCV data
+        prices: PriceIndex (preferred) or DataFrame with OHLCV data
         symbol: Stock symbol
         date: Target date
 
@@ -193,39 +316,35 @@ def extract_stock_features(prices_df: pd.DataFrame, symbol: str, date: str) -> D
         }
     """
     try:
-        target_date = pd.to_datetime(date)
-
-        # Filter for symbol
-        symbol_data = prices_df[prices_df['symbol'] == symbol].copy()
-        symbol_data['date'] = pd.to_datetime(symbol_data['date'])
-        symbol_data = symbol_data.sort_values('date')
+        price_index = PriceIndex.from_prices(prices)
 
         # Get 5 days before target date
-        mask = symbol_data['date'] < target_date
-        recent = symbol_data[mask].tail(5)
+        recent = price_index.history_before(symbol, date, 5)
 
-        if len(recent) < 5:
+        if recent is None or len(recent[0]) < 5:
             return {
                 'pre_announcement_trend': 0.0,
                 'volatility_5d': 0.0,
                 'volume_spike': 1.0
             }
 
+        closes, volumes = recent
+
         # Calculate features
-        first_close = recent.iloc[0]['close']
-        last_close = recent.iloc[-1]['close']
+        first_close = closes[0]
+        last_close = closes[-1]
         trend = ((last_close - first_close) / first_close) * 100
 
-        volatility = recent['close'].std()
+        volatility = np.nanstd(closes, ddof=1)
 
-        last_volume = recent.iloc[-1]['volume']
-        prev_volume = recent.iloc[-2]['volume']
+        last_volume = volumes[-1]
+        prev_volume = volumes[-2]
         volume_ratio = last_volume / prev_volume if prev_volume > 0 else 1.0
 
         return {
-            'pre_announcement_trend': round(trend, 2),
-            'volatility_5d': round(volatility, 2),
-            'volume_spike': round(volume_ratio, 2)
+            'pre_announcement_trend': round(float(trend), 2),
+            'volatility_5d': round(float(volatility), 2),
+            'volume_spike': round(float(volume_ratio), 2)
         }
 
     except Exception as e:
@@ -6,11 +6,12 @@ Uses Claude API to discover "golden patterns" from historical data.
 Based on DESIGN_DOC_FINAL.md Section 5.3
 """
 
+import importlib
 import os
 import sys
 import json
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union
 import pandas as pd
 from dotenv import load_dotenv
 from anthropic import Anthropic
@@ -20,6 +21,14 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from phase0_data_analysis.scripts.feature_extraction import NewsFeatureExtractor, extract_stock_features
+from phase0_data_analysis.scripts.feature_cache import FeatureCache, DEFAULT_CACHE_PATH
+from phase0_data_analysis.scripts.data_loader import (
+    SYMBOLS, dataset_path, iter_news_batches
+)
+from phase0_data_analysis.scripts.price_index import PriceIndex
+
+# Shared with ai_analysis (`lambda` is a Python keyword, hence importlib)
+response_parser = importlib.import_module("lambda.utils.response_parser")
 
 # Load environment variables
 load_dotenv(project_root / ".env")
@@ -34,21 +43,27 @@ class PatternDiscoveryEngine:
             raise ValueError("ANTHROPIC_API_KEY not found in .env file")
 
         self.client = Anthropic(api_key=api_key)
-        self.feature_extractor = NewsFeatureExtractor()
+
+        # Persistent sentiment cache (set PHASE0_FEATURE_CACHE="" to disable)
+        cache_path = os.getenv("PHASE0_FEATURE_CACHE", str(DEFAULT_CACHE_PATH))
+        cache = FeatureCache(cache_path) if cache_path else None
+        self.feature_extractor = NewsFeatureExtractor(cache=cache)
 
     def prepare_training_data(
         self,
         news_df: pd.DataFrame,
-        prices_df: pd.DataFrame,
-        max_samples: int = 500
+        prices: Union[pd.DataFrame, PriceIndex],
+        max_samples: int = 500,
+        workers: int = 1
     ) -> List[Dict[str, Any]]:
         """
         Prepare training data with features
 
         Args:
             news_df: News data with columns: date, headline, content, symbol
-            prices_df: Price data with columns: date, symbol, open, high, low, close, volume
+            prices: PriceIndex, or price data with columns: date, symbol, open, high, low, close, volume
             max_samples: Maximum number of samples to use
+            workers: Processes used for news feature extraction
 
         Returns:
             List of feature dictionaries
@@ -57,14 +72,20 @@ class PatternDiscoveryEngine:
 
         training_data = []
 
-        for idx, row in news_df.head(max_samples).iterrows():
-            try:
-                # Extract news features
-                news_features = self.feature_extractor.extract_all_features(row)
+        sample_df = news_df.head(max_samples)
 
+        # Index prices once; per-row lookups are then binary searches
+        price_index = PriceIndex.from_prices(prices)
+
+        # Extract news features (columnar, one pass over the whole sample)
+        features_df = self.feature_extractor.extract_features_batch(sample_df, workers=workers)
+        features = features_df.to_dict('records')
+
+        for (idx, row), news_features in zip(sample_df.iterrows(), features):
+            try:
                 # Extract stock features
                 stock_features = extract_stock_features(
-                    prices_df,
+                    price_index,
                     row['symbol'],
                     row['date']
                 )
@@ -72,7 +93,7 @@ class PatternDiscoveryEngine:
                 # Calculate price movement after news (1 hour, 1 day)
                 # (Simplified - in real implementation, need precise timing)
                 price_change = self._calculate_price_change(
-                    prices_df,
+                    price_index,
                     row['symbol'],
                     row['date']
                 )
@@ -99,26 +120,19 @@ class PatternDiscoveryEngine:
 
     def _calculate_price_change(
         self,
-        prices_df: pd.DataFrame,
+        prices: Union[pd.DataFrame, PriceIndex],
         symbol: str,
         date: str
     ) -> Dict[str, float]:
         """Calculate price change after news announcement"""
         try:
-            target_date = pd.to_datetime(date)
-
-            symbol_data = prices_df[prices_df['symbol'] == symbol].copy()
-            symbol_data['date'] = pd.to_datetime(symbol_data['date'])
-
             # Get current and next day price
-            current = symbol_data[symbol_data['date'] == target_date]
-            next_day = symbol_data[symbol_data['date'] > target_date].head(1)
+            closes = PriceIndex.from_prices(prices).close_and_next_close(symbol, date)
 
-            if current.empty or next_day.empty:
+            if closes is None:
                 return {'price_change_pct': 0.0, 'direction': 'Hold'}
 
-            current_close = current.iloc[0]['close']
-            next_close = next_day.iloc[0]['close']
+            current_close, next_close = closes
 
             change_pct = ((next_close - current_close) / current_close) * 100
 
@@ -171,15 +185,19 @@ class PatternDiscoveryEngine:
                 }]
             )
 
-            # Parse JSON response
-            result_text = response.content[0].text
+            # Parse JSON response (tolerant extraction + schema validation)
+            stats = response_parser.get_stats('patterns')
+            patterns = response_parser.parse_model_response(
+                response.content, response_parser.list_schema('patterns'), stats=stats
+            )
+            print(stats.summary())
 
-            # Extract JSON from response
-            json_start = result_text.find('{')
-            json_end = result_text.rfind('}') + 1
-            json_str = result_text[json_start:json_end]
+            if patterns is None:
+                return {"patterns": []}
 
-            patterns = json.loads(json_str)
+            patterns['patterns'] = response_parser.valid_items(
+                patterns['patterns'], response_parser.PATTERN_SCHEMA, 'pattern'
+            )
 
             print(f"✓ Discovered {len(patterns.get('patterns', []))} patterns\n")
             return patterns
@@ -252,9 +270,9 @@ def main():
     print("  2. Update file paths below to match your actual data files")
     print("  3. Ensure data has required columns\n")
 
-    # Placeholder - update these paths
-    news_file = data_dir / "news.csv"  # Update with actual filename
-    prices_file = data_dir / "stock_prices.csv"  # Update with actual filename
+    # Placeholder - update these names (Parquet store is used if converted)
+    news_file = dataset_path(data_dir, "news")  # Update with actual dataset name
+    prices_file = dataset_path(data_dir, "stock_prices")  # Update with actual dataset name
 
     if not news_file.exists() or not prices_file.exists():
         print("ERROR: Data files not found!")
@@ -263,18 +281,21 @@ def main():
         print("\nRun: make phase0-download-data")
         sys.exit(1)
 
-    # Load data
-    print("Loading datasets...")
-    news_df = pd.read_csv(news_file)
-    prices_df = pd.read_csv(prices_file)
-    print(f"  News: {len(news_df)} rows")
-    print(f"  Prices: {len(prices_df)} rows\n")
+    max_samples = 200
 
     # Initialize engine
     engine = PatternDiscoveryEngine()
 
-    # Prepare training data
-    training_data = engine.prepare_training_data(news_df, prices_df, max_samples=200)
+    # Prepare training data batch by batch (streamed: only target symbols,
+    # only the price history each news batch needs)
+    workers = int(os.getenv("PHASE0_WORKERS", "1"))
+    training_data = []
+
+    for news_df, prices_df in iter_news_batches(news_file, prices_file, symbols=SYMBOLS, max_rows=max_samples):
+        print(f"Loaded batch: {len(news_df)} news rows, {len(prices_df)} price rows")
+        training_data.extend(engine.prepare_training_data(
+            news_df, prices_df, max_samples=max_samples, workers=workers
+        ))
 
     # Discover patterns
     patterns = engine.discover_patterns(training_data)
@@ -7,11 +7,12 @@ Goal: Let AI find features humans might miss.
 Based on DESIGN_DOC_FINAL.md Section 5.11
 """
 
+import importlib
 import os
 import sys
 import json
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union
 import pandas as pd
 from dotenv import load_dotenv
 from anthropic import Anthropic
@@ -20,6 +21,14 @@ from anthropic import Anthropic
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from phase0_data_analysis.scripts.data_loader import (
+    SYMBOLS, dataset_path, iter_news_batches
+)
+from phase0_data_analysis.scripts.price_index import PriceIndex
+
+# Shared with ai_analysis (`lambda` is a Python keyword, hence importlib)
+response_parser = importlib.import_module("lambda.utils.response_parser")
+
 # Load environment variables
 load_dotenv(project_root / ".env")
 
@@ -37,7 +46,7 @@ class RawPatternDiscoveryEngine:
     def prepare_raw_data(
         self,
         news_df: pd.DataFrame,
-        prices_df: pd.DataFrame,
+        prices: Union[pd.DataFrame, PriceIndex],
         max_samples: int = 200
     ) -> List[Dict[str, Any]]:
         """
@@ -45,7 +54,7 @@ class RawPatternDiscoveryEngine:
 
         Args:
             news_df: News data
-            prices_df: Price data
+            prices: PriceIndex or price data
             max_samples: Maximum samples
 
         Returns:
@@ -55,6 +64,9 @@ class RawPatternDiscoveryEngine:
 
         raw_data = []
 
+        # Index prices once; per-row lookups are then binary searches
+        price_index = PriceIndex.from_prices(prices)
+
         for idx, row in news_df.head(max_samples).iterrows():
             try:
                 # NO feature extraction - just raw data
@@ -62,7 +74,7 @@ class RawPatternDiscoveryEngine:
 
                 # Get price change (simple)
                 price_change = self._get_price_change(
-                    prices_df,
+                    price_index,
                     row['symbol'],
                     row['date']
                 )
@@ -89,26 +101,19 @@ class RawPatternDiscoveryEngine:
 
     def _get_price_change(
         self,
-        prices_df: pd.DataFrame,
+        prices: Union[pd.DataFrame, PriceIndex],
         symbol: str,
         date: str
     ) -> Dict[str, Any]:
         """Get price change after news (simplified)"""
 
         try:
-            target_date = pd.to_datetime(date)
-
-            symbol_data = prices_df[prices_df['symbol'] == symbol].copy()
-            symbol_data['date'] = pd.to_datetime(symbol_data['date'])
+            closes = PriceIndex.from_prices(prices).close_and_next_close(symbol, date)
 
-            current = symbol_data[symbol_data['date'] == target_date]
-            next_day = symbol_data[symbol_data['date'] > target_date].head(1)
-
-            if current.empty or next_day.empty:
+            if closes is None:
                 return {'change_pct': 0.0, 'direction': 'Hold'}
 
-            current_close = current.iloc[0]['close']
-            next_close = next_day.iloc[0]['close']
+            current_close, next_close = closes
 
             change_pct = ((next_close - current_close) / current_close) * 100
 
@@ -160,14 +165,19 @@ class RawPatternDiscoveryEngine:
                 }]
             )
 
-            result_text = response.content[0].text
+            # Extract JSON (tolerant extraction + schema validation)
+            stats = response_parser.get_stats('raw_patterns')
+            patterns = response_parser.parse_model_response(
+                response.content, response_parser.list_schema('patterns'), stats=stats
+            )
+            print(stats.summary())
 
-            # Extract JSON
-            json_start = result_text.find('{')
-            json_end = result_text.rfind('}') + 1
-            json_str = result_text[json_start:json_end]
+            if patterns is None:
+                return {"patterns": []}
 
-            patterns = json.loads(json_str)
+            patterns['patterns'] = response_parser.valid_items(
+                patterns['patterns'], response_parser.RAW_PATTERN_SCHEMA, 'raw pattern'
+            )
 
             print(f"✓ Discovered {len(patterns.get('patterns', []))} raw patterns\n")
             return patterns
@@ -229,8 +239,9 @@ def main():
     # Check data files
     data_dir = Path(__file__).parent.parent / "data"
 
-    news_file = data_dir / "news.csv"
-    prices_file = data_dir / "stock_prices.csv"
+    # Parquet store is used if converted, otherwise the CSV
+    news_file = dataset_path(data_dir, "news")
+    prices_file = dataset_path(data_dir, "stock_prices")
 
     if not news_file.exists() or not prices_file.exists():
         print("ERROR: Data files not found!")
@@ -239,18 +250,18 @@ def main():
         print("\nRun: make phase0-download-data")
         sys.exit(1)
 
-    # Load data
-    print("Loading datasets...")
-    news_df = pd.read_csv(news_file)
-    prices_df = pd.read_csv(prices_file)
-    print(f"  News: {len(news_df)} rows")
-    print(f"  Prices: {len(prices_df)} rows\n")
+    max_samples = 200
 
     # Initialize engine
     engine = RawPatternDiscoveryEngine()
 
-    # Prepare RAW data
-    raw_data = engine.prepare_raw_data(news_df, prices_df, max_samples=200)
+    # Prepare RAW data batch by batch (streamed: only target symbols,
+    # only the price history each news batch needs)
+    raw_data = []
+
+    for news_df, prices_df in iter_news_batches(news_file, prices_file, symbols=SYMBOLS, max_rows=max_samples):
+        print(f"Loaded batch: {len(news_df)} news rows, {len(prices_df)} price rows")
+        raw_data.extend(engine.prepare_raw_data(news_df, prices_df, max_samples=max_samples))
 
     # Discover patterns
     patterns = engine.discover_patterns_raw(raw_data)
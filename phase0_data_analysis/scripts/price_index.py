@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Phase 0: Pre-indexed Price Store
+
+Builds per-symbol sorted NumPy arrays (date/close/volume) once from the
+price DataFrame so that per-news lookups are a binary search instead of
+filtering, copying and re-sorting the whole DataFrame on every row.
+"""
+
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+
+class PriceIndex:
+    """Per-symbol sorted price arrays with searchsorted lookups"""
+
+    def __init__(self, prices_df: pd.DataFrame):
+        """
+        Args:
+            prices_df: DataFrame with columns: date, symbol, close, volume
+        """
+        self._series: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+        dates = pd.to_datetime(prices_df['date']).to_numpy()
+        closes = prices_df['close'].to_numpy(dtype=np.float64)
+        volumes = prices_df['volume'].to_numpy(dtype=np.float64)
+
+        for symbol, positions in prices_df.groupby('symbol', sort=False, observed=True).indices.items():
+            # Stable sort keeps the original row order for duplicate dates
+            order = positions[np.argsort(dates[positions], kind='stable')]
+            self._series[symbol] = (dates[order], closes[order], volumes[order])
+
+    @classmethod
+    def from_prices(cls, prices: Union[pd.DataFrame, 'PriceIndex']) -> 'PriceIndex':
+        """Return prices as-is if already indexed, otherwise build an index"""
+        if isinstance(prices, cls):
+            return prices
+        return cls(prices)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._series
+
+    @property
+    def symbols(self):
+        return list(self._series.keys())
+
+    def history_before(self, symbol: str, date, n: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Last n (close, volume) rows strictly before date
+
+        Returns:
+            (closes, volumes) arrays of length <= n, or None if symbol unknown
+        """
+        if symbol not in self._series:
+            return None
+
+        dates, closes, volumes = self._series[symbol]
+        end = np.searchsorted(dates, _to_datetime64(date), side='left')
+        start = max(end - n, 0)
+
+        return closes[start:end], volumes[start:end]
+
+    def close_and_next_close(self, symbol: str, date) -> Optional[Tuple[float, float]]:
+        """
+        Close on date and the first close after it
+
+        Returns:
+            (current_close, next_close), or None if either is missing
+        """
+        if symbol not in self._series:
+            return None
+
+        dates, closes, _ = self._series[symbol]
+        target = _to_datetime64(date)
+        left = np.searchsorted(dates, target, side='left')
+        right = np.searchsorted(dates, target, side='right')
+
+        if left == right or right >= len(dates):
+            return None
+
+        return float(closes[left]), float(closes[right])
+
+
+def _to_datetime64(date) -> np.datetime64:
+    """Normalise a date-like value for comparison with the indexed dates"""
+    return pd.Timestamp(date).to_datetime64()
@@ -0,0 +1,58 @@
+"""
+Shared pytest setup
+
+Tests import project modules by their package path
+(phase0_data_analysis.scripts.*, lambda.*), so the repository root must be
+on sys.path.
+
+`lambda` is a Python keyword: Lambda modules are imported with
+importlib.import_module("lambda.utils..."), and their own
+`from lambda.utils... import` statements are made loadable by
+_LambdaSourceLoader below.
+"""
+
+import ast
+import importlib.abc
+import importlib.machinery
+import re
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+class _LambdaSourceLoader(importlib.machinery.SourceFileLoader):
+    """
+    Parses `from lambda.x import ...` by spelling the package `lambda_`, then
+    restores the real module name in the AST before compiling (module names
+    in the AST are not checked against keywords)
+    """
+
+    def source_to_code(self, data, path, *, _optimize=-1):
+        source = re.sub(rb'\bfrom lambda\.', b'from lambda_.', data)
+        tree = ast.parse(source, path)
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and (node.module or '').startswith('lambda_.'):
+                node.module = 'lambda.' + node.module[len('lambda_.'):]
+
+        return compile(tree, path, 'exec', dont_inherit=True, optimize=_optimize)
+
+
+class _LambdaSourceFinder(importlib.abc.MetaPathFinder):
+    """Use _LambdaSourceLoader for modules under lambda/"""
+
+    def find_spec(self, fullname, path, target=None):
+        if not fullname.startswith('lambda.'):
+            return None
+
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if spec is not None and isinstance(spec.loader, importlib.machinery.SourceFileLoader):
+            spec.loader = _LambdaSourceLoader(fullname, spec.origin)
+        return spec
+
+
+sys.meta_path.insert(0, _LambdaSourceFinder())
@@ -0,0 +1,64 @@
+"""
+Shared fixtures for Lambda tests (moto-backed AWS)
+"""
+
+import importlib
+
+import pytest
+from moto import mock_aws
+
+aws_clients = importlib.import_module("lambda.utils.aws_clients")
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    """Mocked AWS account; AWSClients singletons are recreated inside the mock"""
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.delenv('AWS_PROFILE', raising=False)
+
+    for attr in [name for name in vars(aws_clients.AWSClients) if name.startswith('_') and not name.startswith('__')]:
+        monkeypatch.setattr(aws_clients.AWSClients, attr, None)
+
+    with mock_aws():
+        yield
+
+
+@pytest.fixture
+def create_table(aws):
+    """Table factory (see _create_table)"""
+    return _create_table
+
+
+def _create_table(name, hash_key, indexes=(), attributes=()):
+    """
+    PAY_PER_REQUEST table with a string hash key
+
+    Args:
+        indexes: [(index_name, hash_key, range_key or None)]
+        attributes: Extra (name, type) attribute definitions for index keys
+    """
+    dynamodb = aws_clients.AWSClients.get_dynamodb()
+    definitions = {hash_key: 'S', **dict(attributes)}
+    params = {
+        'TableName': name,
+        'KeySchema': [{'AttributeName': hash_key, 'KeyType': 'HASH'}],
+        'BillingMode': 'PAY_PER_REQUEST',
+    }
+
+    if indexes:
+        params['GlobalSecondaryIndexes'] = [
+            {
+                'IndexName': index_name,
+                'KeySchema': [{'AttributeName': index_hash, 'KeyType': 'HASH'}]
+                + ([{'AttributeName': index_range, 'KeyType': 'RANGE'}] if index_range else []),
+                'Projection': {'ProjectionType': 'ALL'},
+            }
+            for index_name, index_hash, index_range in indexes
+        ]
+
+    params['AttributeDefinitions'] = [
+        {'AttributeName': attr, 'AttributeType': attr_type} for attr, attr_type in definitions.items()
+    ]
+    return dynamodb.create_table(**params)
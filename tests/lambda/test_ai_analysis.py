@@ -0,0 +1,446 @@
+"""
+Tests for lambda/core/ai_analysis.py
+"""
+
+import importlib
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+ai_analysis = importlib.import_module("lambda.core.ai_analysis")
+constants = importlib.import_module("lambda.utils.constants")
+
+
+@pytest.fixture
+def trigger_table(create_table):
+    return create_table(constants.DYNAMODB_TABLES['trigger_history'], 'trigger_id')
+
+
+def _claim_item(trigger_table, key):
+    return trigger_table.get_item(Key={'trigger_id': ai_analysis.ANALYSIS_RECORD_PREFIX + key})['Item']
+
+
+def _age_claim(trigger_table, key, seconds):
+    started_at = (datetime.utcnow() - timedelta(seconds=seconds)).isoformat()
+    trigger_table.update_item(
+        Key={'trigger_id': ai_analysis.ANALYSIS_RECORD_PREFIX + key},
+        UpdateExpression='SET started_at = :started',
+        ExpressionAttributeValues={':started': started_at}
+    )
+
+
+def test_claim_once(trigger_table):
+    """同じキーの2回目は重複として拒否"""
+    assert ai_analysis.claim_analysis('evt-1', 'corr-1') is True
+    assert ai_analysis.claim_analysis('evt-1', 'corr-2') is False
+
+    item = _claim_item(trigger_table, 'evt-1')
+    assert item['status'] == 'started'
+    assert item['correlation_id'] == 'corr-1'
+    assert int(item['expires_at']) > datetime.utcnow().timestamp()
+
+
+def test_stale_claim_is_reclaimed(trigger_table):
+    """リース切れの未完了クレームは再取得できる"""
+    assert ai_analysis.claim_analysis('evt-1', 'corr-1') is True
+    _age_claim(trigger_table, 'evt-1', constants.ANALYSIS_CLAIM['lease_sec'] + 1)
+
+    assert ai_analysis.claim_analysis('evt-1', 'corr-2') is True
+    assert _claim_item(trigger_table, 'evt-1')['correlation_id'] == 'corr-2'
+
+
+def test_complete_claim_is_not_reclaimed(trigger_table):
+    """完了済みはリース切れでも再実行しない"""
+    assert ai_analysis.claim_analysis('evt-1', 'corr-1') is True
+    ai_analysis.record_analysis_result('evt-1', {'action': 'Hold', 'matched_pattern_id': None})
+    _age_claim(trigger_table, 'evt-1', constants.ANALYSIS_CLAIM['lease_sec'] + 1)
+
+    assert ai_analysis.claim_analysis('evt-1', 'corr-2') is False
+    assert _claim_item(trigger_table, 'evt-1')['status'] == 'complete'
+
+
+def test_claim_fails_open_without_table(aws):
+    """テーブルにアクセスできなければ分析を続行"""
+    assert ai_analysis.claim_analysis('evt-1', 'corr-1') is True
+
+
+PATTERNS = constants.SSM_PARAMS['patterns']
+PROMPT = constants.SSM_PARAMS['prompt_realtime_analysis']
+
+
+@pytest.fixture
+def ssm(monkeypatch):
+    """Stubbed GetParameters and clock; ssm.params holds {name: (version, value)}"""
+    stub = SimpleNamespace(
+        params={PATTERNS: (1, json.dumps({'patterns': ['v1']})), PROMPT: (1, 'prompt v1')},
+        calls=0, now=1000.0
+    )
+
+    def get_ssm_parameters(names):
+        stub.calls += 1
+        return {name: {'version': version, 'value': value} for name, (version, value) in stub.params.items()}
+
+    monkeypatch.setattr(ai_analysis, '_ssm_cache', {'params': {}, 'expires_at': 0.0})
+    monkeypatch.setattr(ai_analysis, 'get_ssm_parameters', get_ssm_parameters)
+    monkeypatch.setattr(ai_analysis, 'time', SimpleNamespace(time=lambda: stub.now))
+    return stub
+
+
+def test_parameters_cached_until_ttl(ssm):
+    """TTL 内は SSM を呼ばず、TTL 経過後に再取得する"""
+    assert ai_analysis.load_patterns() == {'patterns': ['v1']}
+    ssm.now += constants.SSM_CACHE_TTL_SEC - 1
+    assert ai_analysis.load_prompt() == 'prompt v1'
+    assert ssm.calls == 1
+
+    ssm.params[PROMPT] = (2, 'prompt v2')
+    ssm.now += 2
+
+    assert ai_analysis.load_prompt() == 'prompt v2'
+    assert ssm.calls == 2
+
+
+def test_same_version_reuses_parsed_value(ssm):
+    """同じバージョンなら解析済みの値をそのまま使う"""
+    first = ai_analysis.load_patterns()
+    ssm.now += constants.SSM_CACHE_TTL_SEC + 1
+
+    assert ai_analysis.load_patterns() is first
+    assert ssm.calls == 2
+
+
+def test_unparsable_new_version_keeps_cached_value(ssm):
+    """新バージョンが JSON として解析できなければ前の値を使い続ける"""
+    ai_analysis.load_patterns()
+    ssm.params[PATTERNS] = (2, '{broken')
+    ssm.now += constants.SSM_CACHE_TTL_SEC + 1
+
+    assert ai_analysis.load_patterns() == {'patterns': ['v1']}
+    assert ai_analysis.load_ai_parameters()[PATTERNS]['version'] == 1
+
+    ssm.params[PATTERNS] = (3, json.dumps({'patterns': ['v3']}))
+    ssm.now += constants.SSM_CACHE_TTL_SEC + 1
+
+    assert ai_analysis.load_patterns() == {'patterns': ['v3']}
+
+
+def test_refresh_failure_keeps_cached_values(ssm, monkeypatch):
+    """SSM 取得自体が失敗しても前の値を使う"""
+    ai_analysis.load_patterns()
+    monkeypatch.setattr(ai_analysis, 'get_ssm_parameters', lambda names: None)
+    ssm.now += constants.SSM_CACHE_TTL_SEC + 1
+
+    assert ai_analysis.load_patterns() == {'patterns': ['v1']}
+    assert ai_analysis.load_prompt() == 'prompt v1'
+
+
+LIBRARY = {
+    'version': 3,
+    'patterns': [
+        {
+            'pattern_id': 'earnings_beat_selloff', 'name': '決算好調の売り', 'hypothesis': '材料出尽くし',
+            'sample_size': 42, 'conditions': {'topic': 'Earnings', 'pre_trend_min': 5.0},
+            'prediction': {'direction': 'down', 'avg_return': -1.8},
+        },
+        {
+            'prediction': {'direction': 'up'}, 'conditions': {'sentiment_min': 0.5},
+            'pattern_id': 'product_launch_rally', 'sample_size': 10,
+        },
+    ]
+}
+
+TEMPLATE = "パターン:\n{patterns_from_phase0}\n\n見出し: {headline}\n銘柄: {symbol}\n"
+
+
+@pytest.fixture
+def compact_cache(monkeypatch):
+    monkeypatch.setattr(ai_analysis, '_compact_patterns_cache', {'source': None, 'text': None})
+
+
+def test_compact_patterns_keeps_matching_fields(compact_cache):
+    """必要なフィールドだけを残し、フィールド順は PROMPT_PATTERN_FIELDS に揃える"""
+    compact = json.loads(ai_analysis.compact_patterns(LIBRARY))
+
+    assert [list(pattern) for pattern in compact['patterns']] == [ai_analysis.PROMPT_PATTERN_FIELDS] * 2
+    assert compact['patterns'][0] == {
+        'pattern_id': 'earnings_beat_selloff',
+        'conditions': {'topic': 'Earnings', 'pre_trend_min': 5.0},
+        'prediction': {'direction': 'down', 'avg_return': -1.8},
+    }
+
+
+def test_compact_patterns_is_deterministic(compact_cache):
+    """同じ内容なら別オブジェクトでも同じ文字列（プロンプトキャッシュの前提）"""
+    first = ai_analysis.compact_patterns(LIBRARY)
+    reloaded = json.loads(json.dumps(LIBRARY))
+
+    assert ai_analysis.compact_patterns(LIBRARY) == first
+    assert ai_analysis.compact_patterns(reloaded) == first
+    assert ' ' not in first.replace('決算好調の売り', '')
+
+    prefix, _ = ai_analysis.split_prompt_template(TEMPLATE)
+    assert ai_analysis.pattern_prefix_block(prefix, first) == ai_analysis.pattern_prefix_block(
+        prefix, ai_analysis.compact_patterns(reloaded)
+    )
+
+
+def test_pattern_prefix_block_cache_control(monkeypatch):
+    """prompt_caching 有効時だけ cache_control を付ける"""
+    block = ai_analysis.pattern_prefix_block("P: {patterns_from_phase0}", '{"patterns":[]}')
+    assert block == {'type': 'text', 'text': 'P: {"patterns":[]}'}
+
+    monkeypatch.setitem(constants.BEDROCK_ANALYSIS, 'prompt_caching', True)
+    block = ai_analysis.pattern_prefix_block("P: {patterns_from_phase0}", '{"patterns":[]}')
+    assert block['cache_control'] == {'type': 'ephemeral'}
+
+
+@pytest.mark.parametrize('template', [
+    TEMPLATE,
+    "見出し: {headline}\n{patterns_from_phase0}\n",
+    "パターンなし: {headline}",
+    "{patterns_from_phase0}",
+])
+def test_split_prompt_template_round_trips(template):
+    """prefix + rest で元のテンプレートに戻り、prefix にはパターン以外の項目を含まない"""
+    prefix, rest = ai_analysis.split_prompt_template(template)
+
+    assert prefix + rest == template
+    if prefix:
+        assert prefix.endswith('{patterns_from_phase0}')
+        assert '{headline}' not in prefix and '{symbol}' not in prefix
+
+
+def test_split_prompt_template_prefix():
+    prefix, rest = ai_analysis.split_prompt_template(TEMPLATE)
+
+    assert prefix == "パターン:\n{patterns_from_phase0}"
+    assert rest == "\n\n見出し: {headline}\n銘柄: {symbol}\n"
+    assert ai_analysis.split_prompt_template("見出し: {headline}\n{patterns_from_phase0}\n")[0] == ''
+
+
+BATCH_TEMPLATE = (
+    "パターン:\n{patterns_from_phase0}\n\n【新規ニュース】\n見出し: {headline}\n対象銘柄: {symbol}\n"
+    "\n【あなたのタスク】\nマッチ度を判定\n\n【出力形式】\n{{\"action\": \"Hold\"}}\n"
+)
+
+
+def _details(*headlines):
+    return [{'trigger_type': 'news', 'symbol': 'AAPL', 'news': {'headline': h}} for h in headlines]
+
+
+def _decision(index, action='Hold', **fields):
+    return {'item_index': index, 'matched_pattern_id': f"p{index}", 'match_score': 50,
+            'action': action, 'confidence': 'Medium', **fields}
+
+
+def test_batch_content_shares_instruction(compact_cache):
+    """パターンと単一結果用の指示は1回だけ、ニュースごとにはデータだけを並べる"""
+    prefix_block, dynamic = ai_analysis.build_batch_content(_details('A社 決算', 'B社 提携'), LIBRARY, BATCH_TEMPLATE)
+    text = dynamic['text']
+
+    assert prefix_block['text'].count('earnings_beat_selloff') == 1
+    assert text.count('【新規ニュース】') == 2
+    assert text.count('【あなたのタスク】') == 1 and text.count('【出力形式】') == 1
+    assert text.index('見出し: B社 提携') < text.index('【あなたのタスク】') < text.index('【複数ニュースの出力形式】')
+    assert '{"action": "Hold"}' in text
+    assert ai_analysis.BATCH_ITEM_HEADER.format(index=1) in text
+
+
+def test_split_item_template():
+    """最後の項目の行までがニュースごとの部分、残りが共通の指示"""
+    _, rest = ai_analysis.split_prompt_template(BATCH_TEMPLATE)
+    item_part, instruction = ai_analysis.split_item_template(rest)
+
+    assert item_part + instruction == rest
+    assert item_part.endswith("対象銘柄: {symbol}\n")
+    assert instruction.startswith("\n【あなたのタスク】")
+    assert ai_analysis.split_item_template("見出し: {headline}") == ("見出し: {headline}", '')
+
+
+@pytest.fixture
+def bedrock_batch(monkeypatch, compact_cache):
+    """Stubbed invoke_bedrock returning a record_decisions tool call; .results sets its input"""
+    stub = SimpleNamespace(results=[], calls=[])
+
+    def invoke_bedrock(content, tool=None):
+        stub.calls.append((content, tool))
+        return [{'type': 'tool_use', 'name': tool['name'], 'input': {'results': stub.results}}]
+
+    monkeypatch.setattr(ai_analysis, 'invoke_bedrock', invoke_bedrock)
+    return stub
+
+
+def test_batch_results_fanned_out_by_item_index(bedrock_batch):
+    """item_index で各ニュースに割り当て、欠けた項目は Hold（重複は先勝ち）"""
+    bedrock_batch.results = [_decision(2, 'Sell'), _decision(0, 'Buy'), _decision(0, 'Sell'), {'item_index': 1}]
+
+    results = ai_analysis.analyze_batch_with_claude(_details('a', 'b', 'c'), LIBRARY, BATCH_TEMPLATE)
+
+    assert len(bedrock_batch.calls) == 1
+    assert bedrock_batch.calls[0][1]['name'] == ai_analysis.BATCH_DECISION_TOOL['name']
+    assert [r['action'] for r in results] == ['Buy', 'Hold', 'Sell']
+    assert results[0]['matched_pattern_id'] == 'p0'
+    assert results[1]['matched_pattern_id'] == 'error'
+
+
+def test_batch_error_holds_every_item(monkeypatch, compact_cache):
+    """Bedrock 呼び出しの失敗は全件 Hold"""
+    def failing_invoke(content, tool=None):
+        raise RuntimeError("throttled")
+
+    monkeypatch.setattr(ai_analysis, 'invoke_bedrock', failing_invoke)
+
+    results = ai_analysis.analyze_batch_with_claude(_details('a', 'b'), LIBRARY, BATCH_TEMPLATE)
+
+    assert [(r['action'], r['matched_pattern_id']) for r in results] == [('Hold', 'error')] * 2
+
+
+def test_batch_without_pattern_prefix_analyses_each_item(monkeypatch):
+    """パターンを共有できないテンプレートでは1件ずつ分析する"""
+    calls = []
+    monkeypatch.setattr(ai_analysis, 'analyze_with_claude',
+                        lambda detail, patterns, template: calls.append(detail) or _decision(len(calls)))
+
+    results = ai_analysis.analyze_batch_with_claude(
+        _details('a', 'b'), LIBRARY, "見出し: {headline}\n{patterns_from_phase0}"
+    )
+
+    assert [detail['news']['headline'] for detail in calls] == ['a', 'b']
+    assert [r['matched_pattern_id'] for r in results] == ['p1', 'p2']
+
+
+def test_merge_candidate_patterns_keeps_library_order():
+    """候補集合の和集合を元のパターン順で返す。全件候補なら元のオブジェクト"""
+    first, second = LIBRARY['patterns']
+
+    merged = ai_analysis.merge_candidate_patterns(LIBRARY, [{'patterns': [second]}, {'patterns': [first]}])
+    assert merged == {'patterns': [first, second]}
+
+    assert ai_analysis.merge_candidate_patterns(LIBRARY, [{'patterns': [second]}]) == {'patterns': [second]}
+    assert ai_analysis.merge_candidate_patterns(LIBRARY, [{'patterns': [first]}, LIBRARY]) is LIBRARY
+
+
+class _StubStream:
+    """Bedrock response stream of content_block_delta events; records reads and close()"""
+
+    def __init__(self, deltas, delta_type='input_json_delta'):
+        key = 'partial_json' if delta_type == 'input_json_delta' else 'text'
+        self.events = [{'type': 'message_start', 'message': {'usage': {'input_tokens': 100}}}] + [
+            {'type': 'content_block_delta', 'delta': {'type': delta_type, key: delta}} for delta in deltas
+        ] + [{'type': 'message_delta', 'usage': {'output_tokens': 50}}]
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for event in self.events:
+            self.read += 1
+            yield {'chunk': {'bytes': json.dumps(event).encode()}}
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def bedrock_stream(monkeypatch):
+    """Stubbed streaming Bedrock client; set .stream before calling stream_decision"""
+    stub = SimpleNamespace(stream=None, requests=[])
+
+    def invoke_model_with_response_stream(modelId, body):
+        stub.requests.append(json.loads(body))
+        return {'body': stub.stream}
+
+    client = SimpleNamespace(invoke_model_with_response_stream=invoke_model_with_response_stream)
+    monkeypatch.setattr(ai_analysis.AWSClients, 'get_bedrock', staticmethod(lambda: client))
+    return stub
+
+
+CONTENT = [{'type': 'text', 'text': 'prompt'}]
+
+
+def test_stream_cut_off_once_no_entry_is_decided(bedrock_stream):
+    """エントリーしないと決まった時点でストリームを閉じる（reasoning を待たない）"""
+    bedrock_stream.stream = _StubStream([
+        '{"action": "Hold", "confidence": "Low", ',
+        '"match_score": 20, ',
+        '"matched_pattern_id": "none", "reasoning": "長い説明',
+        '..."}',
+    ])
+    stats = ai_analysis.ParseStats('test')
+
+    decision = ai_analysis.stream_decision(CONTENT, ai_analysis.DECISION_TOOL, stats)
+
+    assert decision == {**ai_analysis.hold_result('unknown', "Decided from partial response"),
+                        'action': 'Hold', 'confidence': 'Low', 'match_score': 20}
+    assert bedrock_stream.stream.read == 3
+    assert bedrock_stream.stream.closed is True
+    assert stats.calls == 1 and stats.failures == 0
+    assert bedrock_stream.requests[0]['tool_choice'] == {'type': 'tool', 'name': 'record_decision'}
+
+
+def test_stream_entry_waits_for_entry_fields(bedrock_stream):
+    """エントリー判定ならパターンIDと価格がそろうまで読み続ける"""
+    bedrock_stream.stream = _StubStream([
+        '{"action": "Buy", "confidence": "High", "match_score": 85, ',
+        '"matched_pattern_id": "earnings_beat_selloff", ',
+        '"entry_price": 180.5, "target_profit": 1.0, ',
+        '"stop_loss": -1.0, ',
+        '"reasoning": "..."}',
+    ])
+
+    decision = ai_analysis.stream_decision(CONTENT, ai_analysis.DECISION_TOOL, ai_analysis.ParseStats('test'))
+
+    assert decision['action'] == 'Buy' and decision['match_score'] == 85
+    assert decision['matched_pattern_id'] == 'earnings_beat_selloff'
+    assert (decision['entry_price'], decision['target_profit'], decision['stop_loss']) == (180.5, 1.0, -1.0)
+    assert bedrock_stream.stream.read == 5
+    assert bedrock_stream.stream.closed is True
+
+
+@pytest.mark.parametrize('partial', [
+    '{"action": "Buy", "confidence": "High", "match_score": 8',
+    '{"action": "Buy", "confidence": "High", "match_score": 85.',
+    '{"action": "Buy", "confidence": "Hi',
+    '{"action": "Buy", "confidence": "High", "match_score": 85, "matched_pattern_id": "p1", '
+    '"entry_price": 180, "target_profit": 1.0, "stop_loss": -1',
+])
+def test_early_decision_ignores_incomplete_values(partial):
+    """途中の数値（"85" の前の "8"）や閉じていない文字列では判定しない"""
+    assert ai_analysis.early_decision(partial) is None
+
+
+def test_early_decision_rejects_invalid_values():
+    """スキーマ外の値は途中判定せず、全文の解析に任せる"""
+    assert ai_analysis.early_decision('{"action": "Maybe", "confidence": "Low", "match_score": 10,') is None
+    assert ai_analysis.early_decision('{"action": "Hold", "confidence": "Low", "match_score": 10,')['action'] == 'Hold'
+
+
+def test_stream_falls_back_to_full_parse(bedrock_stream):
+    """ツール呼び出しのないテキスト応答で途中判定できなければ、全文から解析する"""
+    bedrock_stream.stream = _StubStream([
+        '例: {"action": "Maybe", "confidence": "Low", "match_score": 10}\n',
+        '回答: {"matched_pattern_id": "p1", "match_score": 90, "action": "Buy", "confidence": "High", ',
+        '"entry_price": 180.5, "target_profit": 1.0, "stop_loss": -1.0}',
+    ], delta_type='text_delta')
+    stats = ai_analysis.ParseStats('test')
+
+    decision = ai_analysis.stream_decision(CONTENT, None, stats)
+
+    assert decision == {'matched_pattern_id': 'p1', 'match_score': 90, 'action': 'Buy', 'confidence': 'High',
+                        'entry_price': 180.5, 'target_profit': 1.0, 'stop_loss': -1.0}
+    assert bedrock_stream.stream.read == len(bedrock_stream.stream.events)
+    assert bedrock_stream.stream.closed is True
+    assert stats.calls == 1 and stats.failures == 0
+    assert 'tools' not in bedrock_stream.requests[0]
+
+
+def test_stream_unparseable_response_holds(bedrock_stream, monkeypatch, compact_cache):
+    """全文も解析できなければ Hold（error）"""
+    bedrock_stream.stream = _StubStream(['判定できません'], delta_type='text_delta')
+    monkeypatch.setitem(constants.BEDROCK_ANALYSIS, 'streaming', True)
+
+    analysis = ai_analysis.analyze_with_claude(_details('a')[0], LIBRARY, BATCH_TEMPLATE)
+
+    assert (analysis['action'], analysis['matched_pattern_id']) == ('Hold', 'error')
+    assert bedrock_stream.stream.closed is True
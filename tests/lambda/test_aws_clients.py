@@ -0,0 +1,165 @@
+"""
+Tests for lambda/utils/aws_clients.py (moto DynamoDB, stubbed EventBridge)
+"""
+
+import importlib
+import json
+import time
+
+import pytest
+
+aws_clients = importlib.import_module("lambda.utils.aws_clients")
+
+
+@pytest.fixture
+def table(create_table):
+    """250 items; odd ones unexpired, even ones past expires_at"""
+    table = create_table('items', 'item_key')
+    now = int(time.time())
+    with table.batch_writer() as batch:
+        for i in range(250):
+            batch.put_item(Item={'item_key': f"k{i}", 'value': i, 'expires_at': now + 60 if i % 2 else now - 60})
+    return table
+
+
+def test_batch_get_items_chunks_keys(table):
+    """100 件を超えるキーも分割して全件取得"""
+    keys = [{'item_key': f"k{i}"} for i in range(260)]
+
+    items = aws_clients.batch_get_items('items', keys)
+
+    assert sorted(int(item['value']) for item in items) == list(range(250))
+
+
+def test_batch_get_items_drops_expired(table):
+    """TTL 属性を過ぎた（未削除の）アイテムは除く"""
+    keys = [{'item_key': f"k{i}"} for i in range(10)]
+
+    items = aws_clients.batch_get_items('items', keys, projection='item_key, expires_at', ttl_attribute='expires_at')
+
+    assert sorted(item['item_key'] for item in items) == ['k1', 'k3', 'k5', 'k7', 'k9']
+    assert all(set(item) == {'item_key', 'expires_at'} for item in items)
+
+
+class _ThrottlingDynamoDB:
+    """Leaves every other key unprocessed on each call"""
+
+    def __init__(self, resource, throttled_calls):
+        self._resource = resource
+        self.throttled_calls = throttled_calls
+        self.calls = 0
+
+    def batch_get_item(self, RequestItems):
+        self.calls += 1
+        if self.calls > self.throttled_calls:
+            return self._resource.batch_get_item(RequestItems=RequestItems)
+
+        (table_name, request), = RequestItems.items()
+        processed = {**request, 'Keys': request['Keys'][::2]}
+        response = self._resource.batch_get_item(RequestItems={table_name: processed})
+        response['UnprocessedKeys'] = {table_name: {**request, 'Keys': request['Keys'][1::2]}}
+        return response
+
+
+def test_batch_get_items_retries_unprocessed(table, monkeypatch):
+    """未処理キーは再試行して取得"""
+    throttling = _ThrottlingDynamoDB(aws_clients.AWSClients.get_dynamodb(), throttled_calls=1)
+    monkeypatch.setattr(aws_clients.AWSClients, 'get_dynamodb', staticmethod(lambda: throttling))
+    monkeypatch.setattr(aws_clients, 'BATCH_GET_BACKOFF_SEC', 0)
+
+    items = aws_clients.batch_get_items('items', [{'item_key': f"k{i}"} for i in range(8)])
+
+    assert sorted(int(item['value']) for item in items) == list(range(8))
+    assert throttling.calls == 2
+
+
+def test_batch_get_items_logs_leftover_unprocessed(table, monkeypatch, capsys):
+    """再試行後も未処理のキーはログして欠損扱い"""
+    throttling = _ThrottlingDynamoDB(aws_clients.AWSClients.get_dynamodb(), throttled_calls=99)
+    monkeypatch.setattr(aws_clients.AWSClients, 'get_dynamodb', staticmethod(lambda: throttling))
+    monkeypatch.setattr(aws_clients, 'BATCH_GET_BACKOFF_SEC', 0)
+
+    items = aws_clients.batch_get_items('items', [{'item_key': f"k{i}"} for i in range(8)])
+
+    assert len(items) == 7  # 4 + 2 + 1 over MAX_BATCH_GET_ATTEMPTS calls
+    assert throttling.calls == aws_clients.MAX_BATCH_GET_ATTEMPTS
+    assert "1 keys still unprocessed" in capsys.readouterr().out
+
+
+class _StubEvents:
+    """Records PutEvents batches; failing={id: n} fails that entry on its first n sends"""
+
+    def __init__(self, failing=None, fail_calls=0):
+        self.failing = dict(failing or {})
+        self.fail_calls = fail_calls
+        self.batches = []
+
+    def put_events(self, Entries):
+        details = [json.loads(entry['Detail']) for entry in Entries]
+        self.batches.append([detail['id'] for detail in details])
+        if len(self.batches) <= self.fail_calls:
+            raise RuntimeError("throttled")
+
+        results = []
+        for detail in details:
+            if self.failing.get(detail['id'], 0) > 0:
+                self.failing[detail['id']] -= 1
+                results.append({'ErrorCode': 'InternalFailure', 'ErrorMessage': 'failed'})
+            else:
+                results.append({'EventId': f"event-{detail['id']}"})
+
+        return {'FailedEntryCount': sum('ErrorCode' in result for result in results), 'Entries': results}
+
+
+@pytest.fixture
+def publisher(aws, monkeypatch):
+    monkeypatch.setattr(aws_clients.EventBridgePublisher, 'RETRY_BASE_DELAY_SEC', 0)
+    publisher = aws_clients.EventBridgePublisher()
+    publisher.events = _StubEvents()
+    return publisher
+
+
+def test_publisher_batches_ten_entries(publisher):
+    """PutEvents は10件ずつ。残りは終了時にまとめて送る"""
+    with publisher:
+        for i in range(23):
+            publisher.put('test', 'Event', {'id': i})
+
+    assert [len(batch) for batch in publisher.events.batches] == [10, 10, 3]
+    assert sum(publisher.events.batches, []) == list(range(23))
+    assert publisher.sent == 23 and publisher.failed == 0
+
+
+def test_publisher_respects_batch_size_limit(publisher):
+    """256 KB を超える前に送信する"""
+    with publisher:
+        for i in range(5):
+            publisher.put('test', 'Event', {'id': i, 'body': 'x' * 100 * 1024})
+        publisher.put('test', 'Event', {'id': 5})
+
+    assert publisher.events.batches == [[0, 1], [2, 3], [4, 5]]
+
+
+def test_publisher_retries_only_failed_entries(publisher):
+    """失敗したエントリだけを再送する"""
+    publisher.events = _StubEvents(failing={3: 1})
+
+    with publisher:
+        for i in range(5):
+            publisher.put('test', 'Event', {'id': i})
+
+    assert publisher.events.batches == [[0, 1, 2, 3, 4], [3]]
+    assert publisher.sent == 5 and publisher.failed == 0
+
+
+def test_publisher_counts_entries_failing_every_attempt(publisher, capsys):
+    """呼び出し自体の失敗は全件を再送し、最後まで失敗したエントリは failed に数える"""
+    publisher.events = _StubEvents(failing={1: 99}, fail_calls=1)
+
+    with publisher:
+        publisher.put('test', 'Event', {'id': 0})
+        publisher.put('test', 'Event', {'id': 1})
+
+    assert publisher.events.batches == [[0, 1], [0, 1], [1]]
+    assert publisher.sent == 1 and publisher.failed == 1
+    assert "1 entries failed after 3 attempts" in capsys.readouterr().out
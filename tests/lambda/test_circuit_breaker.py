@@ -0,0 +1,374 @@
+"""
+Tests for lambda/utils/circuit_breaker.py (moto DynamoDB)
+"""
+
+import importlib
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+circuit_breaker = importlib.import_module("lambda.utils.circuit_breaker")
+constants = importlib.import_module("lambda.utils.constants")
+
+RULES = constants.CIRCUIT_BREAKER_RULES
+CIRCUIT_BREAKER_SETTINGS = constants.CIRCUIT_BREAKER_SETTINGS
+
+
+@pytest.fixture
+def tables(create_table, monkeypatch):
+    """Trigger history (RecentTriggerIndex) and positions (DateIndex) tables"""
+    monkeypatch.setitem(circuit_breaker._total_pnl_cache, 'value', None)
+    monkeypatch.setitem(circuit_breaker._reconcile_backoff, 'retry_at', 0.0)
+
+    create_table(
+        constants.DYNAMODB_TABLES['trigger_history'], 'trigger_id',
+        indexes=[('RecentTriggerIndex', 'record_type', 'timestamp')],
+        attributes=[('record_type', 'S'), ('timestamp', 'S')]
+    )
+    positions = create_table(
+        constants.DYNAMODB_TABLES['positions'], 'position_id',
+        indexes=[('DateIndex', 'trade_date', None)],
+        attributes=[('trade_date', 'S')]
+    )
+    return positions
+
+
+def _put_trigger(breaker, timestamp):
+    breaker.trigger_table.put_item(Item={
+        'trigger_id': f"news_{timestamp.isoformat()}",
+        'record_type': circuit_breaker.TRIGGER_RECORD_TYPE,
+        'timestamp': timestamp.isoformat(),
+        'trigger_type': 'news',
+    })
+
+
+def _put_position(positions, position_id, pnl, trade_date=None):
+    positions.put_item(Item={
+        'position_id': position_id,
+        'trade_date': trade_date or datetime.utcnow().date().isoformat(),
+        'pnl': Decimal(str(pnl)),
+    })
+
+
+def _clear_interval(breaker):
+    """Move the last trigger time beyond min_interval_seconds"""
+    past = datetime.utcnow() - timedelta(seconds=RULES['min_interval_seconds'] + 1)
+    breaker.trigger_table.update_item(
+        Key=circuit_breaker.RISK_STATE_KEY,
+        UpdateExpression='SET last_trigger_at = :past',
+        ExpressionAttributeValues={':past': past.isoformat()}
+    )
+
+
+def test_no_state_all_checks_pass(tables):
+    """集約アイテムなし・履歴なしなら許可"""
+    breaker = circuit_breaker.CircuitBreaker()
+
+    assert breaker.check('news')['allowed'] is True
+
+
+def test_hourly_limit_exact_under_burst(tables):
+    """時間の先頭に集中したトリガーでも上限ちょうどで止まる"""
+    breaker = circuit_breaker.CircuitBreaker()
+    now = datetime.utcnow()
+
+    # Outside the window: not counted
+    for i in range(RULES['max_triggers_per_hour']):
+        _put_trigger(breaker, now - timedelta(hours=1, minutes=5 + i))
+    for i in range(RULES['max_triggers_per_hour'] - 1):
+        _put_trigger(breaker, now - timedelta(minutes=50, seconds=i))
+
+    breaker.log_trigger('volatility', {'change_pct': 3.2})
+    _clear_interval(breaker)
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'].startswith(f"Hourly trigger limit reached ({RULES['max_triggers_per_hour']}/")
+
+
+def test_hourly_below_limit_with_state(tables):
+    """上限未満なら集約アイテムがあっても許可"""
+    breaker = circuit_breaker.CircuitBreaker()
+    now = datetime.utcnow()
+
+    for i in range(RULES['max_triggers_per_hour'] - 2):
+        _put_trigger(breaker, now - timedelta(minutes=30, seconds=i))
+    breaker.log_trigger('news', {'symbol': 'AAPL'})
+    _clear_interval(breaker)
+
+    assert breaker.check('news')['allowed'] is True
+
+
+def test_log_trigger_stores_float_details(tables):
+    """float を含む details も記録され、集計対象になる"""
+    breaker = circuit_breaker.CircuitBreaker()
+    breaker.log_trigger('volatility', {'change_pct': 3.2, 'price': 101.5})
+
+    items = breaker.trigger_table.query(
+        IndexName='RecentTriggerIndex',
+        KeyConditionExpression='record_type = :type',
+        ExpressionAttributeValues={':type': circuit_breaker.TRIGGER_RECORD_TYPE}
+    )['Items']
+    assert len(items) == 1
+    assert items[0]['details']['change_pct'] == Decimal('3.2')
+
+
+def test_minimum_interval_from_state(tables):
+    """直近トリガーからの間隔は集約アイテムで判定"""
+    breaker = circuit_breaker.CircuitBreaker()
+    breaker.log_trigger('news', {})
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'].startswith("Minimum interval not met")
+
+
+def test_minimum_interval_without_state(tables):
+    """集約アイテムがなければ履歴の最新トリガーで判定"""
+    breaker = circuit_breaker.CircuitBreaker()
+    _put_trigger(breaker, datetime.utcnow() - timedelta(seconds=10))
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'].startswith("Minimum interval not met")
+
+
+def test_daily_trades_from_positions_with_state(tables):
+    """集約アイテムがあっても日次取引数はポジションテーブルで判定"""
+    breaker = circuit_breaker.CircuitBreaker()
+    breaker.log_trigger('news', {})
+    _clear_interval(breaker)
+
+    for i in range(RULES['max_positions_per_day']):
+        _put_position(tables, f"p{i}", 1)
+    _put_position(tables, 'old', 1, trade_date='2020-01-01')
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'] == (
+        f"Daily trade limit reached ({RULES['max_positions_per_day']}/{RULES['max_positions_per_day']})"
+    )
+
+
+def test_daily_loss_from_positions_with_state(tables):
+    """集約アイテムがあっても日次損失はポジションテーブルで判定"""
+    breaker = circuit_breaker.CircuitBreaker()
+    breaker.log_trigger('news', {})
+    _clear_interval(breaker)
+
+    _put_position(tables, 'p1', -RULES['daily_loss_limit_usd'])
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'].startswith("Daily loss limit reached")
+
+
+def test_position_ledger_daily_counters(tables, monkeypatch):
+    """position_ledger 有効時は record_position_* の集計で判定"""
+    monkeypatch.setitem(constants.CIRCUIT_BREAKER_SETTINGS, 'position_ledger', True)
+    breaker = circuit_breaker.CircuitBreaker()
+
+    for _ in range(RULES['max_positions_per_day']):
+        breaker.record_position_opened()
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'].startswith("Daily trade limit reached")
+
+
+def test_position_ledger_daily_loss(tables, monkeypatch):
+    """position_ledger 有効時の日次損失"""
+    monkeypatch.setitem(constants.CIRCUIT_BREAKER_SETTINGS, 'position_ledger', True)
+    breaker = circuit_breaker.CircuitBreaker()
+
+    breaker.record_position_opened()
+    breaker.record_position_closed(-RULES['daily_loss_limit_usd'] - 1.5)
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'] == f"Daily loss limit reached ($-{RULES['daily_loss_limit_usd'] + 1.5:.2f})"
+
+
+def test_sequential_checks_same_result(tables, monkeypatch):
+    """parallel_checks 無効でも同じ理由を返す"""
+    monkeypatch.setitem(constants.CIRCUIT_BREAKER_SETTINGS, 'parallel_checks', False)
+    breaker = circuit_breaker.CircuitBreaker()
+
+    for i in range(RULES['max_positions_per_day']):
+        _put_position(tables, f"p{i}", 1)
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'].startswith("Daily trade limit reached")
+
+
+def _fail_reconcile_updates(breaker, monkeypatch):
+    """Make the ledger reconciliation update fail"""
+    client = breaker.trigger_table.meta.client
+    update_item = client.update_item
+
+    def failing_update_item(**kwargs):
+        if 'total_pnl_reconciled_at' in kwargs['UpdateExpression']:
+            raise ClientError({'Error': {'Code': 'AccessDeniedException', 'Message': 'denied'}}, 'UpdateItem')
+        return update_item(**kwargs)
+
+    monkeypatch.setattr(client, 'update_item', failing_update_item)
+
+
+def _count_scans(breaker, monkeypatch):
+    calls = []
+    scan = breaker._scan_total_pnl
+
+    def counting_scan():
+        calls.append(1)
+        return scan()
+
+    monkeypatch.setattr(breaker, '_scan_total_pnl', counting_scan)
+    return calls
+
+
+def test_total_loss_scanned_without_ledger(tables):
+    """position_ledger 無効時は集約アイテムがあっても累計損益をスキャンで判定"""
+    breaker = circuit_breaker.CircuitBreaker()
+    breaker.log_trigger('news', {})
+    _clear_interval(breaker)
+
+    _put_position(tables, 'p1', -RULES['total_loss_limit_usd'], trade_date='2020-01-01')
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'].startswith("CRITICAL: Total loss limit reached")
+
+
+def test_ledger_reconciled_once(tables, monkeypatch):
+    """初回チェックで台帳を照合し、以降はスキャンしない"""
+    monkeypatch.setitem(constants.CIRCUIT_BREAKER_SETTINGS, 'position_ledger', True)
+    breaker = circuit_breaker.CircuitBreaker()
+    breaker.log_trigger('news', {})
+    _clear_interval(breaker)
+    _put_position(tables, 'p1', -30, trade_date='2020-01-01')
+    scans = _count_scans(breaker, monkeypatch)
+
+    assert breaker.check('news')['allowed'] is True
+    assert breaker.check('news')['allowed'] is True
+
+    state = breaker._get_risk_state()
+    assert state['total_pnl'] == Decimal('-30')
+    assert len(scans) == 1
+
+
+def test_reconcile_failure_does_not_raise_and_backs_off(tables, monkeypatch):
+    """照合の更新が失敗しても例外を出さず、再スキャンを控える"""
+    monkeypatch.setitem(constants.CIRCUIT_BREAKER_SETTINGS, 'position_ledger', True)
+    breaker = circuit_breaker.CircuitBreaker()
+    breaker.log_trigger('news', {})
+    _clear_interval(breaker)
+    _put_position(tables, 'p1', -RULES['total_loss_limit_usd'], trade_date='2020-01-01')
+
+    _fail_reconcile_updates(breaker, monkeypatch)
+    scans = _count_scans(breaker, monkeypatch)
+
+    for _ in range(3):
+        result = breaker.check('news')
+        assert result['allowed'] is False
+        assert result['reason'].startswith("CRITICAL: Total loss limit reached")
+
+    assert len(scans) == 1
+    assert 'total_pnl_reconciled_at' not in breaker._get_risk_state()
+
+
+def test_reconcile_scan_failure_fails_open(tables, monkeypatch):
+    """照合スキャンの失敗は従来どおりログして許可"""
+    monkeypatch.setitem(constants.CIRCUIT_BREAKER_SETTINGS, 'position_ledger', True)
+    breaker = circuit_breaker.CircuitBreaker()
+    breaker.log_trigger('news', {})
+    _clear_interval(breaker)
+
+    def failing_scan():
+        raise RuntimeError("scan failed")
+
+    monkeypatch.setattr(breaker, '_scan_total_pnl', failing_scan)
+
+    assert breaker.check('news')['allowed'] is True
+    assert circuit_breaker._reconcile_backoff['retry_at'] > 0
+
+
+def test_checks_do_not_use_shared_table_resources(tables, monkeypatch):
+    """並列チェックは共有 Table リソースを使わない"""
+    breaker = circuit_breaker.CircuitBreaker()
+    breaker.log_trigger('news', {})
+    _clear_interval(breaker)
+    for i in range(RULES['max_positions_per_day']):
+        _put_position(tables, f"p{i}", 1)
+
+    def shared_table_query(**kwargs):
+        raise AssertionError("Table resource used from a check")
+
+    monkeypatch.setattr(breaker.trigger_table, 'query', shared_table_query)
+    monkeypatch.setattr(breaker.positions_table, 'query', shared_table_query)
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'].startswith("Daily trade limit reached")
+
+
+def test_cached_checks_reused_within_ttl(tables):
+    """TTL 内はキャッシュした判定を再利用し、ポジション記録で無効化する"""
+    breaker = circuit_breaker.CircuitBreaker()
+    assert breaker.check('news')['allowed'] is True
+
+    for i in range(RULES['max_positions_per_day']):
+        _put_position(tables, f"p{i}", 1)
+    assert breaker.check('news')['allowed'] is True
+
+    breaker.record_position_opened()
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'].startswith("Daily trade limit reached")
+
+
+def test_cached_checks_expire_after_ttl(tables, monkeypatch):
+    """TTL を過ぎたキャッシュは使わない"""
+    breaker = circuit_breaker.CircuitBreaker()
+    assert breaker.check('news')['allowed'] is True
+
+    _put_position(tables, 'p1', -RULES['daily_loss_limit_usd'])
+    expired = time.time() + CIRCUIT_BREAKER_SETTINGS['check_cache_ttl_sec'] + 1
+    monkeypatch.setattr(circuit_breaker, 'time', SimpleNamespace(time=lambda: expired))
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'].startswith("Daily loss limit reached")
+
+
+def test_log_trigger_invalidates_only_trigger_count(tables):
+    """log_trigger は時間あたりトリガー数のキャッシュだけを無効化する"""
+    breaker = circuit_breaker.CircuitBreaker()
+    assert breaker.check('news')['allowed'] is True
+    cached = dict(breaker._check_cache)
+
+    breaker.log_trigger('news', {})
+
+    assert 'hourly_triggers' in cached
+    assert set(breaker._check_cache) == set(cached) - {'hourly_triggers'}
+
+
+def test_log_trigger_refreshes_hourly_count(tables):
+    """キャッシュ済みでも log_trigger 後は最新のトリガー数で判定する"""
+    breaker = circuit_breaker.CircuitBreaker()
+    assert breaker.check('news')['allowed'] is True
+
+    now = datetime.utcnow()
+    for i in range(RULES['max_triggers_per_hour'] - 1):
+        _put_trigger(breaker, now - timedelta(minutes=50, seconds=i))
+    breaker.log_trigger('news', {})
+    _clear_interval(breaker)
+
+    result = breaker.check('news')
+    assert result['allowed'] is False
+    assert result['reason'].startswith("Hourly trigger limit reached")
@@ -0,0 +1,126 @@
+"""
+Tests for lambda/utils/decision_cache.py (moto DynamoDB)
+"""
+
+import importlib
+import time
+
+import pytest
+
+decision_cache = importlib.import_module("lambda.utils.decision_cache")
+ai_analysis = importlib.import_module("lambda.core.ai_analysis")
+constants = importlib.import_module("lambda.utils.constants")
+aws_clients = importlib.import_module("lambda.utils.aws_clients")
+
+HOLD = {'matched_pattern_id': 'P001', 'match_score': 40, 'action': 'Hold', 'confidence': 'Low'}
+BUY = {
+    'matched_pattern_id': 'P002', 'match_score': 90, 'action': 'Buy', 'confidence': 'High',
+    'entry_price': 180.5, 'target_profit': 185.0, 'stop_loss': 178.0,
+}
+
+
+@pytest.fixture
+def cache(create_table, monkeypatch):
+    """Decision cache over an empty table and in-memory front"""
+    monkeypatch.setattr(decision_cache, '_memory', type(decision_cache._memory)())
+    create_table(constants.DYNAMODB_TABLES['decision_cache'], 'cache_key')
+    return decision_cache.DecisionCache()
+
+
+def test_near_duplicate_hit(cache):
+    """ほぼ同じ見出しは保存済みの判断を返す"""
+    cache.store('AAPL', 'Apple beats earnings expectations, shares rise', 'v1', HOLD)
+
+    hit = cache.lookup('AAPL', 'Apple beats earnings expectations; shares rise', 'v1')
+
+    assert hit['decision'] == HOLD
+    assert hit['similarity'] >= constants.DECISION_CACHE['min_similarity']
+
+
+def test_miss_for_other_symbol_version_or_story(cache):
+    """銘柄・パターン版・記事が違えばヒットしない"""
+    headline = 'Apple beats earnings expectations, shares rise'
+    cache.store('AAPL', headline, 'v1', HOLD)
+
+    assert cache.lookup('MSFT', headline, 'v1') is None
+    assert cache.lookup('AAPL', headline, 'v2') is None
+    assert cache.lookup('AAPL', 'Apple faces antitrust lawsuit in Europe', 'v1') is None
+
+
+def test_table_shared_across_containers(cache, monkeypatch):
+    """メモリになくても DynamoDB から読める（別コンテナ相当）"""
+    headline = 'Apple beats earnings expectations, shares rise'
+    cache.store('AAPL', headline, 'v1', HOLD)
+    monkeypatch.setattr(decision_cache, '_memory', type(decision_cache._memory)())
+
+    assert decision_cache.DecisionCache().lookup('AAPL', headline, 'v1')['decision'] == HOLD
+
+
+def test_expired_entries_ignored(cache, monkeypatch):
+    """期限切れ（TTL 削除前）のエントリは使わない"""
+    headline = 'Apple beats earnings expectations, shares rise'
+    cache.store('AAPL', headline, 'v1', HOLD, ttl_sec=1)
+    monkeypatch.setattr(decision_cache, '_memory', type(decision_cache._memory)())
+
+    real_time = time.time
+    monkeypatch.setattr(decision_cache.time, 'time', lambda: real_time() + 5)
+
+    assert cache.lookup('AAPL', headline, 'v1') is None
+
+
+def test_entry_decisions_cached_for_minutes():
+    """Buy/Sell は価格を含むため短い TTL、Hold は通常の TTL"""
+    assert ai_analysis.decision_ttl(BUY) == constants.DECISION_CACHE['entry_ttl_sec']
+    assert ai_analysis.decision_ttl({**BUY, 'action': 'Sell'}) == constants.DECISION_CACHE['entry_ttl_sec']
+    assert ai_analysis.decision_ttl(HOLD) == constants.DECISION_CACHE['ttl_sec']
+    assert constants.DECISION_CACHE['entry_ttl_sec'] < 3600
+
+
+def test_stale_entry_decision_not_replayed(cache, monkeypatch):
+    """entry_ttl_sec を過ぎた Buy 判断は再利用しない"""
+    headline = 'Apple beats earnings expectations, shares rise'
+    cache.store('AAPL', headline, 'v1', BUY, ttl_sec=ai_analysis.decision_ttl(BUY))
+
+    real_time = time.time
+    monkeypatch.setattr(
+        decision_cache.time, 'time',
+        lambda: real_time() + constants.DECISION_CACHE['entry_ttl_sec'] + 1
+    )
+
+    assert cache.lookup('AAPL', headline, 'v1') is None
+
+
+def test_unprocessed_keys_logged(cache, monkeypatch, capsys):
+    """スロットリングで未処理のキーはログに残す"""
+    class ThrottledDynamoDB:
+        def batch_get_item(self, RequestItems):
+            return {'Responses': {}, 'UnprocessedKeys': RequestItems}
+
+    monkeypatch.setattr(aws_clients.AWSClients, 'get_dynamodb', staticmethod(lambda: ThrottledDynamoDB()))
+    monkeypatch.setattr(aws_clients, 'BATCH_GET_BACKOFF_SEC', 0)
+
+    assert cache.lookup('AAPL', 'Apple beats earnings expectations', 'v1') is None
+    assert "unprocessed" in capsys.readouterr().out
+
+
+def test_store_is_one_round_trip(cache, monkeypatch):
+    """全バンドキーを1回の BatchWriteItem で書き込む"""
+    client = cache.table.meta.client
+    calls = []
+    batch_write_item = client.batch_write_item
+
+    def counting_batch_write_item(**kwargs):
+        calls.append(kwargs)
+        return batch_write_item(**kwargs)
+
+    def put_item(**kwargs):
+        raise AssertionError("put_item used for a cache entry")
+
+    monkeypatch.setattr(client, 'batch_write_item', counting_batch_write_item)
+    monkeypatch.setattr(client, 'put_item', put_item)
+
+    cache.store('AAPL', 'Apple beats earnings expectations, shares rise', 'v1', HOLD)
+
+    assert len(calls) == 1
+    (requests,) = calls[0]['RequestItems'].values()
+    assert len(requests) == constants.DECISION_CACHE['bands']
@@ -0,0 +1,55 @@
+"""
+keyword_matcher: single-pass Aho-Corasick matching
+"""
+
+import importlib
+import random
+
+import pytest
+
+# `lambda` is a Python keyword, so Lambda modules are imported via importlib
+keyword_matcher = importlib.import_module("lambda.utils.keyword_matcher")
+KeywordMatcher = keyword_matcher.KeywordMatcher
+analyze_news_text = keyword_matcher.analyze_news_text
+
+
+def brute_force(keywords, text):
+    return {kw.lower() for kw in keywords if kw.lower() in text.lower()}
+
+
+@pytest.mark.parametrize("keywords,text", [
+    (['he', 'she', 'his', 'hers'], 'ushers'),
+    (['a', 'ab', 'bab', 'bc', 'bca', 'c', 'caa'], 'abccab'),
+    (['earnings', 'earn', 'nings'], 'Q3 EARNINGS beat'),
+    (['merger'], 'no match here'),
+])
+def test_find_all_matches_substring_search(keywords, text):
+    """重なり・接尾辞一致を含めて部分文字列検索と同じ結果になる"""
+    assert KeywordMatcher(keywords).find_all(text) == brute_force(keywords, text)
+
+
+def test_find_all_random_texts():
+    rng = random.Random(0)
+    keywords = [''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(15)]
+    matcher = KeywordMatcher(keywords)
+
+    for _ in range(200):
+        text = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 30)))
+        assert matcher.find_all(text) == brute_force(keywords, text)
+
+
+def test_analyze_news_text_keywords_topic_importance():
+    result = analyze_news_text("Apple beats expectations as earnings and revenue rise; guidance raised")
+
+    assert result['keywords'] == ['beat', 'expectations', 'earnings', 'revenue', 'guidance']
+    assert result['topic'] == "Earnings"
+    assert result['important'] is True
+
+
+def test_analyze_news_text_topic_order_and_defaults():
+    """トピックは定義順で最初に一致したもの、該当なしはOther"""
+    assert analyze_news_text("Lawsuit filed over product launch")['topic'] == "Product"
+    assert analyze_news_text("Shares drift in quiet trading") == {
+        'keywords': [], 'topic': "Other", 'important': False
+    }
+    assert analyze_news_text("Analyst upgrade", top_n=1)['keywords'] == ['upgrade']
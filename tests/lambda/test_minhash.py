@@ -0,0 +1,74 @@
+"""
+Tests for lambda/utils/minhash.py
+"""
+
+import importlib
+import itertools
+
+minhash = importlib.import_module("lambda.utils.minhash")
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def test_normalize_and_shingles():
+    """正規化（小文字化・記号除去）してから k-shingle"""
+    assert minhash.normalize_text("  Apple's  Q3: BEAT! ") == "apple s q3 beat"
+    assert minhash.shingles("Abc", 4) == {"abc"}
+    assert minhash.shingles("", 4) == set()
+    assert minhash.shingles("abcde", 4) == {"abcd", "bcde"}
+
+
+def test_signature_is_deterministic():
+    """シードが同じなら別インスタンスでも同じ署名・バンドキー"""
+    first, second = minhash.MinHasher(32), minhash.MinHasher(32)
+    headline = "Apple beats earnings expectations"
+
+    assert first.signature(headline) == second.signature(headline)
+    assert first.band_keys(first.signature(headline), 8) == second.band_keys(second.signature(headline), 8)
+
+
+def test_similarity_estimates_jaccard():
+    """署名の一致率は shingle の Jaccard 係数を近似する"""
+    hasher = minhash.MinHasher(256)
+    headlines = [
+        "Apple beats earnings expectations in third quarter",
+        "Apple beats earnings expectations in the third quarter",
+        "Tesla recalls vehicles over steering defect",
+    ]
+
+    for a, b in itertools.combinations(headlines, 2):
+        exact = _jaccard(minhash.shingles(a), minhash.shingles(b))
+        estimate = minhash.similarity(hasher.signature(a), hasher.signature(b))
+        assert abs(estimate - exact) < 0.15
+
+
+def test_near_duplicates_share_a_band():
+    """ほぼ同じ見出しは少なくとも1つのバンドキーを共有する"""
+    hasher = minhash.MinHasher(32)
+    a = hasher.band_keys(hasher.signature("Apple beats earnings expectations, shares rise"), 8)
+    b = hasher.band_keys(hasher.signature("Apple beats earnings expectations; shares rise"), 8)
+    c = hasher.band_keys(hasher.signature("Fed holds interest rates steady"), 8)
+
+    assert set(a) & set(b)
+    assert not set(a) & set(c)
+
+
+def test_similarity_of_mismatched_signatures():
+    """長さ違い・空の署名は類似度0"""
+    assert minhash.similarity((), ()) == 0.0
+    assert minhash.similarity((1, 2), (1, 2, 3)) == 0.0
+
+
+def test_best_match_picks_most_similar_above_threshold():
+    """閾値以上で最も類似した候補を返す"""
+    candidates = [
+        {'name': 'half', 'signature': (1, 2, 0, 0)},
+        {'name': 'most', 'signature': (1, 2, 3, 0)},
+        {'name': 'none', 'signature': (0, 0, 0, 0)},
+    ]
+
+    assert minhash.best_match(candidates, (1, 2, 3, 4), 0.5)['name'] == 'most'
+    assert minhash.best_match(candidates, (1, 2, 3, 4), 0.8) is None
+    assert minhash.best_match(candidates, None, 0.1) is None
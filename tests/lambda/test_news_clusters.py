@@ -0,0 +1,109 @@
+"""
+Tests for lambda/utils/news_clusters.py (moto DynamoDB)
+"""
+
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+news_clusters = importlib.import_module("lambda.utils.news_clusters")
+constants = importlib.import_module("lambda.utils.constants")
+
+T0 = 1_700_000_000
+
+
+@pytest.fixture
+def index(create_table):
+    create_table(constants.DYNAMODB_TABLES['news_clusters'], 'lsh_key')
+    return news_clusters.NewsClusterIndex()
+
+
+def _news(news_id, headline, symbol='AAPL', offset=0):
+    return {'id': news_id, 'symbol': symbol, 'headline': headline, 'datetime': T0 + offset}
+
+
+def test_near_duplicates_form_one_cluster(index):
+    """同じ銘柄のほぼ同じ見出しは最初の1件にまとめる"""
+    items = [
+        _news(2, 'Apple beats earnings expectations; shares rise', offset=30),
+        _news(1, 'Apple beats earnings expectations, shares rise'),
+        _news(3, 'Apple beats earnings expectations, shares rise', symbol='MSFT'),
+        _news(4, 'Apple faces antitrust lawsuit in Europe', offset=10),
+    ]
+
+    representatives = index.cluster(items)
+
+    assert [(news['id'], news['cluster_size']) for news in representatives] == [(1, 2), (3, 1), (4, 1)]
+
+
+def test_window_splits_clusters(index):
+    """window_sec を過ぎた同じ見出しは別クラスタ"""
+    headline = 'Apple beats earnings expectations, shares rise'
+    items = [_news(1, headline), _news(2, headline, offset=constants.NEWS_CLUSTERING['window_sec'] + 1)]
+
+    assert [news['id'] for news in index.cluster(items)] == [1, 2]
+
+
+def test_recorded_clusters_suppressed_in_later_runs(index):
+    """記録済みのクラスタは次回以降の実行で抑止"""
+    index.cluster([_news(1, 'Apple beats earnings expectations, shares rise')])
+    index.record()
+
+    later = news_clusters.NewsClusterIndex().cluster([
+        _news(2, 'Apple beats earnings expectations; shares rise', offset=600),
+        _news(3, 'Apple faces antitrust lawsuit in Europe', offset=600),
+    ])
+
+    assert [news['id'] for news in later] == [3]
+
+
+def test_unrecorded_clusters_not_suppressed(index):
+    """record() 前（トリガー未発行）のクラスタは抑止しない"""
+    headline = 'Apple beats earnings expectations, shares rise'
+    index.cluster([_news(1, headline)])
+
+    assert [news['id'] for news in news_clusters.NewsClusterIndex().cluster([_news(2, headline)])] == [2]
+
+
+def test_items_without_headline_pass_through(index):
+    """見出しのないニュースはそのまま通す"""
+    items = [{'id': 1, 'symbol': 'AAPL', 'datetime': T0}, {'id': 2, 'symbol': 'AAPL', 'datetime': T0}]
+
+    assert [news['id'] for news in index.cluster(items)] == [1, 2]
+    index.record()
+
+
+def test_band_collisions_keep_earlier_clusters(index, monkeypatch):
+    """同じバンドキーに入った別クラスタを記録しても、先のクラスタの重複を抑止できる"""
+    monkeypatch.setattr(news_clusters._hasher, 'band_keys', lambda signature, bands: ['band'])
+
+    index.cluster([_news(1, 'Apple beats earnings expectations, shares rise')])
+    index.record()
+    second = news_clusters.NewsClusterIndex()
+    other = second.cluster([_news(2, 'Apple faces antitrust lawsuit in Europe', offset=60)])
+    assert [news['id'] for news in other] == [2]
+    second.record()
+
+    later = news_clusters.NewsClusterIndex().cluster([
+        _news(3, 'Apple beats earnings expectations; shares rise', offset=600),
+        _news(4, 'Apple faces antitrust lawsuit in Europe.', offset=600),
+    ])
+
+    assert later == []
+    item = index.table.get_item(Key={'lsh_key': 'AAPL#band'})['Item']
+    assert len(item['clusters']) == 2
+
+
+def test_expired_cluster_entries_ignored(index, monkeypatch):
+    """期限切れのクラスタ（アイテムの TTL 前）は抑止に使わない"""
+    headline = 'Apple beats earnings expectations, shares rise'
+    index.cluster([_news(1, headline)])
+    index.record()
+
+    real_time = news_clusters.time.time
+    monkeypatch.setattr(news_clusters, 'time', SimpleNamespace(
+        time=lambda: real_time() + constants.NEWS_CLUSTERING['window_sec'] + 1
+    ))
+
+    assert [news['id'] for news in news_clusters.NewsClusterIndex().cluster([_news(2, headline)])] == [2]
@@ -0,0 +1,142 @@
+"""
+news_fetch: concurrent per-symbol Finnhub requests, idempotent article ingestion
+"""
+
+import importlib
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+news_fetch = importlib.import_module("lambda.triggers.news_fetch")
+
+
+class FinnhubStub(BaseHTTPRequestHandler):
+    """company-news stub: one article per symbol, 500 for FAIL"""
+
+    def do_GET(self):
+        symbol = parse_qs(urlparse(self.path).query)['symbol'][0]
+        if symbol == 'FAIL':
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        now = int(datetime.utcnow().timestamp())
+        body = json.dumps([
+            {'id': 1, 'headline': f'{symbol} news', 'datetime': now},
+            {'id': 2, 'headline': f'{symbol} old news', 'datetime': now - 7200},
+        ]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FinnhubStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/company-news"
+    server.shutdown()
+
+
+def test_fetch_news_for_symbols_in_symbol_order(endpoint):
+    """全銘柄を並行取得し、銘柄順に返す。失敗した銘柄は failed_symbols に入る"""
+    from_time = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+
+    news, failed = news_fetch.fetch_news_for_symbols(
+        ['AAPL', 'FAIL', 'MSFT', 'GOOGL'], 'token', from_time, endpoint
+    )
+
+    assert [item['headline'] for item in news] == ['AAPL news', 'MSFT news', 'GOOGL news']
+    assert [item['symbol'] for item in news] == ['AAPL', 'MSFT', 'GOOGL']
+    assert failed == ['FAIL']
+
+
+def test_request_news_for_symbol_raises_on_http_error(endpoint):
+    with pytest.raises(Exception):
+        news_fetch.request_news_for_symbol('FAIL', 'token', datetime.utcnow().isoformat(), endpoint)
+
+
+@pytest.fixture
+def article_table(create_table):
+    return create_table(news_fetch.DYNAMODB_TABLES['news_articles'], 'article_key')
+
+
+def _article(article_id, symbol='AAPL', **fields):
+    return {'id': article_id, 'symbol': symbol, 'headline': f'news {article_id}', 'datetime': 1700000000, **fields}
+
+
+def test_article_key_falls_back_to_url_hash():
+    """id がなければ url + datetime のハッシュ。銘柄ごとに別キー"""
+    item = {'symbol': 'AAPL', 'url': 'https://example.com/a', 'datetime': 1700000000}
+
+    key = news_fetch.article_key(item)
+
+    assert key.startswith('AAPL#') and len(key) == len('AAPL#') + 32
+    assert key == news_fetch.article_key(dict(item))
+    assert key != news_fetch.article_key({**item, 'datetime': 1700000001})
+    assert news_fetch.article_key(_article(7)) != news_fetch.article_key(_article(7, symbol='MSFT'))
+
+
+def test_claim_new_articles_once(article_table):
+    """同じ記事は1回だけ取り込む（同一バッチ内・実行をまたいでも）"""
+    first = news_fetch.claim_new_articles([_article(1), _article(2), _article(1)], article_table)
+    second = news_fetch.claim_new_articles([_article(2), _article(3), _article(1, symbol='MSFT')], article_table)
+
+    assert [(item['id'], item['symbol']) for item in first] == [(1, 'AAPL'), (2, 'AAPL')]
+    assert [(item['id'], item['symbol']) for item in second] == [(3, 'AAPL'), (1, 'MSFT')]
+
+    record = article_table.get_item(Key={'article_key': 'AAPL#1'})['Item']
+    assert record['published_at'] == 1700000000
+    assert int(record['expires_at']) > datetime.utcnow().timestamp()
+
+
+def test_concurrent_claim_loses_to_earlier_run(article_table, monkeypatch):
+    """BatchGetItem 後に他の実行が取り込んだ記事は条件付き書き込みで除外"""
+    monkeypatch.setattr(news_fetch, 'get_known_article_keys', lambda keys, table_name: set())
+    news_fetch.claim_new_articles([_article(1)], article_table)
+
+    assert news_fetch.claim_new_articles([_article(1), _article(2)], article_table) == [_article(2)]
+
+
+def test_claim_fails_open_without_table(aws):
+    """テーブルにアクセスできなければ新規扱い（取りこぼさない）"""
+    table = news_fetch.get_table('missing-table')
+
+    assert news_fetch.claim_new_articles([_article(1)], table) == [_article(1)]
+
+
+def _news(symbol, published, article_id=None):
+    return {'id': article_id or f"{symbol}-{published}", 'symbol': symbol, 'datetime': published}
+
+
+def test_group_news_triggers_by_symbol_and_window():
+    """銘柄ごとに、最初のニュースから window_sec 以内をまとめる"""
+    news = [_news('AAPL', 1090), _news('MSFT', 1000), _news('AAPL', 1000), _news('AAPL', 1061), _news('AAPL', 1030)]
+
+    groups = news_fetch.group_news_triggers(news, window_sec=60, max_items=5)
+
+    assert [[(item['symbol'], item['datetime']) for item in group] for group in groups] == [
+        [('MSFT', 1000)],
+        [('AAPL', 1000), ('AAPL', 1030)],
+        [('AAPL', 1061), ('AAPL', 1090)],
+    ]
+
+
+def test_group_news_triggers_max_items():
+    """1グループは max_items 件まで"""
+    news = [_news('AAPL', 1000 + i) for i in range(7)]
+
+    groups = news_fetch.group_news_triggers(news, window_sec=60, max_items=3)
+
+    assert [len(group) for group in groups] == [3, 3, 1]
+    assert [item['datetime'] for group in groups for item in group] == list(range(1000, 1007))
@@ -0,0 +1,73 @@
+"""
+Tests for lambda/utils/pattern_matcher.py
+"""
+
+import importlib
+
+import pytest
+
+pattern_matcher = importlib.import_module("lambda.utils.pattern_matcher")
+
+
+@pytest.mark.parametrize("condition, features, expected", [
+    ("sentiment_score > 0.5", {'sentiment_score': 0.7}, True),
+    ("sentiment_score > 0.5", {'sentiment_score': 0.2}, False),
+    ("sentiment_score > 0.5", {'sentiment_score': None}, None),
+    ("topic == 'Earnings'", {'topic': 'Earnings'}, True),
+    ("'beat' in keywords", {'keywords': ['miss']}, False),
+    ("0.1 < change_pct <= 3", {'change_pct': 2}, True),
+    ("topic == 'M&A' or sentiment_score > 0.5", {'topic': 'Other', 'sentiment_score': None}, None),
+    ("topic == 'M&A' and sentiment_score > 0.5", {'topic': 'Other', 'sentiment_score': None}, False),
+    ("not topic == 'Legal'", {'topic': 'Legal'}, False),
+    ("topic == 1", {'topic': 'Earnings'}, False),
+    ("sentiment_score > 'a'", {'sentiment_score': 0.1}, None),
+])
+def test_compile_condition(condition, features, expected):
+    """三値評価（判定不能は None）"""
+    assert pattern_matcher.compile_condition(condition)(features) is expected
+
+
+@pytest.mark.parametrize("condition", ["foo(1)", "x +", "a.b > 1", "x is None"])
+def test_unsupported_condition(condition):
+    """未対応の式は None（除外しない）"""
+    assert pattern_matcher.compile_condition(condition) is None
+
+
+def test_candidates_excludes_only_definitely_false():
+    """確実に False の条件を持つパターンだけ除外"""
+    matcher = pattern_matcher.PatternMatcher({'patterns': [
+        {'pattern_id': 'p1', 'conditions': ["topic == 'Earnings'", "sentiment_score > 0.5"]},
+        {'pattern_id': 'p2', 'conditions': ["topic == 'Legal'"]},
+        {'pattern_id': 'p3', 'conditions': ["unsupported(x)"]},
+    ]})
+
+    candidates = matcher.candidates({'topic': 'Earnings', 'sentiment_score': None})
+
+    assert [p['pattern_id'] for p in candidates] == ['p1', 'p3']
+
+
+def test_volatility_trigger_matches_neutral_pattern():
+    """ニュースなしトリガーは Phase 0 の 'Neutral' ラベルに一致する"""
+    features = pattern_matcher.extract_trigger_features({'symbol': 'AAPL', 'change_pct': 3.1})
+    matcher = pattern_matcher.PatternMatcher({'patterns': [
+        {'pattern_id': 'neutral', 'conditions': ["sentiment_label == 'Neutral'", "change_pct > 2"]},
+        {'pattern_id': 'positive', 'conditions': ["sentiment_label == 'Positive'"]},
+    ]})
+
+    assert features['sentiment_label'] == 'Neutral'
+    assert [p['pattern_id'] for p in matcher.candidates(features)] == ['neutral']
+
+
+def test_news_trigger_features():
+    """ニューストリガーはキーワード・トピックを計算し、感情は不明"""
+    features = pattern_matcher.extract_trigger_features({'news': {
+        'headline': 'Apple earnings beat expectations',
+        'summary': '',
+        'datetime': 1700000000,  # 2023-11-14 22:13 UTC = 17:13 ET
+    }})
+
+    assert features['topic'] == 'Earnings'
+    assert features['keywords'] == ['beat', 'expectations', 'earnings']
+    assert features['sentiment_label'] is None
+    assert features['announcement_time'] == 'after_market'
+    assert features['cluster_size'] == 1
@@ -0,0 +1,110 @@
+"""
+price_monitor: bulk quotes with per-symbol fallback, concurrent per-symbol quotes
+"""
+
+import importlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+price_monitor = importlib.import_module("lambda.triggers.price_monitor")
+
+CHANGES = {'AAPL': 2.4, 'MSFT': -0.5, 'NVDA': 2.4, 'AMZN': -3.1}
+
+
+class AlphaVantageStub(BaseHTTPRequestHandler):
+    """GLOBAL_QUOTE / REALTIME_BULK_QUOTES stub. Bulk omits AMZN and NVDA; 500 for FAIL"""
+
+    requests = []
+    bulk_available = True
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        self.requests.append((params['function'], params['symbol']))
+
+        if params['symbol'] == 'FAIL':
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        if params['function'] == 'REALTIME_BULK_QUOTES':
+            if not self.bulk_available:
+                data = {'Information': 'premium endpoint'}
+            else:
+                data = {'data': [
+                    {'symbol': symbol, 'close': '100.0', 'change_percent': f'{CHANGES[symbol]}%'}
+                    for symbol in params['symbol'].split(',') if symbol in ('AAPL', 'MSFT')
+                ]}
+        else:
+            data = {'Global Quote': {
+                '05. price': '200.0', '10. change percent': f"{CHANGES[params['symbol']]}%"
+            }}
+
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    monkeypatch.setattr(AlphaVantageStub, 'requests', [])
+    monkeypatch.setattr(AlphaVantageStub, 'bulk_available', True)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), AlphaVantageStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/query"
+    server.shutdown()
+
+
+def test_per_symbol_quotes_in_symbol_order(endpoint):
+    """銘柄ごとに並行取得し、銘柄順に返す。失敗した銘柄は None"""
+    results = price_monitor.check_volatility_all(['AAPL', 'FAIL', 'MSFT', 'NVDA'], 'key', endpoint=endpoint)
+
+    assert list(results) == ['AAPL', 'FAIL', 'MSFT', 'NVDA']
+    assert results['FAIL'] is None
+    assert results['AAPL'] == {'triggered': True, 'current_price': 200.0, 'change_pct': 2.4, 'threshold': 2.0}
+    assert results['MSFT']['triggered'] is False
+    assert results['NVDA']['triggered'] is False
+    assert all(function == 'GLOBAL_QUOTE' for function, _ in AlphaVantageStub.requests)
+
+
+def test_bulk_quotes_single_request(endpoint):
+    """一括取得は1リクエストで全銘柄を判定する"""
+    results = price_monitor.check_volatility_all(['AAPL', 'MSFT'], 'key', bulk=True, endpoint=endpoint)
+
+    assert AlphaVantageStub.requests == [('REALTIME_BULK_QUOTES', 'AAPL,MSFT')]
+    assert results['AAPL'] == {'triggered': True, 'current_price': 100.0, 'change_pct': 2.4, 'threshold': 2.0}
+    assert results['MSFT']['triggered'] is False
+
+
+def test_bulk_missing_symbols_fall_back_to_per_symbol(endpoint):
+    """一括レスポンスにない銘柄だけ個別に取得する"""
+    results = price_monitor.check_volatility_all(
+        ['AAPL', 'AMZN', 'MSFT', 'NVDA'], 'key', bulk=True, endpoint=endpoint
+    )
+
+    assert list(results) == ['AAPL', 'AMZN', 'MSFT', 'NVDA']
+    assert results['AAPL']['current_price'] == 100.0
+    assert results['AMZN'] == {'triggered': True, 'current_price': 200.0, 'change_pct': -3.1, 'threshold': 2.5}
+    assert results['NVDA']['current_price'] == 200.0
+    assert sorted(AlphaVantageStub.requests[1:]) == [('GLOBAL_QUOTE', 'AMZN'), ('GLOBAL_QUOTE', 'NVDA')]
+
+
+def test_bulk_unavailable_falls_back_for_all(endpoint):
+    """一括取得が使えなければ全銘柄を個別に取得する"""
+    AlphaVantageStub.bulk_available = False
+
+    results = price_monitor.check_volatility_all(['AAPL', 'MSFT'], 'key', bulk=True, endpoint=endpoint)
+
+    assert results['AAPL']['current_price'] == 200.0
+    assert results['MSFT']['current_price'] == 200.0
+    assert price_monitor.check_volatility_bulk(['AAPL'], 'key', endpoint) is None
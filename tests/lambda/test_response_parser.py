@@ -0,0 +1,127 @@
+"""
+Tests for lambda/utils/response_parser.py
+"""
+
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+response_parser = importlib.import_module("lambda.utils.response_parser")
+
+DECISION = {
+    'matched_pattern_id': 'P001',
+    'match_score': 85,
+    'action': 'Buy',
+    'confidence': 'High',
+    'entry_price': 180.5,
+}
+
+
+def test_tool_input_is_the_result():
+    """強制ツール呼び出しの input をそのまま採用"""
+    content = [
+        {'type': 'text', 'text': 'ignored'},
+        {'type': 'tool_use', 'name': 'record_decision', 'input': DECISION},
+    ]
+    stats = response_parser.ParseStats('test')
+
+    result = response_parser.parse_model_response(
+        content, response_parser.DECISION_SCHEMA, tool_name='record_decision', stats=stats
+    )
+
+    assert result == DECISION
+    assert (stats.calls, stats.failures) == (1, 0)
+
+
+def test_sdk_objects_and_text_fallback():
+    """SDK オブジェクトのテキストブロックから JSON を抽出"""
+    content = [SimpleNamespace(type='text', text='Result:\n```json\n{"action": "Hold"}\n```')]
+
+    result = response_parser.parse_model_response(content, {'type': 'object', 'required': ['action']})
+
+    assert result == {'action': 'Hold'}
+
+
+def test_invalid_tool_input_falls_back_to_text():
+    """スキーマ違反のツール入力は捨ててテキストを試す"""
+    content = [
+        {'type': 'tool_use', 'name': 'record_decision', 'input': {**DECISION, 'action': 'Short'}},
+        {'type': 'text', 'text': '{"matched_pattern_id": "P002", "match_score": 10, '
+                                 '"action": "Hold", "confidence": "Low"}'},
+    ]
+
+    result = response_parser.parse_model_response(
+        content, response_parser.DECISION_SCHEMA, tool_name='record_decision'
+    )
+
+    assert result['matched_pattern_id'] == 'P002'
+
+
+def test_failure_is_counted():
+    """解析できない応答は失敗として数える"""
+    stats = response_parser.ParseStats('test')
+
+    assert response_parser.parse_model_response('no json here', {'type': 'object'}, stats=stats) is None
+    response_parser.parse_model_response('{"a": 1}', {'type': 'object'}, stats=stats)
+
+    assert (stats.calls, stats.failures, stats.successes) == (2, 1, 1)
+    assert stats.wasted_per_success == 1.0
+    assert stats.summary() == "test: 1/2 parsed, 1.00 wasted calls per success"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1}', {'a': 1}),
+    ('The {best} answer is {"a": 1} here', {'a': 1}),
+    ('```json\n[{"a": 1}]\n```', [{'a': 1}]),
+    ('{"broken": } then {"a": 2}', {'a': 2}),
+    ('nothing', None),
+])
+def test_extract_json(text, expected):
+    """前後の文章や余分な括弧を飛ばして最初の JSON を返す"""
+    assert response_parser.extract_json(text) == expected
+
+
+def test_extract_json_skips_values_not_matching_schema():
+    """スキーマに合わない JSON は飛ばす"""
+    text = '{"note": "x"} {"patterns": []}'
+
+    assert response_parser.extract_json(text, response_parser.list_schema('patterns')) == {'patterns': []}
+
+
+def test_partial_fields_only_complete_values():
+    """ストリーム途中では完結したスカラー値だけを返す"""
+    text = '{"matched_pattern_id": "P001", "match_score": 8'
+    fields = ['matched_pattern_id', 'match_score', 'action']
+
+    assert response_parser.partial_fields(text, fields) == {'matched_pattern_id': 'P001'}
+    assert response_parser.partial_fields(text + '5, "action": "Bu', fields) == {
+        'matched_pattern_id': 'P001', 'match_score': 85
+    }
+
+
+def test_validate_reports_errors():
+    """型・enum・範囲・必須項目の違反を報告"""
+    errors = response_parser.validate(
+        {'matched_pattern_id': 1, 'match_score': 120, 'action': 'Short'},
+        response_parser.DECISION_SCHEMA
+    )
+
+    assert "$: missing 'confidence'" in errors
+    assert "$.matched_pattern_id: expected string, got int" in errors
+    assert "$.match_score: 120 > 100" in errors
+    assert "$.action: 'Short' not in ['Buy', 'Sell', 'Hold']" in errors
+    assert response_parser.validate(True, {'type': 'number'}) == ["$: expected number, got bool"]
+
+
+def test_valid_items_drops_only_invalid():
+    """不正な要素だけを捨てる"""
+    items = [
+        {**DECISION, 'item_index': 0},
+        {**DECISION, 'item_index': 1, 'confidence': 'Very'},
+        {**DECISION, 'item_index': 2},
+    ]
+
+    valid = response_parser.valid_items(items, response_parser.DECISION_ITEM_SCHEMA)
+
+    assert [item['item_index'] for item in valid] == [0, 2]
@@ -0,0 +1,71 @@
+"""
+Tests for lambda/core/unified_judgment.py (AI analysis hand-off)
+"""
+
+import importlib
+import json
+
+import pytest
+
+unified_judgment = importlib.import_module("lambda.core.unified_judgment")
+
+
+class _AllowAll:
+    """Circuit breaker stand-in that allows every trigger"""
+
+    def __init__(self):
+        self.logged = []
+
+    def check(self, trigger_type):
+        return {"allowed": True}
+
+    def log_trigger(self, trigger_type, details):
+        self.logged.append(trigger_type)
+
+
+@pytest.fixture
+def handoff(monkeypatch):
+    """Recorded hand-off payloads; set 'delegated' to control the invoker result"""
+    calls = {'payloads': [], 'delegated': True}
+
+    def invoker(payload):
+        calls['payloads'].append(payload)
+        return {'delegated': calls['delegated']}
+
+    monkeypatch.setattr(unified_judgment, '_circuit_breaker', _AllowAll())
+    monkeypatch.setattr(unified_judgment, '_ai_analysis_invoker', invoker)
+    return calls
+
+
+EVENT = {'id': 'evt-123', 'detail': {'trigger_type': 'news', 'symbol': 'AAPL'}}
+
+
+def test_handoff_carries_idempotency_key_and_new_correlation_id(handoff):
+    """冪等キーはイベントID、相関IDは別に生成"""
+    response = unified_judgment.lambda_handler(EVENT, None)
+    unified_judgment.lambda_handler(EVENT, None)
+
+    assert response['statusCode'] == 200
+    first, second = handoff['payloads']
+    assert first['idempotency_key'] == second['idempotency_key'] == 'evt-123'
+    assert first['correlation_id'] != 'evt-123'
+    assert first['correlation_id'] != second['correlation_id']
+
+
+def test_failed_handoff_is_not_2xx(handoff):
+    """委譲失敗は 2xx 以外を返す"""
+    handoff['delegated'] = False
+
+    response = unified_judgment.lambda_handler(EVENT, None)
+
+    assert response['statusCode'] == 502
+    body = json.loads(response['body'])
+    assert body['analysis_result']['delegated'] is False
+
+
+def test_idempotency_key_without_event_id():
+    """イベントIDがなければ detail のハッシュ（キー順に依存しない）"""
+    key = unified_judgment.make_idempotency_key({'detail': {'a': 1, 'b': 2}})
+
+    assert key == unified_judgment.make_idempotency_key({'detail': {'b': 2, 'a': 1}})
+    assert key != unified_judgment.make_idempotency_key({'detail': {'a': 1, 'b': 3}})
@@ -0,0 +1,134 @@
+"""
+data_loader: filtered, chunked dataset reads
+"""
+
+import pandas as pd
+import pytest
+
+from phase0_data_analysis.scripts.data_loader import (
+    convert_dataset, dataset_path, iter_news_batches, iter_news_chunks, load_news, load_prices
+)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    news = pd.DataFrame({
+        'date': pd.date_range('2020-01-01', periods=12, freq='D').strftime('%Y-%m-%d'),
+        'symbol': ['AAPL', 'MSFT', 'ZZZZ'] * 4,
+        'headline': [f'headline {i}' for i in range(12)],
+        'content': [f'content {i}' for i in range(12)],
+        'timestamp': ['2020-01-01 08:00:00', '2020/01/02 12:30', '2020-01-03 17:00:00'] * 4,
+        'url': ['http://example.com'] * 12,
+    })
+    news.to_csv(tmp_path / 'news.csv', index=False)
+
+    prices = pd.DataFrame({
+        'date': list(pd.date_range('2019-11-01', '2020-02-28', freq='D').strftime('%Y-%m-%d')) * 3,
+        'symbol': ['AAPL'] * 120 + ['MSFT'] * 120 + ['ZZZZ'] * 120,
+        'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 100.0,
+    })
+    prices.to_csv(tmp_path / 'stock_prices.csv', index=False)
+
+    return tmp_path
+
+
+def test_news_keeps_target_symbols_and_timestamp(data_dir):
+    """対象銘柄のみ残し、timestamp列を保持する（不要列は読まない）"""
+    news_df = load_news(data_dir / 'news.csv', symbols=['AAPL', 'MSFT'])
+
+    assert len(news_df) == 8
+    assert set(news_df['symbol'].astype(str)) == {'AAPL', 'MSFT'}
+    assert list(news_df.columns) == ['date', 'symbol', 'headline', 'content', 'timestamp']
+    assert str(news_df['symbol'].dtype) == 'category'
+    assert pd.api.types.is_datetime64_any_dtype(news_df['date'])
+    assert news_df['timestamp'].iloc[1] == '2020/01/02 12:30'
+
+
+def test_news_without_timestamp_column(data_dir):
+    pd.read_csv(data_dir / 'news.csv').drop(columns=['timestamp']).to_csv(data_dir / 'news.csv', index=False)
+
+    news_df = load_news(data_dir / 'news.csv', symbols=['AAPL'])
+
+    assert list(news_df.columns) == ['date', 'symbol', 'headline', 'content']
+    assert len(news_df) == 4
+
+
+def test_news_date_range_and_max_rows(data_dir):
+    chunks = list(iter_news_chunks(data_dir / 'news.csv', ['AAPL', 'MSFT'], '2020-01-04', '2020-01-08', chunksize=3))
+
+    dates = pd.concat(chunks)['date']
+    assert dates.min() >= pd.Timestamp('2020-01-04') and dates.max() <= pd.Timestamp('2020-01-08')
+    assert len(load_news(data_dir / 'news.csv', symbols=['AAPL', 'MSFT'], max_rows=3, chunksize=2)) == 3
+
+
+def test_iter_news_batches_streams_batches_with_price_windows(data_dir):
+    """バッチごとに、そのニュースに必要な期間・銘柄の株価だけを読み込む"""
+    batches = list(iter_news_batches(
+        data_dir / 'news.csv', data_dir / 'stock_prices.csv', symbols=['AAPL', 'MSFT'],
+        max_rows=5, batch_size=3
+    ))
+
+    assert [len(news_df) for news_df, _ in batches] == [2, 2, 1]
+
+    for news_df, prices_df in batches:
+        assert set(prices_df['symbol'].astype(str)) == set(news_df['symbol'].astype(str))
+        assert prices_df['date'].min() <= news_df['date'].min() - pd.Timedelta(days=5)
+        assert prices_df['date'].max() >= news_df['date'].max() + pd.Timedelta(days=1)
+        assert len(prices_df) < 120 * len(set(news_df['symbol']))
+
+
+def test_parquet_store_matches_csv(data_dir):
+    """Parquetストアから読んでもCSVと同じ結果になる"""
+    csv_news = load_news(data_dir / 'news.csv', symbols=['AAPL', 'MSFT'])
+    csv_prices = load_prices(data_dir / 'stock_prices.csv', ['AAPL'], '2020-01-01', '2020-01-10')
+
+    assert convert_dataset(data_dir, 'news') == 12
+    convert_dataset(data_dir, 'stock_prices')
+    assert dataset_path(data_dir, 'news').is_dir()
+
+    parquet_news = load_news(dataset_path(data_dir, 'news'), symbols=['AAPL', 'MSFT'])
+    parquet_prices = load_prices(dataset_path(data_dir, 'stock_prices'), ['AAPL'], '2020-01-01', '2020-01-10')
+
+    key = ['date', 'symbol']
+    pd.testing.assert_frame_equal(
+        parquet_news.sort_values(key).reset_index(drop=True)[csv_news.columns].astype({'symbol': str}),
+        csv_news.sort_values(key).reset_index(drop=True).astype({'symbol': str}),
+        check_dtype=False
+    )
+    assert len(parquet_prices) == len(csv_prices) == 10
+
+
+def test_convert_more_than_1024_partitions(tmp_path):
+    """1024 を超える (symbol, year) パーティションも変換できる"""
+    symbols = [f"S{i:04d}" for i in range(1100)]
+    pd.DataFrame({
+        'date': ['2020-01-02'] * 1100,
+        'symbol': symbols,
+        'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 100.0,
+    }).to_csv(tmp_path / 'stock_prices.csv', index=False)
+
+    assert convert_dataset(tmp_path, 'stock_prices') == 1100
+    assert len(load_prices(dataset_path(tmp_path, 'stock_prices'), symbols)) == 1100
+
+
+def test_failed_conversion_keeps_previous_store(data_dir, monkeypatch):
+    """変換が途中で失敗しても既存ストアを残し、途中のストアを公開しない"""
+    convert_dataset(data_dir, 'news')
+
+    import pyarrow.parquet as pq
+    write_to_dataset = pq.write_to_dataset
+    calls = []
+
+    def failing_write(*args, **kwargs):
+        calls.append(1)
+        if len(calls) > 1:
+            raise OSError("disk full")
+        return write_to_dataset(*args, **kwargs)
+
+    monkeypatch.setattr(pq, 'write_to_dataset', failing_write)
+
+    with pytest.raises(OSError):
+        convert_dataset(data_dir, 'news', chunksize=5)
+
+    assert len(load_news(dataset_path(data_dir, 'news'), symbols=['AAPL', 'MSFT'])) == 8
+    assert sorted(p.name for p in (data_dir / 'parquet').iterdir()) == ['news']
@@ -0,0 +1,82 @@
+"""
+FeatureCache: content-addressed SQLite cache of NLP features
+"""
+
+import itertools
+
+import pandas as pd
+import pytest
+
+from phase0_data_analysis.scripts import feature_cache
+from phase0_data_analysis.scripts.feature_cache import FeatureCache
+from phase0_data_analysis.scripts.feature_extraction import NewsFeatureExtractor
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing time.time() so LRU order is deterministic"""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(feature_cache.time, 'time', lambda: float(next(ticks)))
+
+
+def test_put_and_get_many_round_trip(tmp_path):
+    cache = FeatureCache(tmp_path / "features.sqlite")
+    key = FeatureCache.make_key("Apple beats earnings", "1")
+
+    cache.put_many([(key, {'sentiment_score': 0.5, 'sentiment_label': 'Positive'})])
+
+    assert cache.get_many([key, 'missing']) == {key: {'sentiment_score': 0.5, 'sentiment_label': 'Positive'}}
+    assert len(cache) == 1
+
+
+def test_key_depends_on_text_and_version():
+    assert FeatureCache.make_key("text", "1") == FeatureCache.make_key("text", "1")
+    assert FeatureCache.make_key("text", "1") != FeatureCache.make_key("text", "2")
+    assert FeatureCache.make_key("text", "1") != FeatureCache.make_key("text ", "1")
+
+
+def test_persists_across_instances(tmp_path):
+    path = tmp_path / "nested" / "features.sqlite"
+    cache = FeatureCache(path)
+    cache.put_many([('k', {'v': 1})])
+    cache.close()
+
+    assert FeatureCache(path).get_many(['k']) == {'k': {'v': 1}}
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    """max_entriesを超えると最も古くアクセスされたエントリから削除する"""
+    cache = FeatureCache(tmp_path / "features.sqlite", max_entries=2)
+
+    cache.put_many([('a', {'v': 'a'})])
+    cache.put_many([('b', {'v': 'b'})])
+    cache.get_many(['a'])              # a is now more recent than b
+    cache.put_many([('c', {'v': 'c'})])
+
+    assert len(cache) == 2
+    assert set(cache.get_many(['a', 'b', 'c'])) == {'a', 'c'}
+
+
+def test_extractor_scores_only_cache_misses(tmp_path, monkeypatch):
+    """キャッシュ済みのテキストは再スコアリングしない"""
+    cache = FeatureCache(tmp_path / "features.sqlite")
+    extractor = NewsFeatureExtractor(cache=cache)
+    news_df = pd.DataFrame({
+        'headline': ['Apple beats earnings', 'Regulator sues bank'],
+        'content': ['', ''],
+        'timestamp': ['2020-01-03 10:00:00', '2020-01-03 10:00:00'],
+    })
+
+    first = extractor.extract_features_batch(news_df)
+
+    scored = []
+    original = extractor.extract_sentiment
+    monkeypatch.setattr(extractor, 'extract_sentiment', lambda text: scored.append(text) or original(text))
+
+    extended = pd.concat([news_df, pd.DataFrame({
+        'headline': ['New product launch'], 'content': [''], 'timestamp': ['2020-01-03 10:00:00']
+    })], ignore_index=True)
+    second = extractor.extract_features_batch(extended)
+
+    assert scored == ['New product launch ']
+    pd.testing.assert_frame_equal(second.iloc[:2], first)
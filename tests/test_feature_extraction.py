@@ -0,0 +1,103 @@
+"""
+NewsFeatureExtractor: batch extraction matches per-row extraction
+"""
+
+import pandas as pd
+import pytest
+
+from phase0_data_analysis.scripts.feature_extraction import NewsFeatureExtractor
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return NewsFeatureExtractor()
+
+
+def test_announcement_time_batch_matches_scalar(extractor):
+    """混在フォーマット・空値でもバッチと1行ずつの判定が一致する"""
+    timestamps = pd.Series([
+        '2020-01-03 10:00:00',
+        '2020/01/03 10:00',
+        '2020-01-03T05:30:00',
+        '01/03/2020 17:15',
+        '2020-01-03 22:00:00',
+        '',
+        None,
+        'not a date',
+    ])
+
+    batch = extractor._announcement_time_batch(timestamps)
+    scalar = [extractor.get_announcement_time(value) for value in timestamps]
+
+    assert list(batch) == scalar
+    assert batch[1] == "market_hours"
+
+
+def test_announcement_time_batch_empty(extractor):
+    assert list(extractor._announcement_time_batch(pd.Series([], dtype=object))) == []
+
+
+def test_extract_features_batch_matches_extract_all_features(extractor):
+    """extract_features_batch() は各行の extract_all_features() と同じ結果を返す"""
+    news_df = pd.DataFrame({
+        'headline': [
+            'Apple beats earnings estimates, raises guidance',
+            'Regulator files lawsuit over merger',
+            'New product launch disappoints investors',
+        ],
+        'content': ['Revenue grew strongly.', '', 'Shares fell after the event.'],
+        'timestamp': ['2020-01-03 08:00:00', '2020/01/03 12:00', None],
+    }, index=[10, 11, 12])
+
+    batch = extractor.extract_features_batch(news_df)
+
+    assert list(batch.index) == [10, 11, 12]
+    for index, row in news_df.iterrows():
+        expected = extractor.extract_all_features(row)
+        actual = batch.loc[index]
+        for column, value in expected.items():
+            assert actual[column] == value, column
+
+
+def test_parallel_sentiment_matches_single_process(extractor):
+    """workers>1（プロセスプール）でも順序・値が workers=1 と一致する"""
+    news_df = pd.DataFrame({
+        'headline': [f'Headline {i}: shares {word}' for i, word in enumerate(
+            ['soar', 'plunge', 'hold steady', 'beat estimates', 'miss badly', 'rally', 'slump'] * 2
+        )],
+        'content': ['Strong quarter.', 'Weak outlook.', ''] * 4 + ['Mixed results.', 'Lawsuit filed.'],
+        'timestamp': ['2020-01-03 10:00:00'] * 14,
+    })
+
+    single = extractor.extract_features_batch(news_df, workers=1)
+    parallel = extractor.extract_features_batch(news_df, workers=3)
+
+    pd.testing.assert_frame_equal(parallel, single)
+    assert single['sentiment_score'].nunique() > 1
+
+
+def test_batch_keywords_use_shared_matcher_once_per_text(extractor, monkeypatch):
+    """キーワード・トピックは共有マッチャーで重複のないテキストごとに1回だけ照合する"""
+    from phase0_data_analysis.scripts import feature_extraction
+
+    analyze = feature_extraction.keyword_matcher.analyze_news_text
+    calls = []
+
+    def counting_analyze(text, top_n=5):
+        calls.append(text)
+        return analyze(text, top_n)
+
+    monkeypatch.setattr(feature_extraction.keyword_matcher, 'analyze_news_text', counting_analyze)
+
+    news_df = pd.DataFrame({
+        'headline': ['Earnings beat, guidance raised', 'Merger lawsuit filed'] * 3,
+        'content': [''] * 6,
+    })
+    features = extractor.extract_features_batch(news_df)
+
+    assert len(calls) == 2
+    assert features['keywords'].iloc[0] == features['keywords'].iloc[2]
+    assert features['topic'].tolist()[:2] == [
+        extractor.classify_topic('Earnings beat, guidance raised'),
+        extractor.classify_topic('Merger lawsuit filed'),
+    ]
@@ -0,0 +1,85 @@
+"""
+PriceIndex: per-symbol sorted lookups
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from phase0_data_analysis.scripts.feature_extraction import extract_stock_features
+from phase0_data_analysis.scripts.price_index import PriceIndex
+
+
+@pytest.fixture
+def prices_df():
+    dates = pd.date_range('2020-01-01', periods=8, freq='D')
+    aapl = pd.DataFrame({
+        'date': dates,
+        'symbol': 'AAPL',
+        'close': [100.0, 101.0, 102.0, 104.0, 103.0, 105.0, 107.0, 110.0],
+        'volume': [10.0, 12.0, 11.0, 15.0, 14.0, 20.0, 18.0, 30.0],
+    })
+    msft = pd.DataFrame({
+        'date': dates[:3],
+        'symbol': 'MSFT',
+        'close': [200.0, 201.0, 202.0],
+        'volume': [5.0, 5.0, 5.0],
+    })
+    # Unsorted input: the index must sort per symbol
+    return pd.concat([aapl, msft]).sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def test_history_before_returns_last_rows_strictly_before_date(prices_df):
+    index = PriceIndex(prices_df)
+
+    closes, volumes = index.history_before('AAPL', '2020-01-07', 5)
+
+    np.testing.assert_array_equal(closes, [101.0, 102.0, 104.0, 103.0, 105.0])
+    np.testing.assert_array_equal(volumes, [12.0, 11.0, 15.0, 14.0, 20.0])
+
+
+def test_history_before_short_history_and_unknown_symbol(prices_df):
+    index = PriceIndex(prices_df)
+
+    closes, _ = index.history_before('MSFT', '2020-01-03', 5)
+
+    np.testing.assert_array_equal(closes, [200.0, 201.0])
+    assert index.history_before('TSLA', '2020-01-03', 5) is None
+    assert 'MSFT' in index and 'TSLA' not in index
+
+
+def test_close_and_next_close(prices_df):
+    index = PriceIndex(prices_df)
+
+    assert index.close_and_next_close('AAPL', '2020-01-02') == (101.0, 102.0)
+    # Date not traded / last date / unknown symbol
+    assert index.close_and_next_close('AAPL', '2019-12-31') is None
+    assert index.close_and_next_close('AAPL', '2020-01-08') is None
+    assert index.close_and_next_close('TSLA', '2020-01-02') is None
+
+
+def test_from_prices_reuses_index(prices_df):
+    index = PriceIndex(prices_df)
+
+    assert PriceIndex.from_prices(index) is index
+
+
+def test_extract_stock_features_same_for_dataframe_and_index(prices_df):
+    """DataFrameとPriceIndexで同じ特徴量になる"""
+    from_df = extract_stock_features(prices_df, 'AAPL', '2020-01-07')
+    from_index = extract_stock_features(PriceIndex(prices_df), 'AAPL', '2020-01-07')
+
+    assert from_df == from_index
+    assert from_df == {
+        'pre_announcement_trend': 3.96,
+        'volatility_5d': round(float(np.std([101.0, 102.0, 104.0, 103.0, 105.0], ddof=1)), 2),
+        'volume_spike': round(20.0 / 14.0, 2),
+    }
+
+
+def test_extract_stock_features_defaults_without_history(prices_df):
+    assert extract_stock_features(prices_df, 'MSFT', '2020-01-03') == {
+        'pre_announcement_trend': 0.0,
+        'volatility_5d': 0.0,
+        'volume_spike': 1.0
+    }